@@ -0,0 +1,177 @@
+"""
+Audio pipeline benchmark
+Measures per-transcription upload preparation latency, bytes copied and upload size
+
+Usage:
+    python benchmark_audio.py             # Offline: compare temp-file vs in-memory upload paths
+    python benchmark_audio.py --backends  # Also compare ASR backends installed here (OpenAI only with --live)
+    python benchmark_audio.py --live      # Also time real Whisper calls (uses API credits)
+"""
+
+import io
+import os
+import sys
+import time
+import wave
+import tempfile
+import tracemalloc
+import numpy as np
+sys.path.append('utils')
+from audio_helper import prepare_upload, preprocess_for_asr, audio_view, transcribe_audio, get_transcription_stats
+from asr_backends import get_asr_backend, available_backends
+
+# Recording lengths to test, in seconds
+DURATIONS = [10, 60, 300]
+
+# Browser recordings are typically 48 kHz stereo 16-bit
+SAMPLE_RATE = 48000
+CHANNELS = 2
+
+# httpx sends multipart file fields in 64 KB chunks
+UPLOAD_CHUNK = 65536
+
+
+def make_recording(seconds):
+    """Generate a WAV recording wrapped like st.audio_input's UploadedFile (a BytesIO)"""
+    rng = np.random.default_rng(seconds)
+    samples = (rng.standard_normal(SAMPLE_RATE * seconds * CHANNELS) * 3000).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(CHANNELS)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+def drain(file_obj):
+    """Read an upload to the end the way the HTTP client does"""
+    total = 0
+    while True:
+        chunk = file_obj.read(UPLOAD_CHUNK)
+        if not chunk:
+            return total
+        total += len(chunk)
+
+
+def legacy_temp_file_upload(recording):
+    """The previous transcribe_audio path: copy to a temp file, reopen it, upload, unlink"""
+    with tempfile.NamedTemporaryFile(mode='wb', suffix='.wav', delete=False) as temp_audio:
+        temp_path = temp_audio.name
+        temp_audio.write(recording.getbuffer())
+    try:
+        with open(temp_path, 'rb') as audio_file:
+            drain(audio_file)
+    finally:
+        os.unlink(temp_path)
+    # One copy into the temp file, one copy back out of it
+    return 2 * len(recording.getbuffer())
+
+
+def in_memory_upload(recording):
+    """The current path: stream straight from the recording's buffer"""
+    upload, view = prepare_upload(recording)
+    try:
+        drain(upload[1])
+    finally:
+        view.release()
+    return 0
+
+
+def downsampled_upload(recording):
+    """Downsample to 16 kHz mono, then stream the smaller buffer"""
+    view = audio_view(recording)
+    try:
+        upload_data, _ = preprocess_for_asr(view, compress=False)
+        upload, upload_view = prepare_upload(upload_data)
+        drain(upload[1])
+        uploaded = len(upload_view)
+        if upload_view is not view:
+            upload_view.release()
+    finally:
+        view.release()
+    return uploaded
+
+
+def measure(func, recording, repeats=5):
+    """Return (best seconds, peak extra bytes allocated, bytes copied to disk/buffers)"""
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        copied = func(recording)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    func(recording)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, copied
+
+
+def run_offline():
+    print("Upload preparation (no network)")
+    print(f"{'length':>8} {'size':>9} | {'temp file':>10} {'copied':>9} | {'in-memory':>10} {'copied':>9} {'peak alloc':>10} "
+          f"| {'16k mono':>10} {'upload':>9}")
+    for seconds in DURATIONS:
+        recording = make_recording(seconds)
+        size = len(recording.getbuffer())
+        legacy_time, _, legacy_copied = measure(legacy_temp_file_upload, recording)
+        memory_time, memory_peak, memory_copied = measure(in_memory_upload, recording)
+        downsample_time, _, uploaded = measure(downsampled_upload, recording, repeats=2)
+        print(f"{seconds:>7}s {size / 1e6:>8.1f}M | {legacy_time * 1000:>8.1f}ms {legacy_copied / 1e6:>8.1f}M | "
+              f"{memory_time * 1000:>8.1f}ms {memory_copied / 1e6:>8.1f}M {memory_peak / 1e3:>8.1f}K | "
+              f"{downsample_time * 1000:>8.1f}ms {uploaded / 1e6:>8.1f}M")
+
+
+def time_backend(backend, recording):
+    """Return (seconds to first segment, total seconds) for one uncached transcription"""
+    view = audio_view(recording)
+    upload_data, _ = preprocess_for_asr(view, compress=False)
+    upload, upload_view = prepare_upload(upload_data)
+    try:
+        started = time.perf_counter()
+        first = None
+        for _ in backend.transcribe_stream(upload):
+            if first is None:
+                first = time.perf_counter() - started
+        total = time.perf_counter() - started
+    finally:
+        if upload_view is not view:
+            upload_view.release()
+        view.release()
+    return (first if first is not None else total), total
+
+
+def run_backends(include_remote=False):
+    print("\nASR backends (time to first segment / total)")
+    names = [name for name in available_backends() if include_remote or name != "openai"]
+    print(f"{'length':>8} " + " ".join(f"| {name:>21}" for name in names))
+    for seconds in DURATIONS[:2]:
+        recording = make_recording(seconds)
+        cells = []
+        for name in names:
+            try:
+                first, total = time_backend(get_asr_backend(name), recording)
+                cells.append(f"| {first:>8.2f}s / {total:>8.2f}s")
+            except Exception as e:
+                cells.append(f"| {'error: ' + str(e)[:14]:>21}")
+        print(f"{seconds:>7}s " + " ".join(cells))
+
+
+def run_live():
+    print("\nLive Whisper transcription")
+    for seconds in DURATIONS[:2]:
+        transcribe_audio(make_recording(seconds))
+        stats = get_transcription_stats()[-1]
+        print(f"{seconds:>7}s: {stats['seconds']:.2f}s, uploaded {stats['bytes_uploaded'] / 1e6:.1f}MB, "
+              f"copied {stats['bytes_copied'] / 1e6:.1f}MB, saved {stats['bytes_saved'] / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    run_offline()
+    if "--backends" in sys.argv:
+        run_backends(include_remote="--live" in sys.argv)
+    if "--live" in sys.argv:
+        run_live()
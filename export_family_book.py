@@ -0,0 +1,40 @@
+"""
+Family book export
+Write every saved interview (or a chosen few) into one PDF with contents, family tree and timeline
+
+Usage:
+    python export_family_book.py                             # Whole vault -> family_book.pdf
+    python export_family_book.py --output smiths.pdf         # Choose the output file
+    python export_family_book.py --profiles a.json b.json    # Only these interviews, in this order
+    python export_family_book.py --workers 8                 # More interviews laid out at once
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+sys.path.append('utils')
+from family_book import export_family_book, DEFAULT_WORKERS, PROFILES_DIR
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export saved interviews as one family book PDF")
+    parser.add_argument("--output", default="family_book.pdf", help="PDF file to write")
+    parser.add_argument("--profiles", nargs="+", help="Profile JSON files to include (default: all)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Interviews laid out at once")
+    args = parser.parse_args()
+
+    filepaths = args.profiles or sorted(str(path) for path in Path(PROFILES_DIR).glob('*.json'))
+    if not filepaths:
+        print(f"No saved interviews in {PROFILES_DIR}")
+        sys.exit(1)
+
+    started = time.time()
+    book = export_family_book(
+        filepaths,
+        workers=max(1, args.workers),
+        report_progress=lambda fraction, message: print(f"[{fraction:.0%}] {message}")
+    )
+    with open(args.output, 'wb') as f:
+        f.write(book)
+    print(f"Wrote {args.output}: {len(filepaths)} interviews, {len(book) / 1024:.0f} KB in {time.time() - started:.1f}s")
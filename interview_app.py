@@ -7,16 +7,31 @@ import streamlit as st
 import json
 import os
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, date
 import sys
 sys.path.append('utils')
 from openai_helper import generate_followup_questions
-from extraction import extract_structured_data, format_extraction_for_display
-from query import get_all_interview_files, load_interview_file, search_and_answer
-from audio_helper import transcribe_audio
-from pdf_export import export_to_pdf
-from translation import translate_question, SUPPORTED_LANGUAGES
-from voice_helper import text_to_speech, get_voice_profile_names
+from render_cache import get_profile_render
+from profile_model import load_profile, PROFILE_SCHEMA_VERSION
+from json_store import write_json_atomic, file_lock
+from timeline import get_timeline
+from query import get_all_interview_files, load_interview_file, search_and_answer, answer_locally
+from audio_helper import transcribe_audio, transcribe_audio_chunked, fingerprint_audio
+from pdf_cache import get_cached_pdf
+from family_book import get_cached_book
+from background_tasks import enqueue_extraction, enqueue_turn_extraction, enqueue_pdf_export, enqueue_family_book, enqueue_voice_clone, find_pdf_export, find_family_book, get_job, get_latest_job, EXTRACT_JOB, VOICE_CLONE_JOB
+from translation import translate_question, translate_text, SUPPORTED_LANGUAGES
+from language_detect import should_translate, MIN_LANGUAGE_CONFIDENCE
+from voice_helper import text_to_speech, get_voice_profile_names, get_profile_voice_id
+from audio_archive import new_interview_id, interview_id_for_profile, get_archive, clip_id_for, load_archive_samples
+from voice_match import find_original_recording, read_matched_audio
+
+# Answer transcript options -> audio_language_mode
+AUDIO_LANGUAGE_MODES = {
+    "Auto (English transcripts)": "auto",
+    "Always translate to English": "translate",
+    "Keep original language": "original"
+}
 
 # Configure the page
 st.set_page_config(
@@ -34,7 +49,7 @@ def load_questions():
     return data['core_questions']
 
 
-def save_interview_data(parent_name, answers, extracted_data, completed=True, current_question=0, total_questions=10, existing_filepath=None):
+def save_interview_data(parent_name, answers, extracted_data, completed=True, current_question=0, total_questions=10, existing_filepath=None, interview_id=None, detected_language=None):
     """
     Save interview data to JSON file
 
@@ -46,6 +61,8 @@ def save_interview_data(parent_name, answers, extracted_data, completed=True, cu
         current_question (int): Current question index (for resuming)
         total_questions (int): Total number of questions
         existing_filepath (str): If resuming, update existing file instead of creating new
+        interview_id (str): ID of the interview's audio archive
+        detected_language (str): Language code the interviewee answered in, if known
 
     Returns:
         tuple: (success: bool, filepath: str, error: str)
@@ -65,34 +82,251 @@ def save_interview_data(parent_name, answers, extracted_data, completed=True, cu
         # Ensure directory exists
         filepath.parent.mkdir(parents=True, exist_ok=True)
 
-        # Prepare the complete data structure
-        interview_record = {
-            "parent_name": parent_name,
-            "interview_date": datetime.now().isoformat(),
-            "interview_data": {
-                "total_questions": len(answers),
-                "total_followups": sum(len(ans.get('followups', [])) for ans in answers),
-                "questions_and_answers": answers
-            },
-            "extracted_data": extracted_data.get('data') if extracted_data and extracted_data.get('success') else None,
-            "metadata": {
-                "app_version": "1.0",
-                "saved_at": datetime.now().isoformat(),
-                "completed": completed,
-                "current_question": current_question,
-                "max_questions": total_questions
+        # Locked from re-read to write, so an extraction or voice clone finishing meanwhile isn't overwritten
+        with file_lock(str(filepath)):
+            # Extraction runs in the background after saving - keep any previous
+            # extracted data visible until the new extraction finishes
+            previous = (load_interview_file(str(filepath)) or {}) if filepath.exists() else {}
+            if extracted_data and extracted_data.get('success'):
+                extracted = extracted_data.get('data')
+                extraction_status = "complete"
+            else:
+                extracted = previous.get('extracted_data')
+                extraction_status = "pending"
+
+            archive = get_archive(interview_id) if interview_id else None
+
+            # Prepare the complete data structure
+            interview_record = {
+                "parent_name": parent_name,
+                "interview_date": datetime.now().isoformat(),
+                "interview_data": {
+                    "total_questions": len(answers),
+                    "total_followups": sum(len(ans.get('followups', [])) for ans in answers),
+                    "questions_and_answers": answers
+                },
+                "extracted_data": extracted,
+                "metadata": {
+                    "app_version": "1.0",
+                    "schema_version": PROFILE_SCHEMA_VERSION,
+                    "saved_at": datetime.now().isoformat(),
+                    "completed": completed,
+                    "current_question": current_question,
+                    "max_questions": total_questions,
+                    "extraction_status": extraction_status,
+                    "interview_id": interview_id,
+                    "audio_archive": archive.path if archive and archive.exists() else None,
+                    "detected_language": detected_language
+                }
             }
-        }
+            # A voice cloned from an earlier part of the interview stays with it
+            for key in ('voice_id', 'voice_cloned_at'):
+                if previous.get(key):
+                    interview_record[key] = previous[key]
 
-        # Save to JSON file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(interview_record, f, indent=2, ensure_ascii=False)
+            # Save to JSON file (atomically - background jobs and indexes read it at any time)
+            write_json_atomic(str(filepath), interview_record, indent=2)
 
         return True, str(filepath), None
 
     except Exception as e:
         return False, None, str(e)
 
+
+def render_job_progress(job, label):
+    """Show the status of a background job"""
+    if job is None:
+        return
+    if job['status'] == "queued":
+        st.info(f"⏳ {label} is waiting to start...")
+    elif job['status'] == "running":
+        st.progress(job['progress'], text=f"⏳ {label}: {job.get('message') or 'working...'}")
+    elif job['status'] == "failed":
+        st.error(f"❌ {label} failed: {job['error']}")
+
+
+@st.fragment(run_every=2)
+def poll_job(job_id, label):
+    """Poll a background job and rerun the page once it finishes"""
+    job = get_job(job_id)
+    render_job_progress(job, label)
+    if job is None or job['status'] in ("succeeded", "failed"):
+        st.rerun()
+
+
+def job_finished(job):
+    """Check whether a background job has stopped running"""
+    return job is None or job['status'] in ("succeeded", "failed")
+
+
+def render_extraction_status(filepath, job_id=None):
+    """
+    Show background extraction progress for a saved profile
+
+    Returns:
+        bool: True once extraction is no longer running
+    """
+    job = get_job(job_id) if job_id else get_latest_job(EXTRACT_JOB, filepath)
+    if not job_finished(job):
+        poll_job(job['id'], "AI data extraction")
+        return False
+
+    if job and job['status'] == "failed":
+        st.warning(f"⚠️ Data extraction failed: {job['error']}")
+        if st.button("🔄 Retry Extraction", key=f"retry_extract_{job['id']}"):
+            enqueue_extraction(filepath)
+            st.rerun()
+    return True
+
+
+def render_voice_clone(filepath, interview_data):
+    """Offer to clone the interviewee's voice from their archived answer recordings, in the background"""
+    parent_name = interview_data.get('parent_name', 'Unknown')
+    job = get_latest_job(VOICE_CLONE_JOB, filepath)
+    if not job_finished(job):
+        poll_job(job['id'], "Voice cloning")
+        return
+
+    if get_profile_voice_id(filepath):
+        st.success(f"✅ {parent_name}'s voice has been cloned")
+        return
+    if job and job['status'] == "failed":
+        st.warning(f"⚠️ Voice cloning failed: {job['error']}")
+
+    archive = get_archive(interview_id_for_profile(interview_data, filepath))
+    if not archive.exists():
+        st.caption("No answer recordings were kept for this interview, so there's no voice to clone.")
+        return
+    if st.button("🎙️ Clone Voice from Recordings", use_container_width=True, key=f"clone_voice_{filepath}"):
+        try:
+            enqueue_voice_clone(load_archive_samples(archive.path), parent_name, profile_path=filepath)
+        except Exception as e:
+            st.error(f"Could not start voice cloning: {str(e)}")
+            return
+        st.rerun()
+
+
+def render_cached_download(get_cached, find, enqueue, label, file_name, button_label):
+    """
+    Offer a cached PDF for download, generating it in the background the first time
+
+    A failed export is only queued again from its Retry button - otherwise every rerun
+    would run a PDF that can never be laid out again.
+    """
+    pdf_bytes = get_cached()
+    if pdf_bytes is None:
+        job = find()
+        if job and job['status'] == "failed":
+            render_job_progress(job, label)
+            if st.button("🔄 Retry", key=f"retry_{job['id']}"):
+                enqueue()
+                st.rerun()
+            return
+        job = get_job(enqueue())
+        if not job_finished(job):
+            poll_job(job['id'], label)
+            return
+        if job is None or job['status'] != "succeeded":
+            render_job_progress(job, label)
+            return
+        pdf_bytes = get_cached()
+        if pdf_bytes is None:
+            # Evicted or a profile changed while it ran - the next rerun queues it again
+            st.info(f"⏳ {label} is being regenerated...")
+            return
+
+    st.download_button(
+        label=button_label,
+        data=pdf_bytes,
+        file_name=file_name,
+        mime="application/pdf",
+        use_container_width=True
+    )
+
+
+def render_pdf_download(filepath, pdf_filename, label="📄 Download Interview as PDF"):
+    """Offer a profile PDF for download, generating it in the background the first time"""
+    render_cached_download(lambda: get_cached_pdf(filepath), lambda: find_pdf_export(filepath),
+                           lambda: enqueue_pdf_export(filepath),
+                           "PDF", pdf_filename, label)
+
+
+def current_interview_id():
+    """Get the audio archive ID for the interview in progress, creating one for new interviews"""
+    if not st.session_state.interview_id:
+        st.session_state.interview_id = new_interview_id()
+    return st.session_state.interview_id
+
+
+def archive_recording(audio_bytes, question_index, followup_index=None, transcription=None):
+    """Keep a compressed copy of an answer recording (and its segment timestamps) in the audio archive"""
+    try:
+        get_archive(current_interview_id()).append_clip(
+            clip_id_for(question_index, followup_index),
+            audio_bytes.getvalue(),
+            {"transcript": transcription['text'], "segments": transcription['segments']} if transcription else None
+        )
+    except Exception as e:
+        # Losing the archive copy shouldn't interrupt the interview
+        print(f"Could not archive recording: {e}")
+
+
+def extract_latest_answer():
+    """Start extracting the answer just added, so saving the interview doesn't wait on it"""
+    turn_index = len(st.session_state.answers) - 1
+    try:
+        enqueue_turn_extraction(
+            current_interview_id(),
+            turn_index,
+            st.session_state.answers[turn_index],
+            st.session_state.parent_name
+        )
+    except Exception as e:
+        # The final save extracts anything that wasn't done in the background
+        print(f"Could not queue answer extraction: {e}")
+
+
+def should_translate_audio():
+    """Pick the translation endpoint when the speaker is expected to answer in another language"""
+    expected_language = st.session_state.detected_language or st.session_state.selected_language
+    return should_translate(st.session_state.audio_language_mode, expected_language)
+
+
+def transcribe_with_progress(audio_bytes):
+    """
+    Transcribe a recording in one ASR call, showing the transcript as long recordings come back in pieces
+
+    In auto mode the endpoint is chosen from the language this speaker was last
+    heard using. If that guess was wrong the text is translated, not re-recorded.
+
+    Returns:
+        dict: {"text", "segments", "language", "translated"}, or None if transcription failed
+    """
+    partial = st.empty()
+
+    def show_partial(done, total, partial_text):
+        if total > 1:
+            partial.caption(f"🎤 Transcribing... {100 * done // total}%\n\n{partial_text}")
+
+    translate_now = should_translate_audio()
+    transcription = transcribe_audio_chunked(audio_bytes, translate_to_english=translate_now,
+                                             on_progress=show_partial, detailed=True)
+    partial.empty()
+    if not transcription:
+        return None
+
+    transcription = dict(transcription, translated=translate_now)
+    language = transcription.get('language')
+    confidence = transcription.get('language_confidence', 1.0)
+    if language and confidence >= MIN_LANGUAGE_CONFIDENCE:
+        # Later answers go straight to the right endpoint - but not on a guess from a few words
+        st.session_state.detected_language = language
+    if st.session_state.audio_language_mode == "auto" and not translate_now and \
+            should_translate("auto", language, confidence):
+        transcription['text'] = translate_text(transcription['text'], "English")
+        transcription['translated'] = True
+    return transcription
+
 # Initialize session state variables
 if 'started' not in st.session_state:
     st.session_state.started = False
@@ -130,8 +364,10 @@ if 'preferred_input_method' not in st.session_state:
     st.session_state.preferred_input_method = "Type answer"  # Persist input method preference
 if 'selected_language' not in st.session_state:
     st.session_state.selected_language = "English"  # Default language for questions
-if 'translate_audio_to_english' not in st.session_state:
-    st.session_state.translate_audio_to_english = False  # Auto-translate audio to English
+if 'audio_language_mode' not in st.session_state:
+    st.session_state.audio_language_mode = "auto"  # "auto", "translate" or "original" (see AUDIO_LANGUAGE_MODES)
+if 'detected_language' not in st.session_state:
+    st.session_state.detected_language = None  # Language the current speaker was last heard using
 if 'voice_mode_enabled' not in st.session_state:
     st.session_state.voice_mode_enabled = False  # Voice input/output for Q&A
 if 'selected_voice_profile' not in st.session_state:
@@ -144,6 +380,8 @@ if 'save_early' not in st.session_state:
     st.session_state.save_early = False  # Flag to trigger early save from sidebar
 if 'resuming_filepath' not in st.session_state:
     st.session_state.resuming_filepath = None  # Track file being resumed
+if 'interview_id' not in st.session_state:
+    st.session_state.interview_id = None  # Audio archive for the interview in progress
 if 'question_tts_muted' not in st.session_state:
     st.session_state.question_tts_muted = True  # Mute TTS by default (browser autoplay restrictions)
 if 'last_spoken_question' not in st.session_state:
@@ -156,6 +394,8 @@ if 'recording_for_question' not in st.session_state:
     st.session_state.recording_for_question = None  # Track which question we're recording for
 if 'should_autoplay_question' not in st.session_state:
     st.session_state.should_autoplay_question = False  # Only auto-play when user explicitly toggles sound
+if 'saved_interview' not in st.session_state:
+    st.session_state.saved_interview = None  # Filepath and extraction job of the just-saved interview
 # Load questions
 questions = load_questions()
 
@@ -316,13 +556,18 @@ with col1:
     st.session_state.selected_language = selected_language
 
 with col2:
-    translate_audio = st.checkbox(
-        "🔄 Auto-translate audio to English",
-        value=st.session_state.translate_audio_to_english,
-        help="Automatically detect and translate non-English audio recordings to English",
-        key="translate_audio_checkbox"
+    mode_labels = list(AUDIO_LANGUAGE_MODES.keys())
+    mode_values = list(AUDIO_LANGUAGE_MODES.values())
+    audio_mode_label = st.selectbox(
+        "🔄 Answer Transcripts",
+        options=mode_labels,
+        index=mode_values.index(st.session_state.audio_language_mode),
+        help="Auto detects the spoken language and translates non-English answers to English",
+        key="audio_language_selector"
     )
-    st.session_state.translate_audio_to_english = translate_audio
+    st.session_state.audio_language_mode = AUDIO_LANGUAGE_MODES[audio_mode_label]
+    if st.session_state.detected_language:
+        st.caption(f"🗣️ Detected language: {st.session_state.detected_language}")
 
 st.divider()
 
@@ -447,6 +692,9 @@ with st.sidebar:
                 st.session_state.main_answer = ""
                 st.session_state.transcription_cache = {}  # Clear transcription cache
                 st.session_state.resuming_filepath = None  # Clear resume tracking
+                st.session_state.interview_id = None
+                st.session_state.detected_language = None
+                st.session_state.saved_interview = None
                 st.rerun()
 
     elif st.session_state.app_mode == "View":
@@ -480,9 +728,9 @@ with st.sidebar:
     try:
         all_interviews = get_all_interview_files()
         if all_interviews:
-            interview_options = ["All Interviews"] + [interview_data.get('parent_name', 'Unknown')
+            interview_options = ["All Interviews"] + [profile.parent_name
                                                       for filename, filepath in all_interviews
-                                                      for interview_data in [load_interview_file(filepath)] if interview_data]
+                                                      for profile in [load_profile(filepath)] if profile]
 
             search_target = st.selectbox(
                 "Search in:",
@@ -518,11 +766,21 @@ with st.sidebar:
                         interviews_to_search = all_interviews
                     else:
                         interviews_to_search = [(filename, filepath) for filename, filepath in all_interviews
-                                               if load_interview_file(filepath) and
-                                               load_interview_file(filepath).get('parent_name') == search_target]
+                                               if load_profile(filepath) and
+                                               load_profile(filepath).parent_name == search_target]
 
                     with st.spinner(f"🔍 Searching {search_target}..."):
                         found_answer = False
+
+                        # Family tree, timeline and place questions are answered from the local indexes
+                        # without the AI - they span every interview, so not when one is selected
+                        local_result = answer_locally(quick_question) if search_target == "All Interviews" else None
+                        if local_result:
+                            st.success(f"**Found in {local_result['source_label']}:**")
+                            st.info(local_result['answer'])
+                            found_answer = True
+                            interviews_to_search = []
+
                         for filename, filepath in interviews_to_search:
                             interview_data = load_interview_file(filepath)
                             if interview_data:
@@ -589,24 +847,21 @@ if st.session_state.app_mode == "Interview":
                 if st.button("✅ Yes, Save Now", type="primary", use_container_width=True):
                     with st.spinner("💾 Saving interview..."):
                         try:
-                            # Run extraction
-                            extraction_result = extract_structured_data(
-                                st.session_state.answers,
-                                st.session_state.parent_name
-                            )
-
-                            # Save as incomplete interview
+                            # Save as incomplete interview (extraction runs in the background)
                             success, filepath, error = save_interview_data(
                                 st.session_state.parent_name,
                                 st.session_state.answers,
-                                extraction_result,
+                                None,
                                 completed=False,
                                 current_question=st.session_state.current_question,
                                 total_questions=len(questions),
-                                existing_filepath=st.session_state.resuming_filepath
+                                existing_filepath=st.session_state.resuming_filepath,
+                                interview_id=current_interview_id(),
+                                detected_language=st.session_state.detected_language
                             )
 
                             if success:
+                                enqueue_extraction(filepath)
                                 st.success(f"✅ Interview saved!")
                                 st.info(f"📁 Saved to: `{filepath}`")
 
@@ -622,6 +877,8 @@ if st.session_state.app_mode == "Interview":
                                 st.session_state.transcription_cache = {}
                                 st.session_state.save_early = False
                                 st.session_state.resuming_filepath = None
+                                st.session_state.interview_id = None
+                                st.session_state.detected_language = None
                                 if 'followup_answers' in st.session_state:
                                     st.session_state.followup_answers = []
 
@@ -755,25 +1012,24 @@ if st.session_state.app_mode == "Interview":
                         st.session_state.recording_for_question = st.session_state.current_question
 
                         # Generate unique key for this audio
-                        audio_data_bytes = audio_bytes.getbuffer().tobytes()
-                        audio_hash = hash(audio_data_bytes)
+                        audio_hash = fingerprint_audio(audio_bytes)
                         audio_key = f"transcript_{st.session_state.current_question}_{audio_hash}"
 
                         if audio_key not in st.session_state.transcription_cache:
                             spinner_text = "🎤 Transcribing audio..."
-                            if st.session_state.translate_audio_to_english:
+                            if should_translate_audio():
                                 spinner_text = "🎤 Transcribing and translating to English..."
 
                             with st.spinner(spinner_text):
-                                transcript = transcribe_audio(
-                                    audio_bytes,
-                                    translate_to_english=st.session_state.translate_audio_to_english
-                                )
+                                transcription = transcribe_with_progress(audio_bytes)
+                                transcript = transcription['text'] if transcription else None
                                 if transcript:
                                     st.session_state.transcription_cache[audio_key] = transcript
                                     st.session_state.recording_for_question = st.session_state.current_question
+                                    archive_recording(audio_bytes, st.session_state.current_question,
+                                                      transcription=transcription)
                                     success_msg = "✅ Transcription complete! Review and edit below:"
-                                    if st.session_state.translate_audio_to_english:
+                                    if transcription['translated']:
                                         success_msg = "✅ Transcription and translation complete! Review and edit below:"
                                     st.success(success_msg)
                                 else:
@@ -855,6 +1111,7 @@ if st.session_state.app_mode == "Interview":
                                             'answer': answer,
                                             'followups': []
                                         })
+                                        extract_latest_answer()
                                         st.session_state.current_question += 1
                                         st.rerun()
 
@@ -982,24 +1239,27 @@ if st.session_state.app_mode == "Interview":
 
                     if followup_audio_bytes:
                         # Generate unique key for this audio
-                        followup_audio_data = followup_audio_bytes.getbuffer().tobytes()
-                        followup_audio_hash = hash(followup_audio_data)
+                        followup_audio_hash = fingerprint_audio(followup_audio_bytes)
                         followup_audio_key = f"followup_transcript_{st.session_state.current_question}_{st.session_state.current_followup}_{followup_audio_hash}"
 
                         if followup_audio_key not in st.session_state.transcription_cache:
                             spinner_text = "🎤 Transcribing audio..."
-                            if st.session_state.translate_audio_to_english:
+                            if should_translate_audio():
                                 spinner_text = "🎤 Transcribing and translating to English..."
 
                             with st.spinner(spinner_text):
-                                followup_transcript = transcribe_audio(
-                                    followup_audio_bytes,
-                                    translate_to_english=st.session_state.translate_audio_to_english
-                                )
+                                followup_transcription = transcribe_with_progress(followup_audio_bytes)
+                                followup_transcript = followup_transcription['text'] if followup_transcription else None
                                 if followup_transcript:
                                     st.session_state.transcription_cache[followup_audio_key] = followup_transcript
+                                    archive_recording(
+                                        followup_audio_bytes,
+                                        st.session_state.current_question,
+                                        st.session_state.current_followup,
+                                        transcription=followup_transcription
+                                    )
                                     success_msg = "✅ Transcription complete! Review and edit below:"
-                                    if st.session_state.translate_audio_to_english:
+                                    if followup_transcription['translated']:
                                         success_msg = "✅ Transcription and translation complete! Review and edit below:"
                                     st.success(success_msg)
                                 else:
@@ -1070,6 +1330,7 @@ if st.session_state.app_mode == "Interview":
                                 'answer': st.session_state.main_answer,
                                 'followups': st.session_state.followup_answers if 'followup_answers' in st.session_state else []
                             })
+                            extract_latest_answer()
 
                             # Reset for next question
                             st.session_state.followup_mode = False
@@ -1091,6 +1352,7 @@ if st.session_state.app_mode == "Interview":
                             'answer': st.session_state.main_answer,
                             'followups': st.session_state.followup_answers if 'followup_answers' in st.session_state else []
                         })
+                        extract_latest_answer()
 
                         # Reset for next question
                         st.session_state.followup_mode = False
@@ -1171,34 +1433,29 @@ if st.session_state.app_mode == "Interview":
 
             with col2:
                 if st.button("💾 Save Interview", type="primary", use_container_width=True):
-                    # Automatically extract data before saving
-                    with st.spinner("💾 Saving interview and extracting data with AI..."):
+                    # Save right away - AI extraction and PDF generation run in the background
+                    with st.spinner("💾 Saving interview..."):
                         try:
-                            # Run extraction
-                            extraction_result = extract_structured_data(
-                                st.session_state.answers,
-                                st.session_state.parent_name
-                            )
-
-                            # Save the interview data with extracted data (marked as complete)
+                            # Save the interview data (marked as complete)
                             success, filepath, error = save_interview_data(
                                 st.session_state.parent_name,
                                 st.session_state.answers,
-                                extraction_result,
+                                None,
                                 completed=True,
                                 current_question=len(questions),
                                 total_questions=len(questions),
-                                existing_filepath=st.session_state.resuming_filepath
+                                existing_filepath=st.session_state.resuming_filepath,
+                                interview_id=current_interview_id(),
+                                detected_language=st.session_state.detected_language
                             )
 
                             if success:
-                                if extraction_result['success']:
-                                    st.success(f"✅ Interview saved successfully with AI-extracted data!")
-                                else:
-                                    st.success(f"✅ Interview saved successfully!")
-                                    st.warning(f"⚠️ Data extraction failed: {extraction_result['error']}")
-                                st.info(f"📁 Saved to: `{filepath}`")
-
+                                st.session_state.saved_interview = {
+                                    'filepath': filepath,
+                                    'extract_job_id': enqueue_extraction(filepath)
+                                }
+                                # Later saves update this file instead of creating a new one
+                                st.session_state.resuming_filepath = filepath
                                 st.balloons()
                             else:
                                 st.error(f"❌ Failed to save interview: {error}")
@@ -1207,48 +1464,6 @@ if st.session_state.app_mode == "Interview":
                             st.error(f"❌ Unexpected error: {str(e)}")
                             st.info("💡 The interview data could not be saved. Please try again.")
 
-                    # If save was successful, continue with PDF generation
-                    if success:
-
-                        # Generate PDF and offer download
-                        import tempfile
-                        import os
-
-                        # Create PDF in temp directory
-                        temp_dir = tempfile.gettempdir()
-                        pdf_filename = f"{st.session_state.parent_name.replace(' ', '_')}_interview.pdf"
-                        pdf_path = os.path.join(temp_dir, pdf_filename)
-
-                        # Load the saved interview data
-                        import json
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            interview_data = json.load(f)
-
-                        # Generate PDF
-                        pdf_success = export_to_pdf(interview_data, pdf_path)
-
-                        if pdf_success:
-                            # Offer PDF download
-                            with open(pdf_path, 'rb') as pdf_file:
-                                st.download_button(
-                                    label="📄 Download Interview as PDF",
-                                    data=pdf_file,
-                                    file_name=pdf_filename,
-                                    mime="application/pdf",
-                                    use_container_width=True
-                                )
-
-                        # Show what was saved
-                        with st.expander("📄 View saved data summary"):
-                            st.write(f"**Parent:** {st.session_state.parent_name}")
-                            st.write(f"**Questions answered:** {len(st.session_state.answers)}")
-                            total_followups = sum(len(ans.get('followups', [])) for ans in st.session_state.answers)
-                            st.write(f"**Follow-up answers:** {total_followups}")
-                            st.write(f"**Extracted data:** {'Yes ✓' if st.session_state.extracted_data else 'No'}")
-                            st.write(f"**File:** {filepath}")
-                    else:
-                        st.error(f"❌ Failed to save interview: {error}")
-
             with col3:
                 if st.button("🔄 Start New Interview", use_container_width=True):
                     st.session_state.started = False
@@ -1263,10 +1478,39 @@ if st.session_state.app_mode == "Interview":
                     st.session_state.extraction_complete = False
                     st.session_state.transcription_cache = {}  # Clear transcription cache
                     st.session_state.resuming_filepath = None  # Clear resume tracking
+                    st.session_state.interview_id = None
+                    st.session_state.detected_language = None
                     if 'followup_answers' in st.session_state:
                         st.session_state.followup_answers = []
+                    st.session_state.saved_interview = None
                     st.rerun()
 
+            # Background extraction and PDF status for the saved interview
+            saved = st.session_state.saved_interview
+            if saved:
+                filepath = saved['filepath']
+                st.success(f"✅ Interview saved successfully!")
+                st.info(f"📁 Saved to: `{filepath}`")
+
+                if render_extraction_status(filepath, saved['extract_job_id']):
+                    extract_job = get_job(saved['extract_job_id'])
+                    if extract_job and extract_job['status'] == "succeeded":
+                        st.success("✅ AI-extracted data added to the interview")
+
+                    # Generate PDF and offer download
+                    pdf_filename = f"{st.session_state.parent_name.replace(' ', '_')}_interview.pdf"
+                    render_pdf_download(filepath, pdf_filename)
+
+                # Show what was saved
+                with st.expander("📄 View saved data summary"):
+                    saved_data = load_interview_file(filepath) or {}
+                    st.write(f"**Parent:** {st.session_state.parent_name}")
+                    st.write(f"**Questions answered:** {len(st.session_state.answers)}")
+                    total_followups = sum(len(ans.get('followups', [])) for ans in st.session_state.answers)
+                    st.write(f"**Follow-up answers:** {total_followups}")
+                    st.write(f"**Extracted data:** {'Yes ✓' if saved_data.get('extracted_data') else 'No'}")
+                    st.write(f"**File:** {filepath}")
+
 elif st.session_state.app_mode == "View":
     # VIEW INTERVIEWS MODE
     st.subheader("📚 Browse Saved Interviews")
@@ -1284,6 +1528,25 @@ elif st.session_state.app_mode == "View":
         # If no interview is selected, show the list
         if not st.session_state.selected_interview_data:
             st.write(f"**{len(interview_files)} interview(s) available**")
+
+            # Whole-family export - sections are cached, so only changed interviews are laid out again
+            with st.expander("📖 Family Book - all interviews in one PDF"):
+                book_names = {}
+                for filename, filepath in interview_files:
+                    profile = load_profile(filepath)
+                    if profile:
+                        label = profile.parent_name if profile.parent_name not in book_names else f"{profile.parent_name} ({filename})"
+                        book_names[label] = filepath
+                selected_names = st.multiselect("Interviews to include:", options=list(book_names),
+                                                default=list(book_names), key="family_book_selection")
+                if st.button("📖 Build Family Book", use_container_width=True, disabled=not selected_names):
+                    st.session_state.family_book_requested = True
+                if st.session_state.get('family_book_requested') and selected_names:
+                    book_files = [book_names[name] for name in selected_names]
+                    render_cached_download(lambda: get_cached_book(book_files), lambda: find_family_book(book_files),
+                                           lambda: enqueue_family_book(book_files),
+                                           "Family book", "family_book.pdf", "📥 Download Family Book")
+
             st.write("Click on an interview to view details:")
             st.divider()
 
@@ -1332,6 +1595,8 @@ elif st.session_state.app_mode == "View":
                                 st.session_state.current_followup = 0
                                 st.session_state.main_answer = ""
                                 st.session_state.resuming_filepath = filepath
+                                st.session_state.interview_id = interview_id_for_profile(interview_data, filepath)
+                                st.session_state.detected_language = interview_data.get('metadata', {}).get('detected_language')
                                 st.session_state.app_mode = "Interview"
                                 st.rerun()
                         else:
@@ -1366,6 +1631,10 @@ elif st.session_state.app_mode == "View":
                     st.session_state.current_followup = 0
                     st.session_state.main_answer = ""
                     st.session_state.resuming_filepath = st.session_state.selected_interview_file
+                    st.session_state.interview_id = interview_id_for_profile(
+                        interview_data, st.session_state.selected_interview_file
+                    )
+                    st.session_state.detected_language = metadata.get('detected_language')
                     st.session_state.selected_interview_data = None
                     st.session_state.selected_interview_file = None
                     st.session_state.app_mode = "Interview"
@@ -1381,21 +1650,9 @@ elif st.session_state.app_mode == "View":
                     st.rerun()
 
             with col2:
-                # PDF Download button
-                import tempfile, os
-                temp_dir = tempfile.gettempdir()
+                # PDF Download button (generated in the background)
                 pdf_filename = f"{parent_name.replace(' ', '_')}_interview.pdf"
-                pdf_path = os.path.join(temp_dir, pdf_filename)
-
-                if export_to_pdf(interview_data, pdf_path):
-                    with open(pdf_path, 'rb') as pdf_file:
-                        st.download_button(
-                            label="📄 PDF",
-                            data=pdf_file,
-                            file_name=pdf_filename,
-                            mime="application/pdf",
-                            use_container_width=True
-                        )
+                render_pdf_download(st.session_state.selected_interview_file, pdf_filename, label="📄 PDF")
 
             with col3:
                 if st.button("🗑️ Delete", use_container_width=True, type="secondary"):
@@ -1432,6 +1689,9 @@ elif st.session_state.app_mode == "View":
             interview_date = interview_data.get('interview_date', 'Unknown')[:10]
             st.caption(f"Conducted on: {interview_date}")
 
+            with st.expander(f"🎙️ {parent_name}'s Voice"):
+                render_voice_clone(st.session_state.selected_interview_file, interview_data)
+
             # Create tabs for different views
             tab1, tab2, tab3 = st.tabs(["📝 Interview Q&A", "📊 Extracted Data", "📄 Documents"])
 
@@ -1457,12 +1717,19 @@ elif st.session_state.app_mode == "View":
                     st.divider()
 
             with tab2:
-                # Display extracted data
-                extracted_data = interview_data.get('extracted_data')
+                # Show background extraction progress, reloading once it finishes
+                if metadata.get('extraction_status') == "pending":
+                    if render_extraction_status(st.session_state.selected_interview_file):
+                        refreshed = load_interview_file(st.session_state.selected_interview_file)
+                        if refreshed and refreshed.get('metadata', {}).get('extraction_status') != "pending":
+                            st.session_state.selected_interview_data = refreshed
+                            st.rerun()
+
+                # Display extracted data (rendered once per saved version of the profile)
+                rendered = get_profile_render(st.session_state.selected_interview_file)
 
-                if extracted_data:
-                    display_markdown = format_extraction_for_display(extracted_data)
-                    st.markdown(display_markdown)
+                if rendered and rendered['has_data']:
+                    st.markdown(rendered['markdown'])
                 else:
                     st.warning("⚠️ No structured data extracted from this interview yet")
                     st.info("Data extraction may have failed or was not performed for this interview.")
@@ -1547,9 +1814,9 @@ elif st.session_state.app_mode == "Q&A":
         # Show all interviews in vault
         with st.expander("📊 View All Interviews"):
             for idx, (filename, filepath) in enumerate(interview_files, 1):
-                interview_data = load_interview_file(filepath)
-                if interview_data:
-                    st.write(f"{idx}. **{interview_data.get('parent_name', 'Unknown')}** - {interview_data.get('interview_date', 'Unknown')[:10]}")
+                profile = load_profile(filepath)
+                if profile:
+                    st.write(f"{idx}. **{profile.parent_name}** - {(profile.interview_date or 'Unknown')[:10]}")
 
         st.divider()
 
@@ -1557,9 +1824,9 @@ elif st.session_state.app_mode == "Q&A":
         st.markdown("### Ask Anything About Your Family")
 
         # Interview selector for Q&A
-        interview_options = ["All Interviews"] + [interview_data.get('parent_name', 'Unknown')
+        interview_options = ["All Interviews"] + [profile.parent_name
                                                   for filename, filepath in interview_files
-                                                  for interview_data in [load_interview_file(filepath)] if interview_data]
+                                                  for profile in [load_profile(filepath)] if profile]
 
         # Initialize qa_search_target if not exists
         if 'qa_search_target' not in st.session_state:
@@ -1643,7 +1910,7 @@ elif st.session_state.app_mode == "Q&A":
 
                 if audio_question:
                     # Use audio bytes as unique key to track this specific recording
-                    audio_hash = hash(audio_question.getbuffer().tobytes())
+                    audio_hash = fingerprint_audio(audio_question)
                     audio_key = f"qa_audio_transcription_{audio_hash}"
 
                     # Only transcribe if this is a new recording (different hash)
@@ -1695,8 +1962,8 @@ elif st.session_state.app_mode == "Q&A":
                         interviews_to_search = interview_files
                     else:
                         interviews_to_search = [(filename, filepath) for filename, filepath in interview_files
-                                               if load_interview_file(filepath) and
-                                               load_interview_file(filepath).get('parent_name') == qa_search_target]
+                                               if load_profile(filepath) and
+                                               load_profile(filepath).parent_name == qa_search_target]
 
                     with st.spinner(f"🤖 Searching {qa_search_target}..."):
                         try:
@@ -1704,6 +1971,22 @@ elif st.session_state.app_mode == "Q&A":
                             found_answer = False
                             best_answer = None
 
+                            # Family tree, timeline and place questions are answered from the local indexes
+                            # without the AI - they span every interview, so not when one is selected
+                            local_result = answer_locally(question) if qa_search_target == "All Interviews" else None
+                            if local_result:
+                                st.session_state.qa_history.append({
+                                    'question': question,
+                                    'answer': local_result['answer'],
+                                    'source': local_result['parent_name'],
+                                    'source_label': local_result['source_label'],
+                                    'audio_paths': {},
+                                    'original_audio': None
+                                })
+                                st.session_state.just_answered = True
+                                found_answer = True
+                                interviews_to_search = []
+
                             for filename, filepath in interviews_to_search:
                                 interview_data = load_interview_file(filepath)
                                 if interview_data:
@@ -1714,9 +1997,12 @@ elif st.session_state.app_mode == "Q&A":
                                         if "don't have information" not in result['answer'].lower():
                                             parent_name = interview_data.get('parent_name', 'Unknown')
 
+                                            # If they said it themselves, play the original recording instead of TTS
+                                            original_audio = find_original_recording(result['answer'], interview_data)
+
                                             # Generate audio if voice mode is enabled
                                             audio_paths = {}  # Store audio for different voices
-                                            if st.session_state.voice_mode_enabled:
+                                            if st.session_state.voice_mode_enabled and not original_audio:
                                                 with st.spinner("🔊 Generating voice response..."):
                                                     try:
                                                         # Use OpenAI TTS
@@ -1743,7 +2029,8 @@ elif st.session_state.app_mode == "Q&A":
                                                 'question': question,
                                                 'answer': result['answer'],
                                                 'source': parent_name,
-                                                'audio_paths': audio_paths
+                                                'audio_paths': audio_paths,
+                                                'original_audio': original_audio
                                             })
 
                                             # Set flag to auto-play this new answer
@@ -1797,7 +2084,7 @@ elif st.session_state.app_mode == "Q&A":
         st.divider()
 
         # Create tabs for Q&A history and extracted data
-        tab1, tab2 = st.tabs(["💬 Q&A History", "📊 All Extracted Data"])
+        tab1, tab2, tab3 = st.tabs(["💬 Q&A History", "📊 All Extracted Data", "🕰️ Family Timeline"])
 
         with tab1:
             if st.session_state.qa_history:
@@ -1806,13 +2093,22 @@ elif st.session_state.app_mode == "Q&A":
                 for idx, qa in enumerate(reversed(st.session_state.qa_history)):
                     with st.container():
                         st.markdown(f"**Q{len(st.session_state.qa_history) - idx}:** {qa['question']}")
-                        st.markdown(f"*Source: {qa.get('source', 'Unknown')}'s interview*")
+                        source_label = qa.get('source_label') or f"{qa.get('source', 'Unknown')}'s interview"
+                        st.markdown(f"*Source: {source_label}*")
 
                         # Show text answer
                         st.info(qa['answer'])
 
+                        original_audio = qa.get('original_audio')
+                        original_bytes = read_matched_audio(original_audio) if original_audio else None
+                        if original_bytes:
+                            # Their own recorded voice - no TTS needed
+                            should_autoplay = (idx == 0) and st.session_state.just_answered and st.session_state.voice_mode_enabled
+                            st.audio(original_bytes, format='audio/wav', autoplay=should_autoplay)
+                            st.caption(f"🎙️ In {qa.get('source', 'their')}'s own words: \"{original_audio['text']}\"")
+
                         # Generate and play audio if voice mode is enabled
-                        if st.session_state.voice_mode_enabled and qa.get('answer'):
+                        elif st.session_state.voice_mode_enabled and qa.get('answer'):
                             audio_paths = qa.get('audio_paths', {})
                             current_voice = st.session_state.selected_voice_profile
 
@@ -1855,18 +2151,45 @@ elif st.session_state.app_mode == "Q&A":
 
             # Show extracted data from all interviews
             for idx, (filename, filepath) in enumerate(interview_files, 1):
-                interview_data = load_interview_file(filepath)
-                if interview_data:
-                    parent_name = interview_data.get('parent_name', 'Unknown')
-                    extracted_data = interview_data.get('extracted_data')
-
-                    with st.expander(f"📄 {parent_name}'s Extracted Data", expanded=(idx == 1)):
-                        if extracted_data:
-                            display_markdown = format_extraction_for_display(extracted_data)
-                            st.markdown(display_markdown)
+                rendered = get_profile_render(filepath)
+                if rendered:
+                    with st.expander(f"📄 {rendered['parent_name']}'s Extracted Data", expanded=(idx == 1)):
+                        if rendered['has_data']:
+                            st.markdown(rendered['markdown'])
                         else:
                             st.warning("⚠️ No structured data extracted from this interview yet")
 
+        with tab3:
+            st.markdown("### Family Timeline")
+            timeline = get_timeline()
+
+            if not len(timeline):
+                st.info("No dated events extracted yet - they appear here once interviews are processed.")
+            else:
+                first_year = (timeline.first_year // 10) * 10
+                last_year = timeline.last_year
+                if first_year < last_year:
+                    first_year, last_year = st.slider("Years", first_year, last_year, (first_year, last_year),
+                                                      key="timeline_years")
+                events = timeline.between(date(first_year, 1, 1), date(last_year, 12, 31))
+
+                # Group by the decade each event starts in
+                decade = None
+                for event in events:
+                    event_decade = int(event['start'][:3]) * 10
+                    if event_decade != decade:
+                        decade = event_decade
+                        st.markdown(f"#### {decade}s")
+                    people = f" · {', '.join(event['people_involved'])}" if event['people_involved'] else ""
+                    st.markdown(f"**{event['date']}** — {event['event'] or 'Unknown'}  \n"
+                                f"*{event['parent_name']}'s interview{people}*")
+
+                if timeline.undated:
+                    with st.expander(f"Undated events ({len(timeline.undated)})"):
+                        for event in timeline.undated:
+                            when = f" ({event['date']})" if event['date'] else ""
+                            st.markdown(f"- {event['event'] or 'Unknown'}{when} — *{event['parent_name']}*")
+
         # Example questions
         st.divider()
         st.markdown("### 💡 Example Questions")
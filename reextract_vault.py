@@ -0,0 +1,177 @@
+"""
+Bulk re-extraction
+Refresh extracted_data for every saved interview after the extraction prompt or model changes
+
+Usage:
+    python reextract_vault.py              # Re-extract profiles that aren't current, resuming any interrupted run
+    python reextract_vault.py --workers 8  # More profiles at once (default 3)
+    python reextract_vault.py --force      # Re-extract even profiles that look current, bypassing the extraction cache
+    python reextract_vault.py --restart    # Ignore the checkpoint of an interrupted run
+
+Safe to run while the app is open: the people index and family graph are
+updated under a file lock shared with the app (on Windows, stop the app first).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+sys.path.append('utils')
+from background_tasks import run_extraction_job, answers_fingerprint, extraction_is_current
+from extraction_cache import EXTRACTION_PROMPT_VERSION, EXTRACTION_MODEL
+from entity_resolution import rebuild_people_index
+from family_graph import rebuild_family_graph
+from json_store import write_json_atomic
+
+# Saved interviews
+PROFILES_DIR = 'data/parent_profiles'
+
+# Progress of the current run, so an interrupted run picks up where it stopped
+CHECKPOINT_PATH = 'data/jobs/reextract_checkpoint.json'
+
+# Profiles extracted at once (each may send several chunks in parallel itself)
+DEFAULT_WORKERS = 3
+
+
+def load_checkpoint(restart=False):
+    """
+    Load the checkpoint of an interrupted run with the same prompt and model
+
+    Returns:
+        dict: {"prompt_version", "model", "done": {filepath: answers hash}}
+    """
+    run = {"prompt_version": EXTRACTION_PROMPT_VERSION, "model": EXTRACTION_MODEL, "done": {}}
+    if restart or not os.path.exists(CHECKPOINT_PATH):
+        return run
+    try:
+        with open(CHECKPOINT_PATH, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except Exception as e:
+        print(f"Ignoring unreadable checkpoint: {e}")
+        return run
+    if checkpoint.get("prompt_version") != run["prompt_version"] or checkpoint.get("model") != run["model"]:
+        return run
+    return checkpoint
+
+
+def _answers_hash(filepath):
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+    except Exception:
+        return None
+    return answers_fingerprint(profile.get('interview_data', {}).get('questions_and_answers', []))
+
+
+def reextract_profile(filepath, force=False):
+    """
+    Re-extract one profile
+
+    Args:
+        filepath (str): Profile path
+        force (bool): Re-extract even if the profile is current, sending every answer to the
+                      model again instead of reusing cached extractions
+
+    Returns:
+        tuple: (status "extracted"/"current"/"skipped", answers hash, number of answers)
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+    answers = profile.get('interview_data', {}).get('questions_and_answers', [])
+    answers_hash = answers_fingerprint(answers)
+
+    if not answers:
+        return "skipped", answers_hash, 0
+    if not force and extraction_is_current(profile):
+        return "current", answers_hash, len(answers)
+
+    # No queue workers run here to finish per-answer extractions, so don't wait for them
+    result = run_extraction_job({"filepath": filepath, "answers_hash": answers_hash, "turn_wait": 0, "force": force},
+                                lambda *args: None)
+    if result.get("skipped"):
+        # Saved from the app while we were working - that save queued its own extraction
+        return "skipped", answers_hash, len(answers)
+    return "extracted", answers_hash, len(answers)
+
+
+def run(workers=DEFAULT_WORKERS, force=False, restart=False):
+    """
+    Re-extract every profile in the vault
+
+    Returns:
+        dict: Counts, failures and throughput
+    """
+    checkpoint = load_checkpoint(restart)
+    profiles = sorted(str(path) for path in Path(PROFILES_DIR).glob('*.json'))
+    pending = [path for path in profiles
+               if path not in checkpoint["done"] or checkpoint["done"][path] != _answers_hash(path)]
+    print(f"{len(profiles)} profiles, {len(profiles) - len(pending)} already done in an earlier run, "
+          f"prompt {EXTRACTION_PROMPT_VERSION} on {EXTRACTION_MODEL}")
+
+    counts = {"extracted": 0, "current": 0, "skipped": 0, "failed": 0}
+    failures = {}
+    answers_extracted = 0
+    started = time.time()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(reextract_profile, path, force): path for path in pending}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                status, answers_hash, answer_count = future.result()
+            except Exception as e:
+                status, answers_hash, answer_count = "failed", None, 0
+                failures[path] = str(e)
+
+            counts[status] += 1
+            if status == "extracted":
+                answers_extracted += answer_count
+            if status != "failed":
+                checkpoint["done"][path] = answers_hash
+                write_json_atomic(CHECKPOINT_PATH, checkpoint, indent=2)
+            print(f"[{sum(counts.values())}/{len(pending)}] {status:<9} {Path(path).name}")
+
+    elapsed = time.time() - started
+    if counts["extracted"]:
+        # People may now resolve differently across the whole family
+        print(f"People index: {rebuild_people_index()} people")
+        print(f"Family graph: {rebuild_family_graph()} people")
+    if not failures and os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+
+    return {
+        "counts": counts,
+        "failures": failures,
+        "elapsed": elapsed,
+        "profiles_per_minute": 60 * counts["extracted"] / elapsed if elapsed else 0.0,
+        "answers_per_minute": 60 * answers_extracted / elapsed if elapsed else 0.0
+    }
+
+
+def print_report(report):
+    """Print the summary of a run"""
+    counts = report["counts"]
+    print("\n" + "=" * 60)
+    print(f"Re-extracted: {counts['extracted']}   Already current: {counts['current']}   "
+          f"Skipped: {counts['skipped']}   Failed: {counts['failed']}")
+    print(f"Time: {report['elapsed']:.1f}s   Throughput: {report['profiles_per_minute']:.1f} profiles/min, "
+          f"{report['answers_per_minute']:.1f} answers/min")
+    if report["failures"]:
+        print("\nFailures (run again to retry just these):")
+        for path, error in report["failures"].items():
+            print(f"  {Path(path).name}: {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-extract structured data for every saved interview")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Profiles extracted at once")
+    parser.add_argument("--force", action="store_true", help="Re-extract profiles that are already current, without the extraction cache")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an interrupted run")
+    args = parser.parse_args()
+
+    report = run(workers=max(1, args.workers), force=args.force, restart=args.restart)
+    print_report(report)
+    sys.exit(1 if report["failures"] else 0)
@@ -0,0 +1,266 @@
+"""
+ASR Backends
+Pluggable speech-to-text engines (OpenAI Whisper API, local faster-whisper, offline stub)
+"""
+
+import io
+import os
+import hashlib
+import threading
+from openai import OpenAI
+from dotenv import load_dotenv
+from audio_format import probe_audio
+from language_detect import normalize_language
+
+# Load environment variables
+load_dotenv()
+
+# Backend used when none is requested explicitly: "openai", "local" or "stub"
+DEFAULT_BACKEND = os.getenv("ASR_BACKEND", "openai").lower()
+
+# faster-whisper model size and quantization for the local backend
+LOCAL_MODEL_SIZE = os.getenv("LOCAL_ASR_MODEL", "base")
+LOCAL_COMPUTE_TYPE = os.getenv("LOCAL_ASR_COMPUTE_TYPE", "int8")
+
+# Length of each fake segment produced by the stub backend
+STUB_SEGMENT_SECONDS = 5.0
+
+
+def _read_upload(upload):
+    """Read the bytes of an upload tuple and rewind it"""
+    file_obj = upload[1]
+    file_obj.seek(0)
+    data = file_obj.read()
+    file_obj.seek(0)
+    return data
+
+
+class ASRBackend:
+    """
+    Base class for transcription engines
+
+    Uploads are (filename, file object, mime type) tuples as built by
+    audio_helper.prepare_upload. Results are {"text": str, "segments":
+    [{"start", "end", "text"}]} with times in seconds, plus "language" when
+    the engine reports which language it heard.
+    """
+
+    name = "base"
+    # Whether splitting a recording and sending the parts concurrently speeds things up
+    parallel = False
+
+    @property
+    def cache_id(self):
+        """Identifies this engine's output in the transcript cache"""
+        return self.name
+
+    def transcribe(self, upload, translate_to_english=False):
+        """
+        Transcribe a whole recording
+
+        Args:
+            upload (tuple): (filename, file object, mime type)
+            translate_to_english (bool): Translate to English instead of transcribing
+
+        Returns:
+            dict: {"text", "segments"}
+        """
+        segments = list(self.transcribe_stream(upload, translate_to_english))
+        return {"text": " ".join(segment["text"] for segment in segments).strip(), "segments": segments}
+
+    def transcribe_stream(self, upload, translate_to_english=False):
+        """
+        Transcribe a recording, yielding segments as soon as they are ready
+
+        Args:
+            upload (tuple): (filename, file object, mime type)
+            translate_to_english (bool): Translate to English instead of transcribing
+
+        Yields:
+            dict: {"start", "end", "text"}
+        """
+        result = self.transcribe(upload, translate_to_english)
+        for segment in result["segments"]:
+            yield segment
+
+
+class OpenAIBackend(ASRBackend):
+    """Hosted Whisper API"""
+
+    name = "openai"
+    parallel = True
+    model = "whisper-1"
+
+    def __init__(self):
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    @property
+    def cache_id(self):
+        return self.model
+
+    def transcribe(self, upload, translate_to_english=False):
+        # verbose_json includes segment timestamps, so answers can be traced back to the recording
+        if translate_to_english:
+            # Use translations endpoint - automatically detects language and translates to English
+            response = self.client.audio.translations.create(
+                model=self.model,
+                file=upload,
+                response_format="verbose_json"
+            )
+        else:
+            # Use transcriptions endpoint - transcribes in original language
+            response = self.client.audio.transcriptions.create(
+                model=self.model,
+                file=upload,
+                response_format="verbose_json"
+            )
+
+        return {
+            "text": (getattr(response, 'text', None) or '').strip(),
+            "segments": _read_segments(response),
+            "language": normalize_language(getattr(response, 'language', None))
+        }
+
+
+def _read_segments(response):
+    """Pull (start, end, text) segments out of a verbose_json Whisper response"""
+    segments = []
+    for segment in getattr(response, 'segments', None) or []:
+        if isinstance(segment, dict):
+            start, end, text = segment.get('start'), segment.get('end'), segment.get('text', '')
+        else:
+            start, end, text = segment.start, segment.end, segment.text
+        if start is not None and end is not None and text and text.strip():
+            segments.append({"start": round(float(start), 2), "end": round(float(end), 2), "text": text.strip()})
+    return segments
+
+
+class LocalWhisperBackend(ASRBackend):
+    """faster-whisper running on this machine's CPU - no upload, no provider queue"""
+
+    name = "local"
+
+    def __init__(self, model_size=LOCAL_MODEL_SIZE, compute_type=LOCAL_COMPUTE_TYPE):
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self._model = None
+        self._load_lock = threading.Lock()
+        # Model inference isn't safe to run concurrently on one model instance
+        self._inference_lock = threading.Lock()
+
+    @property
+    def cache_id(self):
+        return f"faster-whisper-{self.model_size}"
+
+    def _get_model(self):
+        # Loading a model takes seconds, so do it once per process
+        with self._load_lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+                self._model = WhisperModel(self.model_size, device="cpu", compute_type=self.compute_type)
+            return self._model
+
+    def transcribe_stream(self, upload, translate_to_english=False):
+        model = self._get_model()
+        with self._inference_lock:
+            segments, _ = model.transcribe(
+                io.BytesIO(_read_upload(upload)),
+                task="translate" if translate_to_english else "transcribe",
+                vad_filter=True
+            )
+            for segment in segments:
+                text = segment.text.strip()
+                if text:
+                    yield {"start": round(segment.start, 2), "end": round(segment.end, 2), "text": text}
+
+
+class StubBackend(ASRBackend):
+    """Deterministic offline transcripts derived from the audio bytes, for tests and demos"""
+
+    name = "stub"
+
+    def transcribe_stream(self, upload, translate_to_english=False):
+        data = _read_upload(upload)
+        digest = hashlib.sha256(data).hexdigest()[:8]
+        duration = probe_audio(data).get("duration") or STUB_SEGMENT_SECONDS
+        prefix = "translated" if translate_to_english else "transcript"
+
+        start = 0.0
+        index = 0
+        while start < duration:
+            end = min(duration, start + STUB_SEGMENT_SECONDS)
+            yield {"start": round(start, 2), "end": round(end, 2), "text": f"[{prefix} {digest} part {index + 1}]"}
+            start = end
+            index += 1
+
+
+# Available backends, by ASR_BACKEND name
+BACKENDS = {
+    "openai": OpenAIBackend,
+    "local": LocalWhisperBackend,
+    "stub": StubBackend
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_asr_backend(name=None):
+    """
+    Get a transcription backend (one shared instance per backend)
+
+    Args:
+        name (str): "openai", "local" or "stub" (defaults to the ASR_BACKEND setting)
+
+    Returns:
+        ASRBackend: The backend
+    """
+    name = (name or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
+
+
+def available_backends():
+    """
+    List backends that can run in this environment
+
+    Returns:
+        list: Backend names
+    """
+    names = ["stub"]
+    if os.getenv("OPENAI_API_KEY"):
+        names.append("openai")
+    try:
+        import faster_whisper  # noqa: F401
+        names.append("local")
+    except ImportError:
+        pass
+    return names
+
+
+def test_asr_backends():
+    """Test the stub backend (no network needed)"""
+    import wave
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(bytes(2 * 16000 * 12))
+    buffer.seek(0)
+    upload = ("recording.wav", buffer, "audio/wav")
+
+    backend = get_asr_backend("stub")
+    print(f"Batch: {backend.transcribe(upload)['text']}")
+    for segment in backend.transcribe_stream(upload, translate_to_english=True):
+        print(f"Stream: {segment['start']}-{segment['end']}s {segment['text']}")
+    print(f"Available here: {', '.join(available_backends())}")
+
+
+if __name__ == "__main__":
+    test_asr_backends()
@@ -0,0 +1,479 @@
+"""
+Audio Analysis Module
+Voice activity detection and quality scoring for interview recordings
+"""
+
+import io
+import wave
+import numpy as np
+
+# Minimum amount of actual speech ElevenLabs needs for a usable clone
+MIN_CLONE_SPEECH_SECONDS = 30
+
+# Stop adding samples once this much speech has been selected
+TARGET_CLONE_SPEECH_SECONDS = 120
+
+# ElevenLabs instant voice cloning accepts at most 25 files
+MAX_CLONE_FILES = 25
+
+# Analysis frame length in seconds (30ms is a common speech frame size)
+FRAME_SECONDS = 0.03
+
+# Frames must be this much louder than the noise floor to count as speech
+VAD_MARGIN_DB = 6.0
+
+# Anything quieter than this is treated as silence regardless of noise floor
+SILENCE_FLOOR_DB = -50.0
+
+# Gaps shorter than this between speech frames are bridged (natural pauses)
+VAD_HANGOVER_SECONDS = 0.2
+
+# Samples at or above this magnitude (of full scale) are considered clipped
+CLIPPING_LEVEL = 0.999
+
+# Long recordings are split into segments of at most this length for transcription
+SEGMENT_TARGET_SECONDS = 120
+
+# Prefer cutting inside a pause at least this long
+MIN_SPLIT_SILENCE_SECONDS = 0.3
+
+# When no pause is found, segments are cut hard and overlap by this much
+SPLIT_OVERLAP_SECONDS = 1.5
+
+# Length of the anti-aliasing filter used when downsampling (odd, so it's centred)
+RESAMPLE_FILTER_TAPS = 63
+
+
+def decode_wav_bytes(audio_data):
+    """
+    Decode PCM WAV bytes into a mono float signal
+
+    Args:
+        audio_data (bytes): WAV file contents
+
+    Returns:
+        tuple: (samples: np.ndarray of float32 in [-1, 1], sample_rate: int),
+               or (None, None) if the audio is not PCM WAV
+    """
+    if not audio_data or bytes(audio_data[:4]) != b'RIFF':
+        return None, None
+
+    try:
+        with wave.open(io.BytesIO(audio_data), 'rb') as wav:
+            channels = wav.getnchannels()
+            sample_width = wav.getsampwidth()
+            sample_rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None, None
+
+    if sample_width == 1:
+        # 8-bit WAV is unsigned
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        # Sign-extend packed 24-bit samples into int32
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608.0
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        return None, None
+
+    if channels > 1:
+        usable = len(samples) - (len(samples) % channels)
+        samples = samples[:usable].reshape(-1, channels).mean(axis=1)
+
+    return samples, sample_rate
+
+
+def frame_levels(samples, sample_rate, frame_seconds=FRAME_SECONDS):
+    """
+    Compute per-frame RMS levels in dBFS
+
+    Args:
+        samples (np.ndarray): Mono float signal
+        sample_rate (int): Samples per second
+        frame_seconds (float): Frame length in seconds
+
+    Returns:
+        tuple: (levels_db: np.ndarray, frame_length: int)
+    """
+    frame_length = max(1, int(sample_rate * frame_seconds))
+    num_frames = len(samples) // frame_length
+    if num_frames == 0:
+        return np.zeros(0, dtype=np.float32), frame_length
+
+    frames = samples[:num_frames * frame_length].reshape(num_frames, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    levels_db = 20.0 * np.log10(rms + 1e-10)
+    return levels_db, frame_length
+
+
+def speech_mask(levels_db, frame_seconds=FRAME_SECONDS):
+    """
+    Energy-based voice activity detection over frame levels
+
+    Args:
+        levels_db (np.ndarray): Per-frame RMS levels in dBFS
+        frame_seconds (float): Frame length in seconds
+
+    Returns:
+        tuple: (mask: np.ndarray of bool, noise_floor_db: float)
+    """
+    if len(levels_db) == 0:
+        return np.zeros(0, dtype=bool), SILENCE_FLOOR_DB
+
+    noise_floor_db = float(np.percentile(levels_db, 10))
+    threshold = max(noise_floor_db + VAD_MARGIN_DB, SILENCE_FLOOR_DB)
+    mask = levels_db > threshold
+
+    # Bridge short pauses between words so they count as speech
+    hangover = int(VAD_HANGOVER_SECONDS / frame_seconds)
+    if hangover > 0 and mask.any():
+        # Morphological closing: dilate then erode, so only gaps are filled
+        window = np.ones(2 * hangover + 1)
+        dilated = np.convolve(mask.astype(np.float32), window, mode='same') > 0
+        padded = np.concatenate((np.ones(hangover), dilated, np.ones(hangover)))
+        closed = np.convolve(padded, window, mode='valid') >= len(window)
+        mask = mask | closed
+
+    return mask, noise_floor_db
+
+
+def mask_to_segments(mask, frame_seconds=FRAME_SECONDS):
+    """
+    Convert a frame mask into (start, end) time ranges in seconds
+
+    Args:
+        mask (np.ndarray): Boolean per-frame mask
+        frame_seconds (float): Frame length in seconds
+
+    Returns:
+        list: List of (start_seconds, end_seconds) tuples
+    """
+    if len(mask) == 0:
+        return []
+
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.diff(padded)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return [(float(s * frame_seconds), float(e * frame_seconds)) for s, e in zip(starts, ends)]
+
+
+def _lowpass_kernel(cutoff_ratio):
+    """Windowed-sinc low-pass filter; cutoff_ratio is the cutoff over the sample rate"""
+    half = RESAMPLE_FILTER_TAPS // 2
+    taps = np.arange(-half, half + 1)
+    kernel = 2 * cutoff_ratio * np.sinc(2 * cutoff_ratio * taps) * np.hamming(RESAMPLE_FILTER_TAPS)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+def resample(samples, sample_rate, target_rate):
+    """
+    Resample a mono signal, low-pass filtering first when downsampling
+
+    Args:
+        samples (np.ndarray): Mono float signal
+        sample_rate (int): Current samples per second
+        target_rate (int): Desired samples per second
+
+    Returns:
+        np.ndarray: Resampled float32 signal
+    """
+    if sample_rate == target_rate or len(samples) == 0:
+        return samples
+
+    out_length = int(round(len(samples) * target_rate / float(sample_rate)))
+
+    if target_rate > sample_rate:
+        positions = np.arange(out_length) * (sample_rate / float(target_rate))
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+    # Cut just below the new Nyquist frequency so speech doesn't alias
+    kernel = _lowpass_kernel(0.45 * target_rate / sample_rate)
+    half = RESAMPLE_FILTER_TAPS // 2
+
+    if sample_rate % target_rate == 0:
+        # Integer ratio (48k -> 16k): only compute the filtered samples we keep
+        step = sample_rate // target_rate
+        padded = np.pad(samples.astype(np.float32), (half, half))
+        windows = np.lib.stride_tricks.sliding_window_view(padded, RESAMPLE_FILTER_TAPS)[::step]
+        return (windows @ kernel[::-1])[:out_length]
+
+    filtered = np.convolve(samples, kernel, mode='same')
+    positions = np.arange(out_length) * (sample_rate / float(target_rate))
+    return np.interp(positions, np.arange(len(filtered)), filtered).astype(np.float32)
+
+
+def encode_wav(samples, sample_rate):
+    """
+    Encode a mono float signal as 16-bit PCM WAV bytes
+
+    Args:
+        samples (np.ndarray): Mono float signal in [-1, 1]
+        sample_rate (int): Samples per second
+
+    Returns:
+        bytes: WAV file contents
+    """
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def find_split_points(samples, sample_rate, target_seconds=SEGMENT_TARGET_SECONDS):
+    """
+    Plan segment boundaries, cutting in pauses between words wherever possible
+
+    Args:
+        samples (np.ndarray): Mono float signal
+        sample_rate (int): Samples per second
+        target_seconds (float): Maximum segment length
+
+    Returns:
+        list: List of (start_seconds, end_seconds, overlaps_previous) tuples
+    """
+    duration = len(samples) / float(sample_rate)
+    if duration <= target_seconds:
+        return [(0.0, duration, False)]
+
+    levels_db, frame_length = frame_levels(samples, sample_rate)
+    frame_seconds = frame_length / float(sample_rate)
+    mask, _ = speech_mask(levels_db, frame_seconds)
+
+    # (midpoint, length) of every pause long enough to cut in
+    pauses = [((start + end) / 2.0, end - start) for start, end in mask_to_segments(~mask, frame_seconds)
+              if end - start >= MIN_SPLIT_SILENCE_SECONDS]
+
+    segments = []
+    start = 0.0
+    overlaps_previous = False
+    while duration - start > target_seconds:
+        limit = start + target_seconds
+        # Only look at the second half of the window so segments don't get tiny
+        candidates = [(length, midpoint) for midpoint, length in pauses
+                      if start + target_seconds / 2.0 < midpoint <= limit]
+        if candidates:
+            cut = max(candidates)[1]
+            segments.append((start, cut, overlaps_previous))
+            start, overlaps_previous = cut, False
+        else:
+            segments.append((start, limit, overlaps_previous))
+            start, overlaps_previous = limit - SPLIT_OVERLAP_SECONDS, True
+
+    segments.append((start, duration, overlaps_previous))
+    return segments
+
+
+def split_on_silence(audio_data, target_seconds=SEGMENT_TARGET_SECONDS, output_rate=None):
+    """
+    Split a long WAV recording into segments at silence boundaries
+
+    Args:
+        audio_data (bytes): WAV file contents
+        target_seconds (float): Maximum segment length
+        output_rate (int): Resample segments to this rate (None keeps the original rate)
+
+    Returns:
+        list: Dicts with start, end, overlaps_previous and audio_data (WAV bytes),
+              or None if the audio could not be decoded
+    """
+    samples, sample_rate = decode_wav_bytes(audio_data)
+    if samples is None or not sample_rate:
+        return None
+
+    split_points = find_split_points(samples, sample_rate, target_seconds)
+    if output_rate:
+        samples = resample(samples, sample_rate, output_rate)
+        sample_rate = output_rate
+
+    segments = []
+    for start, end, overlaps_previous in split_points:
+        chunk = samples[int(start * sample_rate):int(end * sample_rate)]
+        segments.append({
+            "start": start,
+            "end": end,
+            "overlaps_previous": overlaps_previous,
+            "audio_data": encode_wav(chunk, sample_rate)
+        })
+    return segments
+
+
+def analyze_audio(audio_data):
+    """
+    Measure speech content and recording quality of an audio sample
+
+    Args:
+        audio_data (bytes): Audio file contents
+
+    Returns:
+        dict: Analysis with duration, speech_seconds, rms_db, snr_db, clipping_ratio,
+              speech_segments and score, or None if the audio could not be decoded
+    """
+    samples, sample_rate = decode_wav_bytes(audio_data)
+    if samples is None or not sample_rate:
+        return None
+
+    duration = len(samples) / float(sample_rate)
+    levels_db, frame_length = frame_levels(samples, sample_rate)
+    frame_seconds = frame_length / float(sample_rate)
+    mask, noise_floor_db = speech_mask(levels_db, frame_seconds)
+
+    speech_seconds = float(mask.sum() * frame_seconds)
+    overall_rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64)))) if len(samples) else 0.0
+    rms_db = 20.0 * np.log10(overall_rms + 1e-10)
+
+    if mask.any():
+        speech_db = 10.0 * np.log10(np.mean(np.power(10.0, levels_db[mask] / 10.0)))
+        if (~mask).any():
+            noise_db = 10.0 * np.log10(np.mean(np.power(10.0, levels_db[~mask] / 10.0)))
+        else:
+            noise_db = noise_floor_db
+        snr_db = float(speech_db - noise_db)
+    else:
+        snr_db = 0.0
+
+    clipping_ratio = float(np.mean(np.abs(samples) >= CLIPPING_LEVEL)) if len(samples) else 0.0
+
+    return {
+        "duration": duration,
+        "sample_rate": sample_rate,
+        "speech_seconds": speech_seconds,
+        "rms_db": float(rms_db),
+        "snr_db": snr_db,
+        "clipping_ratio": clipping_ratio,
+        "speech_segments": mask_to_segments(mask, frame_seconds),
+        "score": quality_score(speech_seconds, snr_db, clipping_ratio)
+    }
+
+
+def quality_score(speech_seconds, snr_db, clipping_ratio):
+    """
+    Score a sample for voice cloning: seconds of speech weighted by cleanliness
+
+    Args:
+        speech_seconds (float): Seconds of detected speech
+        snr_db (float): Estimated signal-to-noise ratio
+        clipping_ratio (float): Fraction of clipped samples
+
+    Returns:
+        float: Higher is better
+    """
+    # 30 dB SNR or better counts as clean studio-like audio
+    snr_weight = min(max(snr_db / 30.0, 0.0), 1.0)
+    # 2% clipped samples already sounds badly distorted
+    clip_weight = max(0.0, 1.0 - clipping_ratio * 50.0)
+    return speech_seconds * snr_weight * clip_weight
+
+
+def rank_audio_samples(audio_samples):
+    """
+    Rank interview audio samples by cloning quality
+
+    Samples that can't be decoded (e.g. webm/ogg) are ranked after analyzed
+    ones, largest first, since their content can't be checked locally.
+
+    Args:
+        audio_samples: List of dicts with 'audio_data' (bytes)
+
+    Returns:
+        list: List of (sample, analysis) tuples, best first (analysis may be None)
+    """
+    analyzed = [(sample, analyze_audio(sample['audio_data'])) for sample in audio_samples]
+    return sorted(
+        analyzed,
+        key=lambda pair: (
+            pair[1] is not None,
+            pair[1]['score'] if pair[1] else 0.0,
+            len(pair[0]['audio_data'])
+        ),
+        reverse=True
+    )
+
+
+def select_clone_samples(audio_samples, min_speech_seconds=MIN_CLONE_SPEECH_SECONDS,
+                         target_speech_seconds=TARGET_CLONE_SPEECH_SECONDS):
+    """
+    Pick the best samples for voice cloning and reject inputs without enough speech
+
+    Args:
+        audio_samples: List of dicts with 'audio_data' (bytes)
+        min_speech_seconds (float): Reject if less speech than this is available
+        target_speech_seconds (float): Stop selecting once this much speech is covered
+
+    Returns:
+        tuple: (success: bool, selected_samples: list, error: str)
+    """
+    if not audio_samples:
+        return False, [], "No audio samples provided"
+
+    ranked = rank_audio_samples(audio_samples)
+    usable = [(sample, analysis) for sample, analysis in ranked
+              if analysis and analysis['score'] > 0]
+
+    if not usable:
+        if any(analysis for _, analysis in ranked):
+            return False, [], "No clear speech detected in the recordings. Try recording in a quieter room."
+        # Nothing could be analyzed locally - fall back to the largest sample
+        return True, [ranked[0][0]], None
+
+    selected = []
+    speech_total = 0.0
+    for sample, analysis in usable:
+        if speech_total >= target_speech_seconds or len(selected) >= MAX_CLONE_FILES:
+            break
+        selected.append(sample)
+        speech_total += analysis['speech_seconds']
+
+    if speech_total < min_speech_seconds:
+        return False, [], (f"Only {speech_total:.0f} seconds of speech detected. "
+                           f"Need at least {min_speech_seconds} seconds of clear speech.")
+
+    return True, selected, None
+
+
+def test_audio_analysis():
+    """Test analysis with a synthetic recording (tone bursts over light noise)"""
+
+    sample_rate = 16000
+    rng = np.random.default_rng(0)
+    t = np.arange(sample_rate * 70) / sample_rate
+    signal = 0.005 * rng.standard_normal(len(t))
+    # 1 second "words" every other second
+    bursts = (np.floor(t) % 2 == 0)
+    signal = signal + bursts * 0.3 * np.sin(2 * np.pi * 220 * t)
+
+    recording = encode_wav(signal, sample_rate)
+
+    analysis = analyze_audio(recording)
+    print(f"Duration: {analysis['duration']:.1f}s")
+    print(f"Speech: {analysis['speech_seconds']:.1f}s")
+    print(f"SNR: {analysis['snr_db']:.1f} dB")
+    print(f"Clipping: {analysis['clipping_ratio']:.4f}")
+    print(f"Score: {analysis['score']:.1f}")
+
+    success, selected, error = select_clone_samples([{'audio_data': recording}])
+    print(f"Selected for cloning: {success} ({len(selected)} sample(s)) {error or ''}")
+
+    segments = split_on_silence(recording, target_seconds=15)
+    print("Segments: " + ", ".join(f"{s['start']:.1f}-{s['end']:.1f}s" for s in segments))
+
+    # A 1 kHz tone should survive 48k -> 16k, a 10 kHz tone should be filtered out
+    t = np.arange(48000) / 48000.0
+    for freq in (1000, 10000):
+        tone = resample(np.sin(2 * np.pi * freq * t).astype(np.float32), 48000, 16000)
+        print(f"{freq} Hz tone after resampling to 16 kHz: RMS {np.sqrt(np.mean(tone ** 2)):.3f}")
+
+
+if __name__ == "__main__":
+    test_audio_analysis()
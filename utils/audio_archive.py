@@ -0,0 +1,490 @@
+"""
+Audio Archive Module
+Keep every interview recording in one compressed, append-only file per interview
+"""
+
+import os
+import io
+import json
+import uuid
+import zlib
+import wave
+import struct
+import tempfile
+import threading
+from datetime import datetime
+import numpy as np
+from audio_analysis import decode_wav_bytes, resample, encode_wav
+from json_store import write_json_atomic
+
+# Where interview archives are stored
+ARCHIVE_DIR = 'data/audio_archive'
+
+# Archive file layout: file header, then records of (header, JSON metadata, payload)
+ARCHIVE_MAGIC = b'FVAA'
+ARCHIVE_VERSION = 1
+RECORD_MAGIC = b'FVAC'
+_FILE_HEADER = struct.Struct('<4sH')
+_RECORD_HEADER = struct.Struct('<4sII')  # magic, metadata length, payload length
+
+# Recordings are stored as 16 kHz mono 16-bit PCM - enough for playback, transcription and cloning
+ARCHIVE_SAMPLE_RATE = 16000
+
+# Payload encodings
+CODEC_PCM = "pcm16-delta-zlib"  # Sample-to-sample differences, zlib-compressed
+CODEC_ORIGINAL = "original-zlib"  # Audio we couldn't decode, kept as uploaded
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path):
+    with _locks_guard:
+        return _locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def new_interview_id():
+    """
+    Create an ID for a new interview's archive
+
+    Returns:
+        str: Interview ID
+    """
+    return uuid.uuid4().hex[:16]
+
+
+def interview_id_for_profile(profile, filepath=None):
+    """
+    Get the archive ID of a saved interview
+
+    Args:
+        profile (dict): Saved interview data
+        filepath (str): Profile path (used for profiles saved before archives existed)
+
+    Returns:
+        str: Interview ID
+    """
+    interview_id = (profile or {}).get('metadata', {}).get('interview_id')
+    if interview_id:
+        return interview_id
+    if filepath:
+        return os.path.splitext(os.path.basename(filepath))[0]
+    return new_interview_id()
+
+
+def archive_path_for(interview_id):
+    """
+    Get the archive file for an interview
+
+    Args:
+        interview_id (str): Interview ID
+
+    Returns:
+        str: Path to the archive
+    """
+    return os.path.join(ARCHIVE_DIR, f"{interview_id}.fva")
+
+
+def clip_id_for(question_index, followup_index=None):
+    """
+    Build the archive key for an answer recording
+
+    Args:
+        question_index (int): Core question number (0-based)
+        followup_index (int): Follow-up number, or None for the main answer
+
+    Returns:
+        str: Clip ID such as "q3" or "q3_f1"
+    """
+    if followup_index is None:
+        return f"q{question_index}"
+    return f"q{question_index}_f{followup_index}"
+
+
+def encode_clip(audio_data):
+    """
+    Compress a recording for the archive
+
+    Args:
+        audio_data (bytes): Recorded audio (WAV, or any other container)
+
+    Returns:
+        tuple: (payload: bytes, metadata: dict)
+    """
+    samples, sample_rate = decode_wav_bytes(audio_data)
+    if samples is None:
+        return zlib.compress(bytes(audio_data), 6), {"codec": CODEC_ORIGINAL}
+
+    samples = resample(samples, sample_rate, ARCHIVE_SAMPLE_RATE)
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2')
+    # Neighbouring speech samples are close, so differences compress far better than raw PCM
+    deltas = np.diff(pcm, prepend=np.int16(0)).astype('<i2')
+    return zlib.compress(deltas.tobytes(), 6), {
+        "codec": CODEC_PCM,
+        "sample_rate": ARCHIVE_SAMPLE_RATE,
+        "channels": 1,
+        "num_samples": len(pcm),
+        "duration": len(pcm) / float(ARCHIVE_SAMPLE_RATE)
+    }
+
+
+def decode_pcm(payload, metadata, end_sample=None):
+    """
+    Decompress an archived recording to 16-bit PCM samples
+
+    Args:
+        payload (bytes): Compressed clip
+        metadata (dict): Clip metadata from the index
+        end_sample (int): Stop decompressing after this many samples (None = whole clip)
+
+    Returns:
+        np.ndarray: int16 samples, or None for clips stored in their original format
+    """
+    if metadata.get("codec") != CODEC_PCM:
+        return None
+    if end_sample is None:
+        raw = zlib.decompress(payload)
+    else:
+        # Deltas only depend on what came before, so nothing past the end is needed
+        raw = zlib.decompressobj().decompress(payload, end_sample * 2)
+    deltas = np.frombuffer(raw[:len(raw) - len(raw) % 2], dtype='<i2')
+    # Summing in int16 wraps exactly like the differences did
+    return np.cumsum(deltas, dtype=np.int16)
+
+
+def pcm_to_wav(pcm, sample_rate):
+    """
+    Wrap 16-bit PCM samples in a WAV header
+
+    Args:
+        pcm (np.ndarray): int16 samples
+        sample_rate (int): Samples per second
+
+    Returns:
+        bytes: WAV file contents
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+class AudioArchive:
+    """One interview's recordings in a single append-only file with an offset index"""
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + '.idx.json'
+        self._lock = _lock_for(path)
+        self._index = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    # ---------- index ----------
+
+    def _load_index(self, repair=False):
+        """
+        Load the sidecar index, rescanning the archive if it doesn't match
+
+        Readers never change the file: a size mismatch may just be an append
+        in progress, so they scan read-only and ignore any incomplete tail.
+        Only writers (holding the archive lock) pass repair=True to truncate
+        a crashed record and rewrite the index.
+        """
+        if not self.exists():
+            return {"archive_size": 0, "clips": {}}
+
+        archive_size = os.path.getsize(self.path)
+        if self._index is not None and self._index.get("archive_size") == archive_size:
+            return self._index
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get("archive_size") == archive_size:
+                self._index = index
+                return index
+        except (OSError, ValueError):
+            pass
+
+        if repair:
+            return self._repair()
+        with open(self.path, 'rb') as f:
+            clips, valid_end = self._scan(f)
+        return {"version": ARCHIVE_VERSION, "archive_size": valid_end, "clips": clips}
+
+    def _write_index(self, index):
+        write_json_atomic(self.index_path, index, indent=2)
+        self._index = index
+
+    def _scan(self, f):
+        """
+        Walk record headers (payloads are skipped, not read) up to the last complete record
+
+        Returns:
+            tuple: (clips dict, offset just past the last complete record)
+        """
+        clips = {}
+        header = f.read(_FILE_HEADER.size)
+        if len(header) < _FILE_HEADER.size or _FILE_HEADER.unpack(header)[0] != ARCHIVE_MAGIC:
+            raise ValueError(f"Not an audio archive: {self.path}")
+
+        valid_end = f.tell()
+        file_size = os.fstat(f.fileno()).st_size
+        while True:
+            record_header = f.read(_RECORD_HEADER.size)
+            if len(record_header) < _RECORD_HEADER.size:
+                break
+            magic, meta_length, payload_length = _RECORD_HEADER.unpack(record_header)
+            if magic != RECORD_MAGIC:
+                break
+            meta_bytes = f.read(meta_length)
+            if len(meta_bytes) < meta_length:
+                break
+            offset = f.tell()
+            if offset + payload_length > file_size:
+                break
+            f.seek(payload_length, os.SEEK_CUR)
+            try:
+                metadata = json.loads(meta_bytes.decode('utf-8'))
+            except ValueError:
+                break
+            # Later recordings of the same answer replace earlier ones
+            clips[metadata["clip_id"]] = dict(metadata, offset=offset, length=payload_length)
+            valid_end = offset + payload_length
+        return clips, valid_end
+
+    def _repair(self):
+        """Truncate an incomplete tail and rewrite the index - caller holds the archive lock"""
+        with open(self.path, 'r+b') as f:
+            clips, valid_end = self._scan(f)
+            f.truncate(valid_end)
+
+        index = {"version": ARCHIVE_VERSION, "archive_size": valid_end, "clips": clips}
+        self._write_index(index)
+        return index
+
+    def rebuild_index(self):
+        """
+        Rebuild the index by walking record headers
+
+        A record cut short by a crash is dropped and the file truncated back to
+        the last complete record, so later appends stay readable.
+
+        Returns:
+            dict: The rebuilt index
+        """
+        with self._lock:
+            return self._repair()
+
+    # ---------- writing ----------
+
+    def append_clip(self, clip_id, audio_data, extra=None):
+        """
+        Compress a recording and append it to the archive
+
+        Args:
+            clip_id (str): Clip ID (see clip_id_for)
+            audio_data (bytes): Recorded audio
+            extra (dict): Additional metadata to store with the clip
+
+        Returns:
+            dict: Index entry for the new clip
+        """
+        payload, metadata = encode_clip(audio_data)
+        metadata.update(extra or {})
+        metadata.update({
+            "clip_id": clip_id,
+            "recorded_at": datetime.now().isoformat(),
+            "original_bytes": len(audio_data),
+            "crc32": zlib.crc32(payload)
+        })
+        meta_bytes = json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            index = self._load_index(repair=True)
+            with open(self.path, 'ab') as f:
+                if f.tell() == 0:
+                    f.write(_FILE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION))
+                f.write(_RECORD_HEADER.pack(RECORD_MAGIC, len(meta_bytes), len(payload)))
+                f.write(meta_bytes)
+                offset = f.tell()
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+                archive_size = f.tell()
+
+            entry = dict(metadata, offset=offset, length=len(payload))
+            clips = dict(index.get("clips", {}))
+            clips[clip_id] = entry
+            self._write_index({"version": ARCHIVE_VERSION, "archive_size": archive_size, "clips": clips})
+        return entry
+
+    # ---------- reading ----------
+
+    def list_clips(self):
+        """
+        List archived recordings
+
+        Returns:
+            dict: Clip ID -> index entry (offset, length, duration, ...)
+        """
+        return dict(self._load_index()["clips"])
+
+    def read_payload(self, clip_id):
+        """
+        Read one clip's compressed bytes with a single seek
+
+        Args:
+            clip_id (str): Clip ID
+
+        Returns:
+            tuple: (payload: bytes, entry: dict), or (None, None) if the clip isn't archived
+        """
+        entry = self._load_index()["clips"].get(clip_id)
+        if entry is None:
+            return None, None
+        with open(self.path, 'rb') as f:
+            f.seek(entry["offset"])
+            payload = f.read(entry["length"])
+        if "crc32" in entry and zlib.crc32(payload) != entry["crc32"]:
+            raise ValueError(f"Archived clip {clip_id} is corrupted")
+        return payload, entry
+
+    def read_pcm(self, clip_id):
+        """
+        Read a clip as 16 kHz 16-bit PCM
+
+        Args:
+            clip_id (str): Clip ID
+
+        Returns:
+            tuple: (samples: np.ndarray of int16, sample_rate: int), or (None, None)
+        """
+        payload, entry = self.read_payload(clip_id)
+        if payload is None:
+            return None, None
+        pcm = decode_pcm(payload, entry)
+        if pcm is None:
+            return None, None
+        return pcm, entry["sample_rate"]
+
+    def read_clip_range(self, clip_id, start_seconds, end_seconds):
+        """
+        Read part of a clip as a playable WAV
+
+        Args:
+            clip_id (str): Clip ID
+            start_seconds (float): Start of the range
+            end_seconds (float): End of the range
+
+        Returns:
+            bytes: WAV audio, or None if the clip isn't archived as PCM
+        """
+        payload, entry = self.read_payload(clip_id)
+        if payload is None:
+            return None
+        sample_rate = entry.get("sample_rate", ARCHIVE_SAMPLE_RATE)
+        start_sample = max(0, int(start_seconds * sample_rate))
+        end_sample = max(start_sample, int(end_seconds * sample_rate))
+        pcm = decode_pcm(payload, entry, end_sample)
+        if pcm is None:
+            return None
+        return pcm_to_wav(pcm[start_sample:end_sample], sample_rate)
+
+    def read_clip(self, clip_id):
+        """
+        Read a clip as a playable audio file
+
+        Args:
+            clip_id (str): Clip ID
+
+        Returns:
+            bytes: WAV (or original-format) audio, or None if the clip isn't archived
+        """
+        payload, entry = self.read_payload(clip_id)
+        if payload is None:
+            return None
+        pcm = decode_pcm(payload, entry)
+        if pcm is None:
+            return zlib.decompress(payload)
+        return pcm_to_wav(pcm, entry["sample_rate"])
+
+
+def get_archive(interview_id):
+    """
+    Get the audio archive for an interview
+
+    Args:
+        interview_id (str): Interview ID
+
+    Returns:
+        AudioArchive: Archive (the file is created on the first append)
+    """
+    return AudioArchive(archive_path_for(interview_id))
+
+
+def load_archive_samples(archive_path):
+    """
+    Load every archived recording as samples for voice cloning
+
+    Args:
+        archive_path (str): Path to an interview archive
+
+    Returns:
+        list: Dicts with 'audio_data' (WAV bytes) and 'clip_id', in recording order
+    """
+    archive = AudioArchive(archive_path)
+    if not archive.exists():
+        return []
+
+    samples = []
+    clips = sorted(archive.list_clips().values(), key=lambda entry: entry["offset"])
+    for entry in clips:
+        audio_data = archive.read_clip(entry["clip_id"])
+        if audio_data:
+            samples.append({'audio_data': audio_data, 'clip_id': entry["clip_id"]})
+    return samples
+
+
+def test_audio_archive():
+    """Test appending, re-recording, reading and index recovery"""
+    sample_rate = 48000
+    t = np.arange(sample_rate * 3) / float(sample_rate)
+    speech = (0.3 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 3 * t) > 0)).astype(np.float32)
+    recording = encode_wav(speech, sample_rate)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive = AudioArchive(os.path.join(temp_dir, "test.fva"))
+        archive.append_clip(clip_id_for(0), recording)
+        archive.append_clip(clip_id_for(0, 0), recording)
+        archive.append_clip(clip_id_for(0), recording, {"take": 2})
+
+        stored = os.path.getsize(archive.path)
+        print(f"Recorded {3 * len(recording) / 1e3:.0f} KB, archive {stored / 1e3:.0f} KB")
+        print(f"Clips: {sorted(archive.list_clips())}, q0 take: {archive.list_clips()['q0'].get('take')}")
+
+        pcm, rate = archive.read_pcm("q0_f0")
+        print(f"q0_f0: {len(pcm) / rate:.1f}s at {rate} Hz")
+        excerpt = archive.read_clip_range("q0_f0", 1.0, 1.5)
+        print(f"q0_f0 1.0-1.5s matches full decode: {excerpt == pcm_to_wav(pcm[16000:24000], rate)}")
+
+        # Simulate a crash mid-append and a lost index
+        with open(archive.path, 'ab') as f:
+            f.write(_RECORD_HEADER.pack(RECORD_MAGIC, 10, 1000) + b'{"clip')
+        os.remove(archive.index_path)
+        recovered = AudioArchive(archive.path)
+        print(f"Readable clips: {sorted(recovered.list_clips())}, "
+              f"file left alone by readers: {os.path.getsize(archive.path) > stored}")
+        recovered.rebuild_index()
+        print(f"After repair, size back to {os.path.getsize(archive.path) == stored}")
+        print(f"Samples for cloning: {len(load_archive_samples(archive.path))}")
+
+
+if __name__ == "__main__":
+    test_audio_archive()
@@ -0,0 +1,482 @@
+"""
+Audio Format Module
+Sniff container/codec headers locally and normalize audio before uploading it
+"""
+
+import os
+import struct
+import tempfile
+import subprocess
+
+# Formats ElevenLabs accepts as-is when their headers check out
+UPLOADABLE_CONTAINERS = ("wav", "mp3", "ogg", "flac", "m4a", "webm")
+
+# Sample rates outside this range are resampled (very low rates are kept - upsampling adds nothing)
+MAX_SAMPLE_RATE = 48000
+
+# Format used when a recording has to be transcoded
+TRANSCODE_SAMPLE_RATE = 22050
+TRANSCODE_CHANNELS = 1
+
+# Opus bitrate for compressed speech uploads (plenty for 16 kHz mono speech)
+COMPRESSED_BITRATE = "24k"
+
+# WAV format tags
+WAV_FORMAT_PCM = 0x0001
+WAV_FORMAT_EXTENSIBLE = 0xFFFE
+
+# MPEG audio lookup tables (kbps / Hz), indexed by header bit fields
+_MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+
+
+# MIME types for upload requests, by container
+MIME_TYPES = {
+    "wav": "audio/wav",
+    "mp3": "audio/mpeg",
+    "ogg": "audio/ogg",
+    "flac": "audio/flac",
+    "m4a": "audio/mp4",
+    "webm": "audio/webm",
+}
+
+
+def sniff_container(header):
+    """
+    Identify an audio container from its first bytes only (no parsing)
+
+    Args:
+        header: First 12+ bytes of the file (bytes or memoryview)
+
+    Returns:
+        str: Container name ("wav", "mp3", ...) or None if unrecognized
+    """
+    header = bytes(header[:12])
+    if header[:4] == b'RIFF':
+        return "wav"
+    if header[:4] == b'OggS':
+        return "ogg"
+    if header[:4] == b'\x1aE\xdf\xa3':
+        return "webm"
+    if header[:4] == b'fLaC':
+        return "flac"
+    if header[4:8] == b'ftyp':
+        return "m4a"
+    if header[:3] == b'ID3' or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def _empty_probe(container):
+    return {
+        "container": container,
+        "codec": None,
+        "sample_rate": None,
+        "channels": None,
+        "duration": None,
+        "issues": []
+    }
+
+
+def _probe_wav(data):
+    info = _empty_probe("wav")
+    if len(data) < 12 or data[8:12] != b'WAVE':
+        info["issues"].append("missing WAVE header")
+        return info
+
+    pos = 12
+    byte_rate = None
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        chunk_size = struct.unpack('<I', data[pos + 4:pos + 8])[0]
+        body = pos + 8
+
+        if chunk_id == b'fmt ' and chunk_size >= 16:
+            format_tag, channels, sample_rate, byte_rate, _, bits = struct.unpack('<HHIIHH', data[body:body + 16])
+            if format_tag == WAV_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                # Real format is the first two bytes of the sub-format GUID
+                format_tag = struct.unpack('<H', data[body + 24:body + 26])[0]
+            info["codec"] = "pcm_s%dle" % bits if format_tag == WAV_FORMAT_PCM else "wav_format_0x%04x" % format_tag
+            info["sample_rate"] = sample_rate
+            info["channels"] = channels
+            if format_tag != WAV_FORMAT_PCM:
+                info["issues"].append("non-PCM WAV encoding")
+
+        elif chunk_id == b'data':
+            available = len(data) - body
+            # Streaming recorders often leave the size as 0 or 0xFFFFFFFF
+            if chunk_size == 0 or chunk_size > available:
+                info["issues"].append("invalid data chunk size")
+                chunk_size = available
+            if byte_rate:
+                info["duration"] = chunk_size / float(byte_rate)
+            break
+
+        pos = body + chunk_size + (chunk_size & 1)
+
+    if info["codec"] is None:
+        info["issues"].append("missing fmt chunk")
+    elif info["duration"] is None:
+        info["issues"].append("missing data chunk")
+    return info
+
+
+def _probe_ogg(data, tail):
+    info = _empty_probe("ogg")
+    if len(data) < 28:
+        info["issues"].append("truncated Ogg page")
+        return info
+
+    segment_count = data[26]
+    packet = data[27 + segment_count:27 + segment_count + 64]
+    pre_skip = 0
+    if packet.startswith(b'OpusHead') and len(packet) >= 19:
+        info["codec"] = "opus"
+        info["channels"] = packet[9]
+        pre_skip = struct.unpack('<H', packet[10:12])[0]
+        info["sample_rate"] = struct.unpack('<I', packet[12:16])[0] or 48000
+        granule_rate = 48000  # Opus granule positions are always 48 kHz
+    elif packet.startswith(b'\x01vorbis') and len(packet) >= 16:
+        info["codec"] = "vorbis"
+        info["channels"] = packet[11]
+        info["sample_rate"] = struct.unpack('<I', packet[12:16])[0]
+        granule_rate = info["sample_rate"]
+    else:
+        info["issues"].append("unknown Ogg codec")
+        return info
+
+    # Duration comes from the granule position of the last page
+    last_page = tail.rfind(b'OggS')
+    if last_page >= 0 and last_page + 14 <= len(tail) and granule_rate:
+        granule = struct.unpack('<q', tail[last_page + 6:last_page + 14])[0]
+        if granule > 0:
+            info["duration"] = max(0, granule - pre_skip) / float(granule_rate)
+    if info["duration"] is None:
+        info["issues"].append("unknown duration")
+    return info
+
+
+def _read_ebml_size(data, pos):
+    """Read an EBML variable-length size, returning (value, length)"""
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or pos + length > len(data):
+        return None, length
+    value = first & (mask - 1)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    return value, length
+
+
+def _probe_webm(data):
+    info = _empty_probe("webm")
+    header = data[:4096]
+    if b'A_OPUS' in header:
+        info["codec"] = "opus"
+    elif b'A_VORBIS' in header:
+        info["codec"] = "vorbis"
+    else:
+        info["issues"].append("unknown WebM codec")
+
+    # SamplingFrequency (0xB5) is an EBML float
+    pos = header.find(b'\xb5')
+    while pos >= 0:
+        size, length = _read_ebml_size(header, pos + 1)
+        if size in (4, 8):
+            raw = header[pos + 1 + length:pos + 1 + length + size]
+            if len(raw) == size:
+                rate = struct.unpack('>f' if size == 4 else '>d', raw)[0]
+                if 4000 <= rate <= 192000:
+                    info["sample_rate"] = int(rate)
+                    break
+        pos = header.find(b'\xb5', pos + 1)
+
+    # Segment Info Duration (0x4489) in TimecodeScale units (default 1ms).
+    # Browser MediaRecorder output usually omits it.
+    pos = header.find(b'\x44\x89')
+    if pos >= 0:
+        size, length = _read_ebml_size(header, pos + 2)
+        raw = header[pos + 2 + length:pos + 2 + length + (size or 0)]
+        if size in (4, 8) and len(raw) == size:
+            info["duration"] = struct.unpack('>f' if size == 4 else '>d', raw)[0] / 1000.0
+    if info["duration"] is None:
+        info["issues"].append("unknown duration")
+    return info
+
+
+def _probe_mp3(data):
+    info = _empty_probe("mp3")
+    pos = 0
+    if data[:3] == b'ID3' and len(data) >= 10:
+        # ID3v2 size is a 28-bit "synchsafe" integer
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size
+
+    # Find the first frame sync
+    pos = data.find(b'\xff', pos)
+    while 0 <= pos and pos + 4 <= len(data) and data[pos + 1] & 0xE0 != 0xE0:
+        pos = data.find(b'\xff', pos + 1)
+    if pos < 0 or pos + 4 > len(data):
+        info["issues"].append("no MPEG frame found")
+        return info
+
+    header = struct.unpack('>I', data[pos:pos + 4])[0]
+    version_bits = (header >> 19) & 0x3
+    layer_bits = (header >> 17) & 0x3
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 0x3
+    version = {3: 1, 2: 2, 0: 2.5}.get(version_bits)
+    layer = {3: 1, 2: 2, 1: 3}.get(layer_bits)
+    if version is None or layer is None or rate_index == 3 or bitrate_index in (0, 15):
+        info["issues"].append("invalid MPEG frame header")
+        return info
+
+    info["codec"] = "mp%d" % layer
+    info["sample_rate"] = _MP3_SAMPLE_RATES[version][rate_index]
+    info["channels"] = 1 if (header >> 6) & 0x3 == 3 else 2
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+
+    # Prefer the exact frame count from a Xing/Info header (VBR files)
+    xing = data.find(b'Xing', pos, pos + 64)
+    if xing < 0:
+        xing = data.find(b'Info', pos, pos + 64)
+    samples_per_frame = 1152 if version == 1 or layer != 3 else 576
+    if xing >= 0 and xing + 12 <= len(data) and struct.unpack('>I', data[xing + 4:xing + 8])[0] & 0x1:
+        frames = struct.unpack('>I', data[xing + 8:xing + 12])[0]
+        info["duration"] = frames * samples_per_frame / float(info["sample_rate"])
+    elif bitrate:
+        info["duration"] = (len(data) - pos) * 8 / float(bitrate)
+    return info
+
+
+def _probe_flac(data):
+    info = _empty_probe("flac")
+    # STREAMINFO is always the first metadata block
+    if len(data) < 26:
+        info["issues"].append("truncated STREAMINFO")
+        return info
+    packed = int.from_bytes(data[18:26], 'big')
+    info["codec"] = "flac"
+    info["sample_rate"] = packed >> 44
+    info["channels"] = ((packed >> 41) & 0x7) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if info["sample_rate"] and total_samples:
+        info["duration"] = total_samples / float(info["sample_rate"])
+    else:
+        info["issues"].append("unknown duration")
+    return info
+
+
+def _probe_m4a(data):
+    info = _empty_probe("m4a")
+    info["codec"] = "aac"
+    pos = data.find(b'mvhd')
+    if pos >= 0 and pos + 24 <= len(data):
+        version = data[pos + 4]
+        if version == 1 and pos + 36 <= len(data):
+            timescale, duration = struct.unpack('>IQ', data[pos + 24:pos + 36])
+        else:
+            timescale, duration = struct.unpack('>II', data[pos + 16:pos + 24])
+        if timescale:
+            info["duration"] = duration / float(timescale)
+    if info["duration"] is None:
+        info["issues"].append("unknown duration")
+    return info
+
+
+def probe_audio(audio_data):
+    """
+    Identify an audio file's container, codec, sample rate and duration from its headers
+
+    Args:
+        audio_data (bytes): Audio file contents
+
+    Returns:
+        dict: container, codec, sample_rate, channels, duration (seconds or None),
+              issues (list of problems found) and needs_transcode (bool)
+    """
+    data = bytes(audio_data[:1 << 16])
+    container = sniff_container(data)
+
+    if container == "wav":
+        # WAV needs the full data length to validate the data chunk
+        info = _probe_wav(bytes(audio_data))
+    elif container == "ogg":
+        # Duration lives on the final page
+        info = _probe_ogg(data, bytes(audio_data[-(1 << 16):]))
+    elif container == "webm":
+        info = _probe_webm(data)
+    elif container == "flac":
+        info = _probe_flac(data)
+    elif container == "m4a":
+        info = _probe_m4a(bytes(audio_data))
+    elif container == "mp3":
+        info = _probe_mp3(bytes(audio_data))
+    else:
+        info = _empty_probe(None)
+        info["issues"].append("unrecognized audio format")
+
+    info["needs_transcode"] = _needs_transcode(info)
+    return info
+
+
+def _needs_transcode(info):
+    """Decide once, from the probe, whether the recording must be converted"""
+    if info["container"] not in UPLOADABLE_CONTAINERS or info["codec"] is None:
+        return True
+    if info["issues"]:
+        return True
+    if info["sample_rate"] and info["sample_rate"] > MAX_SAMPLE_RATE:
+        return True
+    if info["channels"] and info["channels"] > 2:
+        return True
+    return False
+
+
+def extension_for(info):
+    """File extension matching a probed container"""
+    return "." + (info["container"] or "bin")
+
+
+def _run_ffmpeg(audio_data, input_ext, output_ext, output_args):
+    """
+    Run ffmpeg on in-memory audio
+
+    Args:
+        audio_data (bytes): Audio file contents
+        input_ext (str): Extension hint for ffmpeg
+        output_ext (str): Output extension (selects the container)
+        output_args (list): Codec/format arguments for the output
+
+    Returns:
+        tuple: (success: bool, output_bytes: bytes, error: str)
+    """
+    import imageio_ffmpeg
+    ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
+
+    temp_dir = tempfile.mkdtemp(prefix="familyvault_audio_")
+    input_path = os.path.join(temp_dir, "input" + input_ext)
+    output_path = os.path.join(temp_dir, "output" + output_ext)
+    try:
+        with open(input_path, 'wb') as f:
+            f.write(audio_data)
+
+        result = subprocess.run(
+            [ffmpeg_path, '-y', '-i', input_path] + output_args + [output_path],
+            capture_output=True,
+            text=True,
+            timeout=60
+        )
+        if result.returncode != 0 or not os.path.exists(output_path):
+            return False, None, f"Audio conversion failed: {result.stderr[-200:]}"
+
+        with open(output_path, 'rb') as f:
+            return True, f.read(), None
+    finally:
+        for path in (input_path, output_path):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(temp_dir)
+
+
+def transcode_to_wav(audio_data, input_ext=".bin", sample_rate=TRANSCODE_SAMPLE_RATE, channels=TRANSCODE_CHANNELS):
+    """
+    Convert audio to 16-bit PCM WAV with ffmpeg
+
+    Args:
+        audio_data (bytes): Audio file contents
+        input_ext (str): Extension hint for ffmpeg
+        sample_rate (int): Output sample rate
+        channels (int): Output channel count
+
+    Returns:
+        tuple: (success: bool, wav_bytes: bytes, error: str)
+    """
+    return _run_ffmpeg(audio_data, input_ext, ".wav",
+                       ['-acodec', 'pcm_s16le', '-ar', str(sample_rate), '-ac', str(channels)])
+
+
+def compress_audio(audio_data, input_ext=".wav", bitrate=COMPRESSED_BITRATE):
+    """
+    Encode audio as Ogg/Opus with ffmpeg for a much smaller upload
+
+    Args:
+        audio_data (bytes): Audio file contents
+        input_ext (str): Extension hint for ffmpeg
+        bitrate (str): Target bitrate, e.g. "24k"
+
+    Returns:
+        tuple: (success: bool, ogg_bytes: bytes, error: str)
+    """
+    return _run_ffmpeg(audio_data, input_ext, ".ogg",
+                       ['-acodec', 'libopus', '-b:a', bitrate, '-application', 'voip'])
+
+
+def normalize_audio(audio_data):
+    """
+    Probe audio and transcode it only if its headers say the provider may reject it
+
+    Args:
+        audio_data (bytes): Audio file contents
+
+    Returns:
+        tuple: (success: bool, audio_bytes: bytes, info: dict, error: str)
+               info is the probe of the returned audio, with 'transcoded' set
+    """
+    info = probe_audio(audio_data)
+    if not info["needs_transcode"]:
+        info["transcoded"] = False
+        return True, audio_data, info, None
+
+    try:
+        success, wav_bytes, error = transcode_to_wav(audio_data, extension_for(info))
+    except Exception as e:
+        return False, None, info, f"Conversion failed: {str(e)}"
+    if not success:
+        return False, None, info, error
+
+    normalized_info = probe_audio(wav_bytes)
+    normalized_info["transcoded"] = True
+    normalized_info["original"] = info
+    return True, wav_bytes, normalized_info, None
+
+
+def test_audio_format():
+    """Test probing with generated WAV headers"""
+    import io
+    import wave
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(48000)
+        wav.writeframes(b'\x00\x00' * 2 * 48000 * 3)
+    good = buffer.getvalue()
+
+    info = probe_audio(good)
+    print(f"Valid WAV: {info['codec']} {info['sample_rate']} Hz x{info['channels']}, "
+          f"{info['duration']:.1f}s, transcode={info['needs_transcode']}")
+
+    # Streaming recorders sometimes leave the data size unset
+    broken = good[:40] + struct.pack('<I', 0xFFFFFFFF) + good[44:]
+    info = probe_audio(broken)
+    print(f"Broken WAV: issues={info['issues']}, transcode={info['needs_transcode']}")
+
+    info = probe_audio(b'not audio at all')
+    print(f"Unknown: issues={info['issues']}, transcode={info['needs_transcode']}")
+
+
+if __name__ == "__main__":
+    test_audio_format()
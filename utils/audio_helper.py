@@ -3,103 +3,553 @@ Audio Helper Functions
 Functions for recording and transcribing audio for Family Vault interviews
 """
 
+import io
 import os
-import tempfile
-from openai import OpenAI
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from asr_backends import get_asr_backend
+from audio_format import sniff_container, probe_audio, compress_audio, MIME_TYPES
+from audio_analysis import decode_wav_bytes, resample, encode_wav, split_on_silence, SEGMENT_TARGET_SECONDS
+from transcription_cache import audio_fingerprint, get_cached_transcript, store_transcript
+from language_detect import detect_language, MIN_LANGUAGE_CONFIDENCE
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Latency and copy counters for recent transcriptions (see get_transcription_stats)
+_transcription_stats = []
+MAX_STATS_ENTRIES = 100
 
+# Concurrent requests per chunked transcription (keeps us under rate limits)
+MAX_PARALLEL_SEGMENTS = 4
 
-def transcribe_audio(audio_bytes, filename="recording.wav", translate_to_english=False):
+# Longest run of repeated words trimmed where two force-cut segments overlap
+MAX_OVERLAP_WORDS = 12
+
+# Placeholder for a segment that failed to transcribe
+MISSING_SEGMENT_TEXT = "[...]"
+
+# Whisper works at 16 kHz mono internally - anything more is wasted upload
+ASR_SAMPLE_RATE = 16000
+
+# Set COMPRESS_AUDIO_UPLOADS=1 to also encode uploads as Opus (needs ffmpeg)
+COMPRESS_UPLOADS = os.getenv("COMPRESS_AUDIO_UPLOADS", "").lower() in ("1", "true", "yes")
+
+
+class AudioUpload(io.RawIOBase):
+    """Read-only file object over a memoryview, so uploads stream the recording without copying it"""
+
+    def __init__(self, view, name):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), len(self._view) - self._pos)
+        if count <= 0:
+            return 0
+        buffer[:count] = self._view[self._pos:self._pos + count]
+        self._pos += count
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        else:
+            self._pos = len(self._view) + offset
+        self._pos = max(0, min(self._pos, len(self._view)))
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+def audio_view(audio_bytes):
+    """
+    Get a zero-copy view of recorded audio
+
+    Args:
+        audio_bytes: Audio from st.audio_input (UploadedFile), bytes, bytearray or memoryview
+
+    Returns:
+        memoryview: View of the audio data (release() it when done)
+    """
+    if isinstance(audio_bytes, memoryview):
+        return audio_bytes
+    if isinstance(audio_bytes, (bytes, bytearray)):
+        return memoryview(audio_bytes)
+    if hasattr(audio_bytes, 'getbuffer'):
+        # UploadedFile/BytesIO expose their internal buffer directly
+        return audio_bytes.getbuffer()
+    if hasattr(audio_bytes, 'getvalue'):
+        return memoryview(audio_bytes.getvalue())
+    audio_bytes.seek(0)
+    return memoryview(audio_bytes.read())
+
+
+def fingerprint_audio(audio_bytes):
+    """
+    Content hash of a recording, computed without copying it
+
+    Args:
+        audio_bytes: Audio from st.audio_input (UploadedFile), bytes or memoryview
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    view = audio_view(audio_bytes)
+    try:
+        return audio_fingerprint(view)
+    finally:
+        if view is not audio_bytes:
+            view.release()
+
+
+def prepare_upload(audio_bytes, filename="recording.wav"):
+    """
+    Build the (filename, file, mime type) tuple for an upload without temp files
+
+    The filename extension and mime type come from the audio's magic bytes,
+    so webm/ogg recordings aren't mislabelled as WAV.
+
+    Args:
+        audio_bytes: Audio from st.audio_input (UploadedFile), bytes or memoryview
+        filename (str): Base filename for the upload
+
+    Returns:
+        tuple: ((filename, AudioUpload, mime_type), view: memoryview)
+    """
+    view = audio_view(audio_bytes)
+    container = sniff_container(view[:12]) or "wav"
+    stem = os.path.splitext(filename)[0] or "recording"
+    upload_name = f"{stem}.{container}"
+    return (upload_name, AudioUpload(view, upload_name), MIME_TYPES[container]), view
+
+
+def preprocess_for_asr(view, compress=None):
+    """
+    Mix down to mono and resample to 16 kHz before upload
+
+    Recordings that are already 16 kHz mono 16-bit, or that aren't PCM WAV,
+    are passed through untouched.
+
+    Args:
+        view (memoryview): Recorded audio
+        compress (bool): Also encode as Opus (defaults to COMPRESS_UPLOADS)
+
+    Returns:
+        tuple: (audio to upload: memoryview or bytes, bytes_saved: int)
+    """
+    if compress is None:
+        compress = COMPRESS_UPLOADS
+
+    info = probe_audio(view)
+    already_small = (info['sample_rate'] and info['sample_rate'] <= ASR_SAMPLE_RATE
+                     and info['channels'] == 1 and info['codec'] == 'pcm_s16le')
+    if info['container'] != 'wav' or (already_small and not compress):
+        return view, 0
+
+    upload_data = view
+    if not already_small:
+        samples, sample_rate = decode_wav_bytes(view)
+        if samples is None:
+            return view, 0
+        upload_data = encode_wav(resample(samples, sample_rate, ASR_SAMPLE_RATE), ASR_SAMPLE_RATE)
+
+    if compress:
+        try:
+            success, compressed, error = compress_audio(bytes(upload_data))
+            if success:
+                upload_data = compressed
+            else:
+                print(f"Upload compression skipped: {error}")
+        except Exception as e:
+            print(f"Upload compression unavailable: {e}")
+
+    return upload_data, max(0, len(view) - len(upload_data))
+
+
+def _record_stats(seconds, bytes_uploaded, bytes_copied, mode, bytes_saved=0):
+    _transcription_stats.append({
+        "seconds": seconds,
+        "bytes_uploaded": bytes_uploaded,
+        "bytes_copied": bytes_copied,
+        "bytes_saved": bytes_saved,
+        "mode": mode
+    })
+    del _transcription_stats[:-MAX_STATS_ENTRIES]
+
+
+def get_transcription_stats():
+    """
+    Get latency and copy counters for recent transcriptions
+
+    Returns:
+        list: Dicts with seconds, bytes_uploaded, bytes_copied, bytes_saved
+              (by downsampling/compression) and mode
+    """
+    return list(_transcription_stats)
+
+
+def _report_transcription_error(e, audio_bytes):
+    """Log a transcription failure with a hint about the likely cause"""
+    import traceback
+    error_msg = str(e)
+    print(f"Error transcribing audio: {error_msg}")
+    print(f"Full traceback: {traceback.format_exc()}")
+
+    # Provide user-friendly error messages
+    if "rate_limit" in error_msg.lower():
+        print("⚠️ Rate limit reached. Please wait a moment and try again.")
+    elif "api_key" in error_msg.lower() or "authentication" in error_msg.lower():
+        print("⚠️ API key issue. Please check your OpenAI API key in the .env file.")
+    elif "insufficient_quota" in error_msg.lower():
+        print("⚠️ OpenAI account has insufficient credits. Please add credits at platform.openai.com.")
+    elif "invalid" in error_msg.lower() and "audio" in error_msg.lower():
+        print("⚠️ Invalid audio format. Please try recording again.")
+    elif "getbuffer" in error_msg.lower() or "attribute" in error_msg.lower():
+        print(f"⚠️ Audio format error. Audio type: {type(audio_bytes)}")
+    elif isinstance(e, ImportError):
+        print("⚠️ The local transcription engine isn't installed (pip install faster-whisper).")
+    else:
+        print(f"⚠️ Unexpected error: {error_msg}")
+
+
+def _release(view, owner):
+    # Release buffer exports so the UploadedFile can be reused or resized
+    if view is not None and view is not owner:
+        view.release()
+
+
+def _set_spoken_language(result, translate_to_english):
+    """
+    Work out which language was spoken, and how sure that is
+
+    Transcripts are identified locally from their text, unless the text is
+    too short or mixed to tell and the engine reported a language from the
+    audio. Translations are already English, so only a non-English language
+    reported by the engine says anything about the speaker.
+
+    Sets result's "language" and "language_confidence" (0-1).
+    """
+    reported = result.get('language')
+    if translate_to_english:
+        language, confidence = (reported, 1.0) if reported and reported != "en" else (None, 0.0)
+    else:
+        language, confidence = detect_language(result['text'])
+        if reported and (language is None or confidence < MIN_LANGUAGE_CONFIDENCE):
+            language, confidence = reported, 1.0
+    result['language'] = language
+    result['language_confidence'] = confidence
+
+
+def transcribe_audio(audio_bytes, filename="recording.wav", translate_to_english=False, backend=None):
     """
-    Transcribe audio bytes using OpenAI Whisper API
+    Transcribe audio bytes using the configured ASR backend (OpenAI Whisper API by default)
 
     Args:
-        audio_bytes: Audio data from st.audio_input (UploadedFile object)
-        filename (str): Filename for the temporary audio file
+        audio_bytes: Audio data from st.audio_input (UploadedFile object), bytes or memoryview
+        filename (str): Filename sent with the upload (extension is corrected from the audio data)
         translate_to_english (bool): If True, translates non-English audio to English
+        backend (ASRBackend): Engine to use (defaults to the ASR_BACKEND setting)
 
     Returns:
         str: Transcribed/translated text, or None if transcription fails
     """
+    result = transcribe_audio_detailed(audio_bytes, filename, translate_to_english, backend)
+    return result['text'] if result else None
 
-    temp_file_path = None
+
+def transcribe_audio_detailed(audio_bytes, filename="recording.wav", translate_to_english=False, backend=None):
+    """
+    Transcribe audio, keeping segment timestamps
+
+    The recording is downsampled to 16 kHz mono and streamed straight from
+    memory - no temp file is written. Audio that has been transcribed before
+    (by any session) comes from the cache.
+
+    Args:
+        audio_bytes: Audio data from st.audio_input (UploadedFile object), bytes or memoryview
+        filename (str): Filename sent with the upload (extension is corrected from the audio data)
+        translate_to_english (bool): If True, translates non-English audio to English
+        backend (ASRBackend): Engine to use (defaults to the ASR_BACKEND setting)
+
+    Returns:
+        dict: {"text": str, "segments": [{"start", "end", "text"}], "language": str,
+              "language_confidence": float} with times in seconds from the start of the
+              recording and the spoken language (None if unknown), or None if transcription fails
+    """
+
+    view = None
+    upload_view = None
+    started = time.perf_counter()
+    mode = "translate" if translate_to_english else "transcribe"
 
     try:
-        # Create a temporary file to store the audio
-        # OpenAI API requires a file object, not just bytes
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.wav', delete=False) as temp_audio:
-            temp_file_path = temp_audio.name
-            # Write the audio bytes to the temp file
-            # st.audio_input returns UploadedFile, try different methods to get bytes
-            try:
-                # Try getbuffer() first (recommended for UploadedFile)
-                audio_data = audio_bytes.getbuffer()
-            except AttributeError:
-                # Fallback: try read() method
-                try:
-                    audio_bytes.seek(0)  # Reset to beginning
-                    audio_data = audio_bytes.read()
-                except:
-                    # Last resort: try getvalue()
-                    audio_data = audio_bytes.getvalue()
-
-            temp_audio.write(audio_data)
-
-        # Open the temp file and send to OpenAI Whisper API
-        with open(temp_file_path, 'rb') as audio_file:
-            if translate_to_english:
-                # Use translations endpoint - automatically detects language and translates to English
-                transcript = client.audio.translations.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"
-                )
-            else:
-                # Use transcriptions endpoint - transcribes in original language
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"
-                )
+        backend = backend or get_asr_backend()
+        view = audio_view(audio_bytes)
 
-        # Return the transcribed text
-        return transcript.strip() if transcript else None
+        fingerprint = audio_fingerprint(view)
+        cached = get_cached_transcript(fingerprint, mode, backend.cache_id)
+        if cached:
+            _record_stats(time.perf_counter() - started, 0, 0, f"{mode} (cached)")
+            return cached
 
-    except Exception as e:
-        import traceback
-        error_msg = str(e)
-        print(f"Error transcribing audio: {error_msg}")
-        print(f"Full traceback: {traceback.format_exc()}")
-
-        # Provide user-friendly error messages
-        if "rate_limit" in error_msg.lower():
-            print("⚠️ Rate limit reached. Please wait a moment and try again.")
-        elif "api_key" in error_msg.lower() or "authentication" in error_msg.lower():
-            print("⚠️ API key issue. Please check your OpenAI API key in the .env file.")
-        elif "insufficient_quota" in error_msg.lower():
-            print("⚠️ OpenAI account has insufficient credits. Please add credits at platform.openai.com.")
-        elif "invalid" in error_msg.lower() and "audio" in error_msg.lower():
-            print("⚠️ Invalid audio format. Please try recording again.")
-        elif "getbuffer" in error_msg.lower() or "attribute" in error_msg.lower():
-            print(f"⚠️ Audio format error. Audio type: {type(audio_bytes)}")
-        else:
-            print(f"⚠️ Unexpected error: {error_msg}")
+        upload_data, bytes_saved = preprocess_for_asr(view)
+        upload, upload_view = prepare_upload(upload_data, filename)
+
+        result = backend.transcribe(upload, translate_to_english)
+
+        # Downsampling makes one smaller copy; pass-through uploads copy nothing
+        _record_stats(time.perf_counter() - started, len(upload_view),
+                      len(upload_view) if bytes_saved else 0, f"{mode} ({backend.name})", bytes_saved)
 
+        if not result['text']:
+            return None
+        _set_spoken_language(result, translate_to_english)
+        store_transcript(fingerprint, mode, backend.cache_id, result)
+        return result
+
+    except Exception as e:
+        _report_transcription_error(e, audio_bytes)
         return None
 
     finally:
-        # Clean up: delete the temporary file
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-            except Exception as cleanup_error:
-                print(f"Warning: Could not delete temp file: {cleanup_error}")
+        if upload_view is not view:
+            _release(upload_view, audio_bytes)
+        _release(view, audio_bytes)
+
+
+def transcribe_audio_stream(audio_bytes, filename="recording.wav", translate_to_english=False, backend=None):
+    """
+    Transcribe audio, yielding timestamped segments as the backend produces them
+
+    Backends without native streaming (the OpenAI API) yield everything once
+    the whole recording is done. Cached transcripts are replayed immediately.
+
+    Args:
+        audio_bytes: Audio data from st.audio_input (UploadedFile object), bytes or memoryview
+        filename (str): Filename sent with the upload
+        translate_to_english (bool): If True, translates non-English audio to English
+        backend (ASRBackend): Engine to use (defaults to the ASR_BACKEND setting)
+
+    Yields:
+        dict: {"start", "end", "text"} segments; stops early (after logging) on failure
+    """
+    view = None
+    upload_view = None
+    started = time.perf_counter()
+    mode = "translate" if translate_to_english else "transcribe"
+
+    try:
+        backend = backend or get_asr_backend()
+        view = audio_view(audio_bytes)
+
+        fingerprint = audio_fingerprint(view)
+        cached = get_cached_transcript(fingerprint, mode, backend.cache_id)
+        if cached:
+            _record_stats(time.perf_counter() - started, 0, 0, f"{mode} (cached)")
+            for segment in cached['segments']:
+                yield segment
+            return
+
+        upload_data, bytes_saved = preprocess_for_asr(view)
+        upload, upload_view = prepare_upload(upload_data, filename)
+
+        segments = []
+        for segment in backend.transcribe_stream(upload, translate_to_english):
+            segments.append(segment)
+            yield segment
+
+        _record_stats(time.perf_counter() - started, len(upload_view),
+                      len(upload_view) if bytes_saved else 0, f"{mode} ({backend.name}, streamed)", bytes_saved)
+        if segments:
+            result = {"text": " ".join(segment['text'] for segment in segments), "segments": segments}
+            _set_spoken_language(result, translate_to_english)
+            store_transcript(fingerprint, mode, backend.cache_id, result)
+
+    except Exception as e:
+        _report_transcription_error(e, audio_bytes)
+
+    finally:
+        if upload_view is not view:
+            _release(upload_view, audio_bytes)
+        _release(view, audio_bytes)
+
+
+def _normalize_word(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch_segments(texts, overlaps):
+    """
+    Join segment transcripts in order, dropping words repeated across overlapping cuts
+
+    Args:
+        texts (list): Transcript of each segment, in order
+        overlaps (list): True where a segment overlaps the one before it
+
+    Returns:
+        str: Combined transcript
+    """
+    words = []
+    for text, overlaps_previous in zip(texts, overlaps):
+        segment_words = text.split()
+        if overlaps_previous and words:
+            tail = [_normalize_word(w) for w in words[-MAX_OVERLAP_WORDS:]]
+            head = [_normalize_word(w) for w in segment_words[:MAX_OVERLAP_WORDS]]
+            # Longest suffix of what we have that the new segment starts with
+            for size in range(min(len(tail), len(head)), 0, -1):
+                if tail[-size:] == head[:size]:
+                    segment_words = segment_words[size:]
+                    break
+        words.extend(segment_words)
+    return " ".join(words)
+
+
+def transcribe_audio_chunked(audio_bytes, translate_to_english=False, target_seconds=SEGMENT_TARGET_SECONDS,
+                             on_progress=None, detailed=False, backend=None):
+    """
+    Transcribe a long recording, reporting the transcript as it comes back
+
+    Backends that benefit from concurrency (the OpenAI API) get the recording
+    split at pauses and the parts transcribed in parallel. Other backends
+    (local CPU) stream the whole recording instead. Short or non-WAV
+    recordings go through transcribe_audio_detailed unchanged.
+
+    Args:
+        audio_bytes: Audio data from st.audio_input (UploadedFile object), bytes or memoryview
+        translate_to_english (bool): If True, translates non-English audio to English
+        target_seconds (float): Maximum segment length
+        on_progress (callable): Called as on_progress(done, total, partial_text) whenever the
+            transcript so far grows; done/total count finished parts (or seconds of audio when
+            streaming), and partial_text only includes segments in order from the start
+        detailed (bool): Return text and segment timestamps like transcribe_audio_detailed
+        backend (ASRBackend): Engine to use (defaults to the ASR_BACKEND setting)
+
+    Returns:
+        str: Transcribed/translated text (dict if detailed), or None if every segment fails
+    """
+    mode = "translate" if translate_to_english else "transcribe"
+    segments = None
+    duration = None
+
+    view = None
+    try:
+        backend = backend or get_asr_backend()
+        view = audio_view(audio_bytes)
+        original_bytes = len(view)
+        fingerprint = audio_fingerprint(view)
+        cached = get_cached_transcript(fingerprint, mode, backend.cache_id)
+        if not cached and backend.parallel:
+            segments = split_on_silence(view, target_seconds, output_rate=ASR_SAMPLE_RATE)
+        elif not cached:
+            duration = probe_audio(view).get('duration')
+    except Exception as e:
+        # An unknown ASR_BACKEND or audio that can't be decoded - callers expect None, not an exception
+        _report_transcription_error(e, audio_bytes)
+        return None
+    finally:
+        _release(view, audio_bytes)
+
+    split = segments is not None and len(segments) > 1
+    if cached:
+        _record_stats(0.0, 0, 0, f"{mode} (cached)")
+        result = cached
+    elif split:
+        result = _transcribe_segments(segments, translate_to_english, on_progress,
+                                      fingerprint, mode, original_bytes, backend)
+    elif duration and on_progress:
+        result = _transcribe_streaming(audio_bytes, translate_to_english, on_progress, duration, backend)
+    else:
+        result = transcribe_audio_detailed(audio_bytes, translate_to_english=translate_to_english, backend=backend)
+
+    # Split transcriptions report progress as each part finishes
+    if result and on_progress and not split:
+        on_progress(1, 1, result['text'])
+    if result is None or detailed:
+        return result
+    return result['text']
+
+
+def _transcribe_streaming(audio_bytes, translate_to_english, on_progress, duration, backend):
+    """Stream a recording through the backend, reporting progress in seconds of audio covered"""
+    segments = []
+    for segment in transcribe_audio_stream(audio_bytes, translate_to_english=translate_to_english, backend=backend):
+        segments.append(segment)
+        on_progress(int(min(segment['end'], duration)), max(1, int(duration)),
+                    " ".join(s['text'] for s in segments))
+    if not segments:
+        return None
+    result = {"text": " ".join(segment['text'] for segment in segments), "segments": segments}
+    _set_spoken_language(result, translate_to_english)
+    return result
+
+
+def _transcribe_segments(segments, translate_to_english, on_progress, fingerprint, mode, original_bytes, backend):
+    """Transcribe split segments in parallel and stitch them back together in order"""
+    started = time.perf_counter()
+    total = len(segments)
+    overlaps = [segment['overlaps_previous'] for segment in segments]
+    texts = [None] * total
+    timings = [[] for _ in range(total)]
+    languages = []
+    ready = 0
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_SEGMENTS, total)) as executor:
+        futures = {
+            executor.submit(transcribe_audio_detailed, segment['audio_data'], f"segment_{index}.wav",
+                            translate_to_english, backend): index
+            for index, segment in enumerate(segments)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            segment_result = future.result()
+            texts[index] = segment_result['text'] if segment_result else MISSING_SEGMENT_TEXT
+            if segment_result:
+                languages.append(segment_result.get('language'))
+                # Shift segment timestamps onto the full recording's timeline
+                offset = segments[index]['start']
+                timings[index] = [dict(s, start=round(s['start'] + offset, 2), end=round(s['end'] + offset, 2))
+                                  for s in segment_result['segments']]
+            done += 1
+
+            # Only report text once every earlier segment is in, so it reads in order
+            previous_ready = ready
+            while ready < total and texts[ready] is not None:
+                ready += 1
+            if on_progress and ready > previous_ready:
+                on_progress(done, total, stitch_segments(texts[:ready], overlaps[:ready]))
+
+    uploaded = sum(len(segment['audio_data']) for segment in segments)
+    _record_stats(time.perf_counter() - started, uploaded, uploaded, f"chunked x{total}",
+                  max(0, original_bytes - uploaded))
+
+    if all(text == MISSING_SEGMENT_TEXT for text in texts):
+        return None
+
+    result = {
+        "text": stitch_segments(texts, overlaps),
+        "segments": [timing for segment_timings in timings for timing in segment_timings],
+        "language": max(set(languages) - {None}, key=languages.count, default=None)
+    }
+    _set_spoken_language(result, translate_to_english)
+    # Don't pin a transcript with holes in it - a retry may fill them
+    if MISSING_SEGMENT_TEXT not in texts:
+        store_transcript(fingerprint, mode, backend.cache_id, result)
+    return result
 
 
 def test_transcription():
@@ -0,0 +1,555 @@
+"""
+Background Tasks
+Job handlers for slow Family Vault work (extraction, PDF export, family books, voice cloning)
+"""
+
+import os
+import json
+import hashlib
+import threading
+import time
+from datetime import datetime
+from job_queue import JobQueue, STATUS_SUCCEEDED, FINISHED_STATUSES
+from json_store import write_json_atomic, file_lock
+
+# Job types
+EXTRACT_JOB = "extract_interview"
+TURN_EXTRACT_JOB = "extract_turn"
+PDF_JOB = "export_pdf"
+BOOK_JOB = "export_family_book"
+VOICE_CLONE_JOB = "clone_voice"
+
+# Where voice samples waiting to be cloned are kept (so jobs survive restarts)
+VOICE_SAMPLES_DIR = 'data/jobs/voice_samples'
+
+# How long a final extraction waits for per-answer extractions still in progress
+TURN_WAIT_SECONDS = 60
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_task_queue(start_workers=True):
+    """
+    Get the shared job queue, starting its workers on first use
+
+    Args:
+        start_workers (bool): False to only read job records (e.g. from a CLI script)
+
+    Returns:
+        JobQueue: Queue with all Family Vault handlers registered
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            queue = JobQueue()
+            queue.register(EXTRACT_JOB, run_extraction_job)
+            queue.register(TURN_EXTRACT_JOB, run_turn_extraction_job)
+            queue.register(PDF_JOB, run_pdf_job)
+            queue.register(BOOK_JOB, run_family_book_job)
+            queue.register(VOICE_CLONE_JOB, run_voice_clone_job)
+            _queue = queue
+        if start_workers:
+            _queue.start()
+    return _queue
+
+
+def get_job(job_id):
+    """
+    Get the status of a background job
+
+    Args:
+        job_id (str): Job ID
+
+    Returns:
+        dict: Job record with status, progress, message, result and error
+    """
+    return get_task_queue().get_job(job_id)
+
+
+def get_latest_job(job_type, filepath):
+    """
+    Get the most recent job of a type for a profile file
+
+    Args:
+        job_type (str): Job type
+        filepath (str): Profile path the job was enqueued for
+
+    Returns:
+        dict: Job record, or None
+    """
+    return get_task_queue().get_latest_job(job_type, str(filepath))
+
+
+def answers_fingerprint(answers):
+    """
+    Hash interview answers so jobs can tell if a profile changed under them
+
+    Args:
+        answers (list): Interview Q&A with followups
+
+    Returns:
+        str: Hex digest
+    """
+    encoded = json.dumps(answers, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _load_profile(filepath):
+    # Older profiles come back in the current schema version
+    from profile_model import read_profile
+    return read_profile(filepath)
+
+
+def _profile_answers(profile):
+    return profile.get('interview_data', {}).get('questions_and_answers', [])
+
+
+# ============================================
+# EXTRACTION
+# ============================================
+
+def enqueue_extraction(filepath):
+    """
+    Queue AI extraction for a saved profile
+
+    Args:
+        filepath (str): Path to the saved profile JSON
+
+    Returns:
+        str: Job ID
+    """
+    profile = _load_profile(filepath)
+    answers_hash = answers_fingerprint(_profile_answers(profile))
+    queue = get_task_queue()
+    job_id = queue.enqueue(
+        EXTRACT_JOB,
+        {"filepath": str(filepath), "answers_hash": answers_hash},
+        idempotency_key=f"extract:{filepath}:{answers_hash}",
+        subject=str(filepath)
+    )
+
+    # Skipped earlier because the answers had changed since - they're back (save A, B, then A again)
+    job = queue.get_job(job_id)
+    if job['status'] == STATUS_SUCCEEDED and (job['result'] or {}).get('skipped'):
+        queue.requeue(job_id)
+
+    return job_id
+
+
+def run_extraction_job(payload, report_progress):
+    """
+    Extract structured data for a profile and write it back to the file
+
+    Answers already extracted in the background during the interview are
+    merged; only the rest are sent to the model. The payload's "turn_wait"
+    (seconds, TURN_WAIT_SECONDS by default) is how long to wait for those
+    still in progress - 0 when no queue workers are running to finish them.
+    With "force" every answer is sent to the model again, ignoring earlier
+    and cached results.
+    """
+    from extraction import extract_structured_data, extract_turn_data, merge_extracted_data
+    from extraction_cache import (store_interview_extraction, transcript_hashes,
+                                  EXTRACTION_PROMPT_VERSION, EXTRACTION_MODEL)
+    from entity_resolution import update_people_index, annotate_person_ids
+    from family_graph import update_family_graph
+
+    filepath = payload['filepath']
+    profile = _load_profile(filepath)
+    answers = _profile_answers(profile)
+    parent_name = profile.get('parent_name', 'Unknown')
+
+    # A newer save has changed the answers - its own job will handle it
+    if answers_fingerprint(answers) != payload['answers_hash']:
+        return {"skipped": True, "reason": "Profile changed since job was queued"}
+
+    report_progress(0.1, "Collecting answers extracted during the interview...")
+    interview_id = profile.get('metadata', {}).get('interview_id')
+    force = payload.get('force', False)
+    if force:
+        records = [None] * len(answers)
+    else:
+        records = collect_turn_extractions(interview_id, answers, parent_name,
+                                          wait=payload.get('turn_wait', TURN_WAIT_SECONDS))
+    missing = [index for index, record in enumerate(records) if record is None]
+
+    if missing and len(missing) == len(answers):
+        # Nothing was extracted during the interview (e.g. an older profile) - one call for everything
+        report_progress(0.2, "Extracting names, dates and places...")
+        result = extract_structured_data(answers, parent_name, use_cache=not force)
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        extracted = result['data']
+    else:
+        for done, index in enumerate(missing):
+            report_progress(0.2 + 0.7 * done / len(missing), f"Extracting answer {index + 1}...")
+            result = extract_turn_data(answers[index], parent_name, index + 1, use_cache=not force)
+            if not result['success']:
+                raise RuntimeError(result['error'])
+            records[index] = result['data']
+        extracted = merge_extracted_data(records)
+        store_interview_extraction(answers, parent_name, extracted)
+
+    report_progress(0.9, "Saving extracted data...")
+    # Locked from re-read to write, so a voice clone or save finishing meanwhile isn't overwritten
+    with file_lock(filepath):
+        profile = _load_profile(filepath)
+        if answers_fingerprint(_profile_answers(profile)) != payload['answers_hash']:
+            return {"skipped": True, "reason": "Profile changed during extraction"}
+
+        profile['extracted_data'] = extracted
+        try:
+            # Link the people mentioned to the same people in other family members' interviews
+            annotate_person_ids(extracted, update_people_index(filepath, profile))
+            # and add this interview's family relationships to the family graph
+            update_family_graph(filepath)
+        except Exception as e:
+            print(f"People index not updated: {e}")
+        profile.setdefault('metadata', {})['extraction_status'] = "complete"
+        profile['metadata']['extracted_at'] = datetime.now().isoformat()
+        # Which transcript and prompt produced this data
+        profile['metadata']['extraction_hash'] = transcript_hashes(answers, parent_name)[-1]
+        profile['metadata']['extraction_prompt_version'] = EXTRACTION_PROMPT_VERSION
+        profile['metadata']['extraction_model'] = EXTRACTION_MODEL
+        # Atomic, so readers never see a half-written profile
+        write_json_atomic(filepath, profile, indent=2)
+
+    try:
+        # Render now so the View and Q&A pages only serve the result
+        from render_cache import get_profile_render
+        get_profile_render(filepath)
+    except Exception as e:
+        print(f"Could not pre-render profile: {e}")
+
+    try:
+        # Fold the new places in now rather than on the next location question
+        from gazetteer import get_place_index
+        get_place_index()
+    except Exception as e:
+        print(f"Place index not updated: {e}")
+
+    return {"filepath": filepath, "extracted_answers": len(missing), "merged_answers": len(answers) - len(missing)}
+
+
+def extraction_is_current(profile):
+    """
+    Check whether a profile's extracted data came from its current answers and extraction prompt
+
+    Args:
+        profile (dict): Saved interview data
+
+    Returns:
+        bool: True if re-extracting would produce the same result
+    """
+    from extraction_cache import transcript_hashes, EXTRACTION_PROMPT_VERSION, EXTRACTION_MODEL
+
+    metadata = profile.get('metadata', {})
+    if not profile.get('extracted_data') or metadata.get('extraction_status') != "complete":
+        return False
+    current_hash = transcript_hashes(_profile_answers(profile), profile.get('parent_name', 'Unknown'))[-1]
+    return (metadata.get('extraction_hash') == current_hash
+            and metadata.get('extraction_prompt_version') == EXTRACTION_PROMPT_VERSION
+            and metadata.get('extraction_model') == EXTRACTION_MODEL)
+
+
+# ============================================
+# PER-ANSWER EXTRACTION
+# ============================================
+
+def _turn_subject(interview_id, turn_index):
+    return f"{interview_id}:q{turn_index}"
+
+
+def _turn_fingerprint(item, parent_name):
+    return answers_fingerprint([parent_name, item])
+
+
+def enqueue_turn_extraction(interview_id, turn_index, item, parent_name):
+    """
+    Queue extraction of one answer (and its follow-ups) while the interview continues
+
+    Args:
+        interview_id (str): ID of the interview in progress
+        turn_index (int): Position of the answer in the interview
+        item (dict): The Q&A with followups
+        parent_name (str): Name of the person being interviewed
+
+    Returns:
+        str: Job ID
+    """
+    turn_hash = _turn_fingerprint(item, parent_name)
+    return get_task_queue().enqueue(
+        TURN_EXTRACT_JOB,
+        {"turn_index": turn_index, "item": item, "parent_name": parent_name, "turn_hash": turn_hash},
+        idempotency_key=f"extract_turn:{interview_id}:{turn_index}:{turn_hash}",
+        subject=_turn_subject(interview_id, turn_index)
+    )
+
+
+def run_turn_extraction_job(payload, report_progress):
+    """Extract structured data from a single answer"""
+    from extraction import extract_turn_data
+    from extraction_cache import EXTRACTION_PROMPT_VERSION, EXTRACTION_MODEL
+
+    report_progress(0.1, "Extracting names, dates and places...")
+    result = extract_turn_data(payload['item'], payload['parent_name'], payload['turn_index'] + 1)
+    if not result['success']:
+        raise RuntimeError(result['error'])
+
+    return {"turn_hash": payload['turn_hash'], "data": result['data'],
+            "prompt_version": f"{EXTRACTION_PROMPT_VERSION}:{EXTRACTION_MODEL}"}
+
+
+def collect_turn_extractions(interview_id, answers, parent_name, wait=0):
+    """
+    Get the per-answer extraction results for an interview
+
+    Args:
+        interview_id (str): ID of the interview
+        answers (list): Interview Q&A with followups
+        parent_name (str): Name of the person being interviewed
+        wait (float): Total seconds to wait for extractions still running
+
+    Returns:
+        list: Extracted data for each answer, or None where it isn't available
+    """
+    from extraction_cache import EXTRACTION_PROMPT_VERSION, EXTRACTION_MODEL
+
+    if not interview_id:
+        return [None] * len(answers)
+
+    prompt_version = f"{EXTRACTION_PROMPT_VERSION}:{EXTRACTION_MODEL}"
+    # Only reading results - don't start workers in processes that never run jobs
+    queue = get_task_queue(start_workers=False)
+    deadline = time.time() + wait
+    records = []
+    for index, item in enumerate(answers):
+        job = queue.get_latest_job(TURN_EXTRACT_JOB, _turn_subject(interview_id, index))
+        turn_hash = _turn_fingerprint(item, parent_name)
+        if job is None or job['payload'].get('turn_hash') != turn_hash:
+            # Never extracted, or the answer was edited afterwards
+            records.append(None)
+            continue
+        remaining = deadline - time.time()
+        if job['status'] not in FINISHED_STATUSES and remaining > 0:
+            job = queue.wait(job['id'], timeout=remaining)
+        if job and job['status'] == STATUS_SUCCEEDED and job['result'] and \
+                job['result'].get('prompt_version') == prompt_version:
+            records.append(job['result']['data'])
+        else:
+            records.append(None)
+    return records
+
+
+# ============================================
+# PDF EXPORT
+# ============================================
+
+def enqueue_pdf_export(filepath):
+    """
+    Queue PDF generation for a saved profile
+
+    Generated PDFs go into the PDF cache under the profile content hash and
+    template version, so each version of a profile is laid out once and
+    two users exporting profiles with the same parent name never share one.
+
+    Args:
+        filepath (str): Path to the saved profile JSON
+
+    Returns:
+        str: Job ID
+    """
+    from pdf_cache import pdf_cache_key, is_pdf_cached
+
+    cache_key = pdf_cache_key(filepath)
+    if cache_key is None:
+        raise FileNotFoundError(filepath)
+
+    queue = get_task_queue()
+    job_id = queue.enqueue(
+        PDF_JOB,
+        {"filepath": str(filepath), "cache_key": cache_key},
+        idempotency_key=f"pdf:{cache_key}",
+        subject=str(filepath)
+    )
+
+    # The cache evicts old PDFs - regenerate if this one is gone
+    job = queue.get_job(job_id)
+    if job['status'] == STATUS_SUCCEEDED and not is_pdf_cached(cache_key):
+        queue.requeue(job_id)
+
+    return job_id
+
+
+def find_pdf_export(filepath):
+    """
+    Get the PDF job for a profile's current content, without queuing one
+
+    Args:
+        filepath (str): Path to the saved profile JSON
+
+    Returns:
+        dict: Job record, or None if this content was never queued
+    """
+    from pdf_cache import pdf_cache_key
+
+    cache_key = pdf_cache_key(filepath)
+    return get_task_queue().find_job(f"pdf:{cache_key}") if cache_key else None
+
+
+def run_pdf_job(payload, report_progress):
+    """Render a profile to PDF and cache it"""
+    from pdf_export import render_pdf_bytes
+    from pdf_cache import content_cache_key, store_pdf
+
+    report_progress(0.2, "Laying out PDF...")
+    with open(payload['filepath'], 'rb') as f:
+        content = f.read()
+    # Cache under the content actually rendered, in case the file changed since it was queued
+    cache_key = content_cache_key(content)
+
+    # Rendered straight into memory - no temp file to name, race on or clean up
+    pdf_bytes = render_pdf_bytes(json.loads(content.decode('utf-8')))
+    if pdf_bytes is None:
+        raise RuntimeError("PDF generation failed")
+
+    report_progress(0.9, "Saving PDF...")
+    # Succeeding without a cached PDF would leave the download waiting on a job that's requeued forever
+    if not store_pdf(cache_key, pdf_bytes):
+        raise RuntimeError("Could not save the PDF to the cache")
+    return {"cache_key": cache_key, "size": len(pdf_bytes)}
+
+
+def enqueue_family_book(filepaths):
+    """
+    Queue a family book of several saved profiles
+
+    Args:
+        filepaths (list): Profile paths, in book order
+
+    Returns:
+        str: Job ID
+    """
+    from family_book import book_cache_key
+    from pdf_cache import is_pdf_cached
+
+    cache_key = book_cache_key(filepaths)
+    if cache_key is None:
+        raise FileNotFoundError("A profile in the family book can't be read")
+
+    queue = get_task_queue()
+    job_id = queue.enqueue(
+        BOOK_JOB,
+        {"filepaths": [str(filepath) for filepath in filepaths]},
+        idempotency_key=f"book:{cache_key}",
+        subject="family_book"
+    )
+
+    # The cache evicts old books - rebuild if this one is gone
+    job = queue.get_job(job_id)
+    if job['status'] == STATUS_SUCCEEDED and not is_pdf_cached(cache_key):
+        queue.requeue(job_id)
+
+    return job_id
+
+
+def find_family_book(filepaths):
+    """
+    Get the family book job for these profiles as they are now, without queuing one
+
+    Args:
+        filepaths (list): Profile paths, in book order
+
+    Returns:
+        dict: Job record, or None if this selection was never queued
+    """
+    from family_book import book_cache_key
+
+    cache_key = book_cache_key(filepaths)
+    return get_task_queue().find_job(f"book:{cache_key}") if cache_key else None
+
+
+def run_family_book_job(payload, report_progress):
+    """Build a family book and cache it"""
+    from family_book import export_family_book, book_cache_key
+    from pdf_cache import is_pdf_cached
+
+    book = export_family_book(payload['filepaths'], report_progress=report_progress)
+    if not is_pdf_cached(book_cache_key(payload['filepaths'])):
+        raise RuntimeError("Could not save the family book to the cache")
+    return {"size": len(book)}
+
+
+# ============================================
+# VOICE CLONING
+# ============================================
+
+def enqueue_voice_clone(audio_samples, person_name, profile_path=None):
+    """
+    Queue voice cloning from interview audio samples
+
+    Args:
+        audio_samples: List of dicts with 'audio_data' (bytes)
+        person_name (str): Name of the person
+        profile_path (str): Optional profile to store the voice ID in
+
+    Returns:
+        str: Job ID
+    """
+    digests = [hashlib.sha256(sample['audio_data']).hexdigest() for sample in audio_samples]
+    combined = hashlib.sha256("".join(digests).encode('ascii'))
+    idempotency_key = f"clone:{person_name}:{combined.hexdigest()}"
+    sample_paths = [os.path.join(VOICE_SAMPLES_DIR, f"{digest}.bin") for digest in digests]
+
+    queue = get_task_queue()
+    existing = queue.find_job(idempotency_key)
+    # Only a new or failed job still needs its samples - a queued one has them, a finished one deleted them
+    if existing is None or existing['status'] == "failed":
+        os.makedirs(VOICE_SAMPLES_DIR, exist_ok=True)
+        for sample, sample_path in zip(audio_samples, sample_paths):
+            if not os.path.exists(sample_path):
+                with open(sample_path, 'wb') as f:
+                    f.write(sample['audio_data'])
+
+    return queue.enqueue(
+        VOICE_CLONE_JOB,
+        {"sample_paths": sample_paths, "person_name": person_name,
+         "profile_path": str(profile_path) if profile_path else None},
+        idempotency_key=idempotency_key,
+        subject=str(profile_path) if profile_path else person_name,
+        # A retry after a timeout could create a duplicate voice on ElevenLabs
+        max_retries=0
+    )
+
+
+def run_voice_clone_job(payload, report_progress):
+    """Clone a voice from saved samples and store the voice ID on the profile"""
+    from voice_helper import auto_clone_voice_from_samples, update_profile_voice_id
+
+    # Created by an earlier run whose profile update failed - reuse it rather than create a second voice
+    voice_id = (payload.get('previous_result') or {}).get('voice_id')
+    if not voice_id:
+        report_progress(0.1, "Analyzing voice samples...")
+        audio_samples = []
+        for sample_path in payload['sample_paths']:
+            with open(sample_path, 'rb') as f:
+                audio_samples.append({'audio_data': f.read()})
+
+        report_progress(0.3, "Creating voice clone...")
+        success, voice_id, error = auto_clone_voice_from_samples(audio_samples, payload['person_name'])
+        if not success:
+            raise RuntimeError(error)
+        report_progress(0.8, "Saving voice...", result={"voice_id": voice_id})
+
+    if payload.get('profile_path'):
+        updated, error = update_profile_voice_id(payload['profile_path'], voice_id)
+        if not updated:
+            raise RuntimeError(error)
+
+    for sample_path in payload['sample_paths']:
+        try:
+            os.remove(sample_path)
+        except OSError:
+            pass
+
+    return {"voice_id": voice_id}
@@ -0,0 +1,209 @@
+"""
+Disk Cache Module
+SQLite-backed key/value cache with LRU eviction, shared by all sessions and workers
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+# Where caches live by default
+CACHE_DIR = 'data/cache'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    is_json INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class DiskCache:
+    """Persistent cache of JSON values or raw bytes, evicting least recently used entries"""
+
+    def __init__(self, db_path, max_entries=None, max_bytes=None):
+        """
+        Args:
+            db_path (str): SQLite file for this cache
+            max_entries (int): Evict once there are more entries than this (None = no limit)
+            max_bytes (int): Evict once stored values exceed this many bytes (None = no limit)
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One transaction (committed, or rolled back on error) on a connection that is always closed
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            with conn:
+                yield conn
+
+    def _count(self, conn, name):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,)
+        )
+
+    def get(self, key):
+        """
+        Look up a cached value
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            The stored value (bytes or JSON-decoded), or None on a miss
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, is_json FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count(conn, "misses")
+                return None
+            conn.execute(
+                "UPDATE entries SET accessed_at = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key)
+            )
+            self._count(conn, "hits")
+
+        value, is_json = row
+        return json.loads(value) if is_json else bytes(value)
+
+    def contains(self, key):
+        """
+        Check whether a key is cached, without counting a hit or loading the value
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            bool: True if the key is stored
+        """
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+
+    def set(self, key, value):
+        """
+        Store a value, evicting old entries if the cache is over its limits
+
+        Args:
+            key (str): Cache key
+            value: bytes, or any JSON-serializable value
+        """
+        is_json = not isinstance(value, (bytes, bytearray, memoryview))
+        stored = json.dumps(value, ensure_ascii=False).encode('utf-8') if is_json else bytes(value)
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, is_json, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(stored), int(is_json), len(stored), now, now)
+            )
+            self._evict(conn)
+
+    def delete(self, key):
+        """Remove a cached value"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _evict(self, conn):
+        """Drop least recently used entries until the cache fits its limits"""
+        if self.max_entries is None and self.max_bytes is None:
+            return
+
+        with self._lock:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            if ((self.max_entries is None or count <= self.max_entries)
+                    and (self.max_bytes is None or total <= self.max_bytes)):
+                return
+
+            evicted = 0
+            rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall()
+            for key, size in rows:
+                if ((self.max_entries is None or count <= self.max_entries)
+                        and (self.max_bytes is None or total <= self.max_bytes)):
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                count -= 1
+                total -= size
+                evicted += 1
+
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES ('evictions', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + ?",
+                (evicted, evicted)
+            )
+
+    def stats(self):
+        """
+        Get cache size and hit metrics
+
+        Returns:
+            dict: entries, bytes, hits, misses, evictions and hit_rate
+        """
+        with self._connect() as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0
+        }
+
+    def clear(self):
+        """Remove every entry and reset the metrics"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM counters")
+
+
+def test_disk_cache():
+    """Test the disk cache with a throwaway database"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = DiskCache(os.path.join(temp_dir, "test.db"), max_entries=2)
+        cache.set("a", {"text": "hello"})
+        cache.set("b", b"\x00\x01")
+        print(f"a: {cache.get('a')}, b: {cache.get('b')!r}, missing: {cache.get('missing')}")
+
+        # "b" was used least recently, so it goes first
+        time.sleep(0.01)
+        cache.get("a")
+        cache.set("c", "third")
+        print(f"After eviction: a={cache.get('a')}, b={cache.get('b')}, c={cache.get('c')}")
+        print(f"Stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    test_disk_cache()
@@ -0,0 +1,612 @@
+"""
+Entity Resolution Module
+Recognize the same person across interview chunks and family members' interviews
+"""
+
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+from difflib import SequenceMatcher
+from pathlib import Path
+from profile_model import Profile, ExtractedData, read_profile
+from json_store import write_json_atomic, file_lock
+
+# Where the resolved people index is kept
+PEOPLE_INDEX_PATH = 'data/people_index.json'
+
+# Bump when resolution rules change enough that the index should be rebuilt
+PEOPLE_INDEX_VERSION = 1
+
+# Minimum name similarity (0-1) to treat two mentions as the same person
+MATCH_THRESHOLD = 0.88
+
+# Birth years further apart than this mean different people
+MAX_BIRTH_YEAR_GAP = 1
+
+# Blocks bigger than this (e.g. everyone called "John") are too vague to compare within
+MAX_BLOCK_SIZE = 200
+
+# Formal first name -> common nicknames
+NICKNAMES = {
+    "abigail": "abby abbie", "albert": "al bert bertie", "alexander": "alex al alec sandy",
+    "alfred": "alf alfie fred", "andrew": "andy drew", "anthony": "tony", "barbara": "barb barbie babs",
+    "benjamin": "ben benny benji", "catherine": "cathy kate katie kat", "charles": "charlie chuck chas",
+    "christopher": "chris kit", "clinton": "clint", "daniel": "dan danny", "david": "dave davey",
+    "deborah": "deb debbie", "donald": "don donnie", "dorothy": "dot dottie dolly",
+    "edward": "ed eddie ted ned", "elizabeth": "liz lizzie beth betty betsy eliza bess",
+    "eugene": "gene", "francis": "frank frankie fran", "frederick": "fred freddie",
+    "gerald": "jerry gerry", "gregory": "greg", "harold": "hal harry", "henry": "hank harry hal",
+    "james": "jim jimmy jamie", "jennifer": "jen jenny", "john": "jack johnny jon",
+    "jonathan": "jon jonny", "joseph": "joe joey", "katherine": "kate katie kathy kat kay",
+    "kenneth": "ken kenny", "lawrence": "larry", "leonard": "len lenny leo",
+    "margaret": "maggie meg peggy marge margie greta", "matthew": "matt", "michael": "mike mikey mick",
+    "nicholas": "nick nicky", "patricia": "pat patty trish tricia", "peter": "pete",
+    "raymond": "ray", "rebecca": "becky becca", "richard": "rick ricky dick rich",
+    "robert": "bob bobby rob robbie bert", "ronald": "ron ronnie", "samuel": "sam sammy",
+    "stephen": "steve", "steven": "steve", "susan": "sue susie", "theodore": "ted teddy theo",
+    "thomas": "tom tommy", "timothy": "tim timmy", "victoria": "vicky tori", "virginia": "ginny",
+    "walter": "walt wally", "william": "bill billy will willie liam",
+}
+
+# Words that describe how someone is related, not who they are
+RELATION_WORDS = {
+    "mother": "parent", "mom": "parent", "mum": "parent", "mama": "parent", "father": "parent",
+    "dad": "parent", "daddy": "parent", "papa": "parent", "brother": "sibling", "sister": "sibling",
+    "twin": "sibling", "husband": "spouse", "wife": "spouse", "son": "child", "daughter": "child",
+    "grandmother": "grandparent", "grandma": "grandparent", "grandfather": "grandparent",
+    "grandpa": "grandparent", "nana": "grandparent", "grandson": "grandchild",
+    "granddaughter": "grandchild",
+}
+
+# Relationship descriptions that aren't a direct link, even though they contain one
+# ("Mother's brother", "Brother-in-law", "Stepfather", "Great-grandmother", "Aunt")
+INDIRECT_RELATION = re.compile(
+    r"['’]s\b|\bin[\s-]+laws?\b|\bstep|\bgreat\b|\baunt|\buncle|\bcousin|\bniece|\bnephew|\bgodparent|\bgod(?:mother|father)",
+    re.IGNORECASE)
+
+# Ignored when reading a name ("Aunt Mary", "my older brother", "Dr. Smith")
+NAME_FILLER = {
+    "my", "our", "his", "her", "the", "a", "late", "older", "younger", "little", "big", "baby",
+    "eldest", "oldest", "youngest", "mr", "mrs", "ms", "miss", "dr", "aunt", "auntie", "uncle",
+    "cousin", "great", "step", "half",
+}
+
+# Generational suffixes - "John Sr." and "John Jr." are different people
+SUFFIXES = {"jr", "sr", "ii", "iii", "iv"}
+
+# Extracted family tree sections and the relation each implies
+FAMILY_SECTIONS = {"parents": "parent", "siblings": "sibling", "spouse": "spouse", "children": "child"}
+
+_NICKNAME_TO_FORMAL = {}
+for _formal, _nicknames in NICKNAMES.items():
+    _NICKNAME_TO_FORMAL.setdefault(_formal, set()).add(_formal)
+    for _nickname in _nicknames.split():
+        _NICKNAME_TO_FORMAL.setdefault(_nickname, set()).add(_formal)
+
+_index_lock = threading.Lock()
+_loaded = {"mtime": None, "index": None}
+
+
+def first_name_forms(first_name):
+    """
+    Get the formal names a first name or nickname can stand for
+
+    Args:
+        first_name (str): Lowercase first name, e.g. "clint"
+
+    Returns:
+        frozenset: Formal names, e.g. {"clinton"} (the name itself if it isn't in the table)
+    """
+    return frozenset(_NICKNAME_TO_FORMAL.get(first_name, {first_name}))
+
+
+def parse_name(name):
+    """
+    Split a name as written in an interview into comparable parts
+
+    Args:
+        name (str): e.g. "Clinton 'Clint' Johnson Jr." or "my older brother"
+
+    Returns:
+        dict: first, surname, suffix, aliases (nicknames in parentheses or quotes),
+              relation (for relation-only names like "my brother") and key (normalized full name)
+    """
+    name = name or ""
+    aliases = [alias.strip().lower() for alias in re.findall(r"[(\"“']([^)\"”']+)[)\"”']", name)]
+    base = re.sub(r"\([^)]*\)|[\"“][^\"”]*[\"”]|'[^']*'", " ", name)
+    tokens = [token for token in re.findall(r"[^\W\d_]+", base.lower()) if token not in NAME_FILLER]
+
+    suffix = None
+    if tokens and tokens[-1] in SUFFIXES:
+        suffix = tokens.pop()
+
+    relation = None
+    if tokens and all(token in RELATION_WORDS for token in tokens):
+        relation = RELATION_WORDS[tokens[0]]
+        tokens = []
+
+    return {
+        "first": tokens[0] if tokens else None,
+        "surname": tokens[-1] if len(tokens) > 1 else None,
+        "suffix": suffix,
+        "aliases": [alias.split()[0] for alias in aliases if alias.split()],
+        "relation": relation,
+        "key": " ".join(tokens + ([suffix] if suffix else []))
+    }
+
+
+def _relation_from_text(text):
+    """Direct relation named by a relationship description, or None for in-laws, extended family and chains"""
+    if not text or INDIRECT_RELATION.search(text):
+        return None
+    for word in re.findall(r"[a-z]+", text.lower()):
+        if word in RELATION_WORDS:
+            return RELATION_WORDS[word]
+    return None
+
+
+def _birth_year(date_text):
+    match = re.search(r"\b(1[6-9]\d\d|20\d\d)\b", str(date_text or ""))
+    return int(match.group(1)) if match else None
+
+
+def profile_id_for(filepath):
+    """
+    Identify a profile in the index by its file name
+
+    Args:
+        filepath (str): Path to the profile JSON
+
+    Returns:
+        str: Profile ID
+    """
+    return Path(filepath).stem
+
+
+def collect_mentions(profile_id, profile):
+    """
+    List every person mentioned in a profile's extracted data
+
+    Args:
+        profile_id (str): Profile ID
+        profile (dict): Saved interview data
+
+    Returns:
+        list: Mention dicts (key, profile, path, name, first, surname, ...)
+    """
+    raw = []
+    parent_name = profile.get('parent_name')
+    if parent_name:
+        raw.append((None, parent_name, "self", None, None))
+
+    extracted = Profile.from_dict(profile).extracted or ExtractedData()
+    for position, person in enumerate(extracted.people):
+        raw.append((["people", position], person.get('name'), _relation_from_text(person.get('relationship')),
+                    person.get('birth_date'), person.get('birth_place')))
+
+    family = extracted.family_tree
+    for section, relation in FAMILY_SECTIONS.items():
+        members = family[section]
+        if section == "spouse":
+            members = [members] if members else []
+        for position, member in enumerate(members):
+            path = ["family_tree", section] if section == "spouse" else ["family_tree", section, position]
+            raw.append((path, member.get('name'), relation, member.get('birth_date'), member.get('birth_place')))
+
+    mentions = []
+    for path, name, relation, birth_date, birth_place in raw:
+        parsed = parse_name(name)
+        if not parsed["first"] and not parsed["relation"]:
+            continue
+        mentions.append({
+            "key": f"{profile_id}:{parsed['key'] or parsed['relation']}",
+            "profile": profile_id,
+            "path": path,
+            "name": name.strip(),
+            "first": parsed["first"],
+            "surname": parsed["surname"],
+            "suffix": parsed["suffix"],
+            "aliases": parsed["aliases"],
+            "relation": relation or parsed["relation"],
+            "relation_only": not parsed["first"],
+            "birth_year": _birth_year(birth_date),
+            "birth_place": birth_place
+        })
+    return mentions
+
+
+def _block_keys(mention):
+    keys = []
+    if mention["surname"]:
+        keys.append(f"s:{mention['surname']}")
+    for form in first_name_forms(mention["first"]) | {alias for alias in mention["aliases"]}:
+        keys.append(f"f:{form}")
+    if mention["birth_year"]:
+        keys.append(f"y:{mention['birth_year']}")
+    return keys
+
+
+def _first_names(mention):
+    forms = set(first_name_forms(mention["first"]))
+    for alias in mention["aliases"]:
+        forms |= first_name_forms(alias)
+    return forms
+
+
+def match_score(a, b):
+    """
+    Score how likely two mentions are the same person
+
+    Args:
+        a (dict): Mention from collect_mentions
+        b (dict): Mention from collect_mentions
+
+    Returns:
+        float: 0 (different people) to 1 (certainly the same)
+    """
+    if a["birth_year"] and b["birth_year"] and abs(a["birth_year"] - b["birth_year"]) > MAX_BIRTH_YEAR_GAP:
+        return 0.0
+    if a["suffix"] and b["suffix"] and a["suffix"] != b["suffix"]:
+        return 0.0
+    same_profile = a["profile"] == b["profile"]
+    if same_profile and a["relation"] and b["relation"] and a["relation"] != b["relation"]:
+        # Mother Mary and daughter Mary in the same interview
+        return 0.0
+
+    if _first_names(a) & _first_names(b):
+        first_score = 1.0
+    else:
+        first_score = SequenceMatcher(None, a["first"], b["first"]).ratio()
+
+    if a["surname"] and b["surname"]:
+        return (first_score + SequenceMatcher(None, a["surname"], b["surname"]).ratio()) / 2
+
+    # "Clint" alone - only trust it within one interview, or when the birth years agree
+    if not same_profile and not (a["birth_year"] and a["birth_year"] == b["birth_year"]):
+        return 0.0
+    return first_score
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Keep the lower index as root so clustering is deterministic
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def _new_person_id(mention_key):
+    return "p_" + hashlib.sha1(mention_key.encode('utf-8')).hexdigest()[:12]
+
+
+def resolve_mentions(mentions, previous_ids=None, new_from=0):
+    """
+    Cluster mentions into people and give each person a stable ID
+
+    Args:
+        mentions (list): Mention dicts
+        previous_ids (dict): mention key -> person ID from the last resolution
+        new_from (int): Mentions before this position were already resolved against each other
+
+    Returns:
+        tuple: (list of person IDs aligned with mentions, dict of replaced ID -> surviving ID)
+    """
+    previous_ids = previous_ids or {}
+    clusters = _UnionFind(len(mentions))
+
+    # Mentions already resolved together stay together
+    first_with_id = {}
+    for position, mention in enumerate(mentions[:new_from]):
+        person_id = mention.get("person_id")
+        if person_id in first_with_id:
+            clusters.union(first_with_id[person_id], position)
+        elif person_id:
+            first_with_id[person_id] = position
+
+    blocks = {}
+    for position, mention in enumerate(mentions):
+        if not mention["relation_only"]:
+            for key in _block_keys(mention):
+                blocks.setdefault(key, []).append(position)
+
+    # Only compare new mentions, and only with mentions sharing a block
+    for position in range(new_from, len(mentions)):
+        mention = mentions[position]
+        if mention["relation_only"]:
+            continue
+        candidates = set()
+        for key in _block_keys(mention):
+            block = blocks.get(key, [])
+            if len(block) <= MAX_BLOCK_SIZE:
+                candidates.update(block)
+        for other in candidates:
+            if other < position and clusters.find(other) != clusters.find(position) and \
+                    match_score(mention, mentions[other]) >= MATCH_THRESHOLD:
+                clusters.union(other, position)
+
+    # "my brother" is whoever this interview names as its only brother
+    for position in range(new_from, len(mentions)):
+        mention = mentions[position]
+        if not mention["relation_only"]:
+            continue
+        named = [other for other, candidate in enumerate(mentions)
+                 if candidate["profile"] == mention["profile"] and not candidate["relation_only"]
+                 and candidate["relation"] == mention["relation"]]
+        if len({clusters.find(other) for other in named}) == 1:
+            clusters.union(named[0], position)
+
+    members = {}
+    for position in range(len(mentions)):
+        members.setdefault(clusters.find(position), []).append(position)
+
+    person_ids = [None] * len(mentions)
+    replaced = {}
+    for root, positions in members.items():
+        if all(mentions[position]["relation_only"] for position in positions):
+            # Nobody to attach it to
+            continue
+        known = [previous_ids[mentions[position]["key"]] for position in positions
+                 if mentions[position]["key"] in previous_ids]
+        if known:
+            person_id = min(set(known), key=lambda candidate: (-known.count(candidate), candidate))
+            for old_id in set(known) - {person_id}:
+                replaced[old_id] = person_id
+        else:
+            person_id = _new_person_id(min(mentions[position]["key"] for position in positions))
+        for position in positions:
+            person_ids[position] = person_id
+    return person_ids, replaced
+
+
+def _build_people(mentions, parent_names):
+    people = {}
+    names = {}
+    for mention in mentions:
+        person_id = mention.get("person_id")
+        if not person_id:
+            continue
+        person = people.setdefault(person_id, {
+            "id": person_id, "name": mention["name"], "aliases": [], "birth_year": None,
+            "birth_place": None, "profiles": [], "relationships": []
+        })
+        if not mention["relation_only"]:
+            # Prefer the fullest version of the name for display
+            if (bool(mention["surname"]), len(mention["name"])) > (" " in person["name"], len(person["name"])):
+                person["name"] = mention["name"]
+            if mention["name"] not in person["aliases"]:
+                person["aliases"].append(mention["name"])
+            name_ids = names.setdefault(parse_name(mention["name"])["key"], [])
+            if person_id not in name_ids:
+                name_ids.append(person_id)
+        person["birth_year"] = person["birth_year"] or mention["birth_year"]
+        person["birth_place"] = person["birth_place"] or mention["birth_place"]
+        if mention["profile"] not in person["profiles"]:
+            person["profiles"].append(mention["profile"])
+        if mention["relation"]:
+            relationship = {"profile": mention["profile"], "of": parent_names.get(mention["profile"]),
+                            "relation": mention["relation"]}
+            if relationship not in person["relationships"]:
+                person["relationships"].append(relationship)
+    return people, names
+
+
+def _empty_index():
+    return {"version": PEOPLE_INDEX_VERSION, "mentions": [], "people": {}, "names": {},
+            "replaced": {}, "parent_names": {}}
+
+
+def load_people_index(index_path=PEOPLE_INDEX_PATH):
+    """
+    Load the people index (reused from memory until the file changes)
+
+    Args:
+        index_path (str): Index location
+
+    Returns:
+        dict: Index with people (by ID), names (normalized name -> IDs) and mentions
+    """
+    try:
+        mtime = os.path.getmtime(index_path)
+    except OSError:
+        return _empty_index()
+    if _loaded["mtime"] == (index_path, mtime):
+        return _loaded["index"]
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except Exception as e:
+        print(f"Error loading people index: {e}")
+        return _empty_index()
+    if index.get("version") != PEOPLE_INDEX_VERSION:
+        return _empty_index()
+    _loaded["mtime"] = (index_path, mtime)
+    _loaded["index"] = index
+    return index
+
+
+def _add_profile(index, filepath, profile, previous_ids):
+    """Resolve one profile's mentions into an index, returning the updated index and the new mentions"""
+    profile_id = profile_id_for(filepath)
+    kept = [mention for mention in index["mentions"] if mention["profile"] != profile_id]
+    added = collect_mentions(profile_id, profile)
+    mentions = kept + added
+
+    person_ids, replaced = resolve_mentions(mentions, previous_ids, new_from=len(kept))
+    for mention, person_id in zip(mentions, person_ids):
+        mention["person_id"] = person_id
+
+    parent_names = dict(index["parent_names"], **{profile_id: profile.get('parent_name')})
+    redirects = dict(index["replaced"], **replaced)
+    people, names = _build_people(mentions, parent_names)
+    updated = {"version": PEOPLE_INDEX_VERSION, "mentions": mentions, "people": people, "names": names,
+               "replaced": redirects, "parent_names": parent_names}
+    return updated, added
+
+
+def _previous_ids(index):
+    return {mention["key"]: mention["person_id"] for mention in index["mentions"] if mention.get("person_id")}
+
+
+def update_people_index(filepath, profile, index_path=PEOPLE_INDEX_PATH):
+    """
+    Add (or refresh) one profile's people in the index
+
+    Only the profile's own mentions are compared, and only against people
+    sharing a surname, first name or birth year with them.
+
+    Args:
+        filepath (str): Path of the saved profile
+        profile (dict): Saved interview data
+        index_path (str): Index location
+
+    Returns:
+        dict: JSON path of each mention in the profile's extracted data -> person ID
+    """
+    with _index_lock, file_lock(index_path):
+        index = load_people_index(index_path)
+        index, added = _add_profile(index, filepath, profile, _previous_ids(index))
+        write_json_atomic(index_path, index, indent=2)
+
+    return {json.dumps(mention["path"]): mention["person_id"] for mention in added
+            if mention["path"] is not None and mention["person_id"]}
+
+
+def annotate_person_ids(extracted_data, person_ids):
+    """
+    Store each person's resolved ID on their record in the extracted data
+
+    Args:
+        extracted_data (dict): Profile's extracted data (updated in place)
+        person_ids (dict): Result of update_people_index
+    """
+    for path, person_id in person_ids.items():
+        target = extracted_data
+        try:
+            for step in json.loads(path):
+                target = target[step]
+        except (KeyError, IndexError, TypeError):
+            continue
+        if isinstance(target, dict):
+            target["person_id"] = person_id
+
+
+def rebuild_people_index(index_path=PEOPLE_INDEX_PATH, profiles_dir='data/parent_profiles'):
+    """
+    Resolve every saved profile from scratch, keeping existing person IDs where possible
+
+    Args:
+        index_path (str): Index location
+        profiles_dir (str): Folder of saved profiles
+
+    Returns:
+        int: Number of people in the index
+    """
+    with _index_lock, file_lock(index_path):
+        previous_ids = _previous_ids(load_people_index(index_path))
+        index = _empty_index()
+        for filepath in sorted(Path(profiles_dir).glob('*.json')):
+            try:
+                profile = read_profile(str(filepath))
+            except Exception as e:
+                print(f"Skipping {filepath.name}: {e}")
+                continue
+            index, _ = _add_profile(index, str(filepath), profile, previous_ids)
+        write_json_atomic(index_path, index, indent=2)
+    return len(index["people"])
+
+
+def get_person(person_id, index_path=PEOPLE_INDEX_PATH):
+    """
+    Look up a person by ID
+
+    Args:
+        person_id (str): Person ID (IDs merged into another person still work)
+
+    Returns:
+        dict: id, name, aliases, birth_year, birth_place, profiles and relationships, or None
+    """
+    index = load_people_index(index_path)
+    person_id = index["replaced"].get(person_id, person_id)
+    return index["people"].get(person_id)
+
+
+def find_people(name, index_path=PEOPLE_INDEX_PATH):
+    """
+    Find people by name, nickname or alias
+
+    Args:
+        name (str): Name as written, e.g. "Clint Johnson"
+
+    Returns:
+        list: Matching person dicts
+    """
+    index = load_people_index(index_path)
+    parsed = parse_name(name)
+    person_ids = list(index["names"].get(parsed["key"], []))
+    if not person_ids and parsed["first"]:
+        # Fall back to nickname-aware comparison
+        query = dict(parsed, relation=None, birth_year=None, profile=None)
+        for key, ids in index["names"].items():
+            candidate = dict(parse_name(key), relation=None, birth_year=None, profile=None)
+            if candidate["first"] and match_score(query, candidate) >= MATCH_THRESHOLD:
+                person_ids.extend(person_id for person_id in ids if person_id not in person_ids)
+    return [index["people"][person_id] for person_id in person_ids if person_id in index["people"]]
+
+
+def test_entity_resolution():
+    """Test resolution across two family members' interviews"""
+    import shutil
+
+    temp_dir = tempfile.mkdtemp()
+    index_path = os.path.join(temp_dir, "people_index.json")
+    try:
+        margaret = {
+            "parent_name": "Margaret Johnson",
+            "extracted_data": {
+                "people": [{"name": "Clint", "relationship": "Son", "birth_date": "1967"},
+                           {"name": "my son", "relationship": "Son"}],
+                "family_tree": {"children": [{"name": "Clinton Johnson", "birth_date": "1967"}],
+                                "spouse": {"name": "Robert Johnson"}}
+            }
+        }
+        clint = {
+            "parent_name": "Clint Johnson",
+            "extracted_data": {
+                "family_tree": {"parents": [{"name": "Maggie Johnson"}, {"name": "Bob Johnson Sr."}]}
+            }
+        }
+        ids = update_people_index("Margaret_Johnson_1.json", margaret, index_path)
+        update_people_index("Clint_Johnson_1.json", clint, index_path)
+        annotate_person_ids(margaret["extracted_data"], ids)
+
+        index = load_people_index(index_path)
+        for person in index["people"].values():
+            print(f"{person['id']}  {person['name']:<18} aliases={person['aliases']}")
+        print(f"Clint's record: {margaret['extracted_data']['people'][0]}")
+        print(f"find_people('Peggy Johnson') -> {[p['name'] for p in find_people('Peggy Johnson', index_path)]}")
+
+        # Only direct relations become relation constraints and family graph edges
+        relations = {"Son": "child", "Older brother": "sibling", "Mother's brother": None, "Wife's sister": None,
+                     "Brother-in-law": None, "Son-in-law": None, "Father in law": None, "Stepmother": None,
+                     "Great-grandmother": None, "Aunt": None, "Cousin": None}
+        wrong = {text: _relation_from_text(text) for text, expected in relations.items()
+                 if _relation_from_text(text) != expected}
+        print(f"Relationship descriptions: {'all as expected' if not wrong else wrong}")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_entity_resolution()
@@ -4,9 +4,17 @@ Extract structured information from interview responses
 """
 
 import os
+import re
+import html
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from dotenv import load_dotenv
 import json
+from extraction_cache import (get_cached_prefix, store_interview_extraction,
+                              get_cached_answer, store_answer_extraction, EXTRACTION_MODEL)
+from extraction_schema import (SECTIONS, SchemaError, SectionStreamParser, validate_section,
+                               schema_example, repair_json)
+from profile_model import ExtractedData
 
 # Load environment variables
 load_dotenv()
@@ -14,23 +22,44 @@ load_dotenv()
 # Initialize OpenAI client
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Response budget for a whole interview, and for a single answer and its follow-ups
+MAX_EXTRACTION_TOKENS = 2000
+MAX_TURN_EXTRACTION_TOKENS = 1000
 
-def extract_structured_data(interview_data, parent_name):
+# Long interviews are split by question into chunks of about this many transcript tokens
+MAX_CHUNK_TOKENS = 3000
+
+# Rough English average, good enough for sizing chunks without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Chunks extracted at the same time
+MAX_PARALLEL_CHUNKS = 4
+
+# Extra attempts for a chunk whose response couldn't be parsed
+CHUNK_RETRIES = 2
+
+# Times the sections missing from a response are asked for again
+SECTION_RETRIES = 2
+
+# Response budget for one question whose extraction didn't fit MAX_EXTRACTION_TOKENS (it can't be split further)
+MAX_LONG_ANSWER_TOKENS = 4000
+
+
+def _build_transcript(interview_data, parent_name, first_number=1):
     """
-    Extract structured data from complete interview responses
+    Combine interview responses into a single transcript
 
     Args:
         interview_data (list): List of interview Q&A with followups
         parent_name (str): Name of the person being interviewed
+        first_number (int): Number of the first question (for transcripts of part of an interview)
 
     Returns:
-        dict: Extracted structured data organized by category
+        str: Transcript text
     """
-
-    # Combine all interview responses into a single text
     full_transcript = f"Interview with {parent_name}\n\n"
 
-    for idx, item in enumerate(interview_data, 1):
+    for idx, item in enumerate(interview_data, first_number):
         full_transcript += f"Question {idx}: {item['question']}\n"
         full_transcript += f"Answer: {item['answer']}\n"
 
@@ -42,105 +71,20 @@ def extract_structured_data(interview_data, parent_name):
 
         full_transcript += "\n"
 
-    # Create extraction prompt
-    extraction_prompt = f"""You are an expert at analyzing oral history interviews and extracting structured information to preserve family legacy.
+    return full_transcript
+
+
+def _build_extraction_prompt(transcript, parent_name, sections=None):
+    """Build the extraction prompt for a transcript (optionally asking for only some sections)"""
+    return f"""You are an expert at analyzing oral history interviews and extracting structured information to preserve family legacy.
 
 Analyze the following interview transcript and extract comprehensive structured data.
 
-{full_transcript}
+{transcript}
 
 Extract and organize the following information in JSON format:
 
-{{
-  "people": [
-    {{
-      "name": "Full name",
-      "relationship": "Relationship to {parent_name}",
-      "birth_date": "Date if mentioned",
-      "birth_place": "Place if mentioned",
-      "notes": "Any additional details"
-    }}
-  ],
-  "places": [
-    {{
-      "location": "Place name",
-      "significance": "Why this place matters",
-      "time_period": "When they lived/visited",
-      "details": "Additional context"
-    }}
-  ],
-  "dates_and_events": [
-    {{
-      "date": "Date or time period",
-      "event": "What happened",
-      "significance": "Why it matters",
-      "people_involved": ["Names"]
-    }}
-  ],
-  "themes_and_topics": [
-    {{
-      "theme": "Main topic/category",
-      "description": "What was discussed",
-      "significance": "Why this is important to preserve"
-    }}
-  ],
-  "values_and_personality": [
-    {{
-      "value_or_trait": "The value or personality trait",
-      "evidence": "Specific story or quote that demonstrates this",
-      "significance": "What this reveals about {parent_name}"
-    }}
-  ],
-  "life_lessons": [
-    {{
-      "lesson": "The wisdom or advice",
-      "context": "Story or experience it came from",
-      "quote": "Direct quote if available"
-    }}
-  ],
-  "career_and_education": {{
-    "education": ["Schools, degrees, studies"],
-    "jobs": [
-      {{
-        "position": "Job title/role",
-        "organization": "Company/place",
-        "time_period": "When",
-        "key_learnings": "What they learned"
-      }}
-    ]
-  }},
-  "family_tree": {{
-    "parents": [
-      {{
-        "name": "Full name",
-        "birth_date": "Date if mentioned",
-        "birth_place": "Place if mentioned",
-        "notes": "Any additional details"
-      }}
-    ],
-    "siblings": [
-      {{
-        "name": "Full name (include nicknames in parentheses)",
-        "birth_date": "Date if mentioned",
-        "birth_place": "Place if mentioned",
-        "relationship": "older brother/younger sister/twin/etc",
-        "notes": "Any additional details"
-      }}
-    ],
-    "spouse": {{
-      "name": "Spouse name if mentioned",
-      "marriage_date": "Date if mentioned",
-      "notes": "Any additional details"
-    }},
-    "children": [
-      {{
-        "name": "Child name if mentioned",
-        "birth_date": "Date if mentioned",
-        "notes": "Any additional details"
-      }}
-    ]
-  }}
-}}
+{schema_example(sections or SECTIONS, parent_name)}
 
 Important guidelines:
 - Only extract information explicitly stated in the interview
@@ -162,250 +106,574 @@ Example of correct null usage:
 Return ONLY valid JSON, no additional text.
 """
 
-    try:
-        # Call OpenAI API for extraction
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert at extracting structured data from oral history interviews. You return valid JSON only."
-                },
-                {
-                    "role": "user",
-                    "content": extraction_prompt
-                }
-            ],
-            temperature=0.3,  # Lower temperature for more consistent extraction
-            max_tokens=2000
-        )
 
-        # Parse the JSON response
-        extracted_json = response.choices[0].message.content.strip()
+def _stream_sections(extraction_prompt, sections, max_tokens):
+    """
+    Stream an extraction response, validating each section as soon as it is complete
+
+    Returns:
+        tuple: (valid sections dict, sections that arrived broken, finish reason)
+    """
+    stream = client.chat.completions.create(
+        model=EXTRACTION_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": "You are an expert at extracting structured data from oral history interviews. You return valid JSON only."
+            },
+            {
+                "role": "user",
+                "content": extraction_prompt
+            }
+        ],
+        temperature=0.3,  # Lower temperature for more consistent extraction
+        max_tokens=max_tokens,
+        response_format={"type": "json_object"},
+        stream=True
+    )
+
+    parser = SectionStreamParser()
+    valid = {}
+    broken = []
+    finish_reason = None
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        finish_reason = choice.finish_reason or finish_reason
+        for section, raw in parser.feed(choice.delta.content or ""):
+            if section not in sections:
+                continue
+            try:
+                try:
+                    value = json.loads(raw)
+                except json.JSONDecodeError:
+                    value = json.loads(repair_json(raw))
+                valid[section] = validate_section(section, value)
+            except (json.JSONDecodeError, SchemaError) as e:
+                print(f"Extraction section '{section}' is invalid: {e}")
+                broken.append(section)
+    return valid, broken, finish_reason
+
+
+def _run_extraction(transcript, parent_name, max_tokens):
+    """
+    Extract a transcript, keeping every valid section of the response
 
-        # Remove markdown code blocks if present
-        if extracted_json.startswith("```json"):
-            extracted_json = extracted_json[7:]
-        if extracted_json.startswith("```"):
-            extracted_json = extracted_json[3:]
-        if extracted_json.endswith("```"):
-            extracted_json = extracted_json[:-3]
+    The response is parsed section by section as it streams in. Sections
+    that arrive broken (or never arrive because the response was cut off)
+    are repaired locally if possible, otherwise asked for again on their own.
 
-        extracted_data = json.loads(extracted_json.strip())
+    Returns:
+        dict: {"success": bool, "data": dict, "error": str}
+    """
+    try:
+        valid, broken, finish_reason = _stream_sections(
+            _build_extraction_prompt(transcript, parent_name), SECTIONS, max_tokens
+        )
+        truncated = finish_reason == "length"
+
+        for attempt in range(SECTION_RETRIES):
+            # Sections left out of a complete response just had nothing to report
+            needed = [section for section in SECTIONS
+                      if section in broken or (truncated and section not in valid)]
+            if not needed:
+                break
+            if truncated and not valid:
+                # Nothing fitted - asking again for everything won't help
+                return {
+                    "success": False,
+                    "data": None,
+                    "error": "Response was truncated",
+                    "truncated": True
+                }
+            retried, broken, finish_reason = _stream_sections(
+                _build_extraction_prompt(transcript, parent_name, needed), needed, max_tokens
+            )
+            valid.update(retried)
+            truncated = finish_reason == "length"
+            broken = [section for section in broken if section not in valid]
+
+        still_needed = [section for section in SECTIONS
+                        if section in broken or (truncated and section not in valid)]
+        if still_needed:
+            return {
+                "success": False,
+                "data": None,
+                "error": f"Could not extract: {', '.join(still_needed)}",
+                "truncated": truncated
+            }
 
         return {
             "success": True,
-            "data": extracted_data,
+            "data": {section: valid[section] if section in valid else validate_section(section, None)
+                     for section in SECTIONS},
             "error": None
         }
 
-    except json.JSONDecodeError as e:
+    except Exception as e:
         return {
             "success": False,
             "data": None,
-            "error": f"Failed to parse JSON: {str(e)}"
+            "error": f"Extraction failed: {str(e)}"
         }
-    except Exception as e:
+
+
+def estimate_tokens(text):
+    """
+    Estimate how many tokens a piece of text uses
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Approximate token count
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_interview(interview_data, parent_name, max_tokens=MAX_CHUNK_TOKENS, first_number=1):
+    """
+    Split an interview by question into chunks that each fit one extraction call
+
+    A question is never split, so a single very long answer gets a chunk to itself.
+
+    Args:
+        interview_data (list): List of interview Q&A with followups
+        parent_name (str): Name of the person being interviewed
+        max_tokens (int): Transcript token budget per chunk
+        first_number (int): Number of the first question
+
+    Returns:
+        list: (first question number, list of Q&A items) tuples, in interview order
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for number, item in enumerate(interview_data, first_number):
+        tokens = estimate_tokens(_build_transcript([item], parent_name, first_number=number))
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append((first_number, current))
+            current = []
+            current_tokens = 0
+        if not current:
+            first_number = number
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        chunks.append((first_number, current))
+    return chunks
+
+
+def _extract_chunk(chunk, parent_name, max_tokens=MAX_EXTRACTION_TOKENS):
+    first_number, items = chunk
+    transcript = _build_transcript(items, parent_name, first_number=first_number)
+    return _run_extraction(transcript, parent_name, max_tokens)
+
+
+def extract_structured_data(interview_data, parent_name, use_cache=True):
+    """
+    Extract structured data from complete interview responses
+
+    Results are cached by transcript. An unchanged interview is answered
+    from the cache, and a resumed one only sends the answers added since
+    it was last extracted.
+
+    Args:
+        interview_data (list): List of interview Q&A with followups
+        parent_name (str): Name of the person being interviewed
+        use_cache (bool): False to send every answer to the model again (the result is still cached)
+
+    Returns:
+        dict: Extracted structured data organized by category
+    """
+    covered, cached = get_cached_prefix(interview_data, parent_name) if use_cache else (0, None)
+    if cached is not None and covered == len(interview_data):
+        return {"success": True, "data": cached, "error": None}
+
+    result = _extract_chunked(interview_data[covered:], parent_name, first_number=covered + 1)
+    if not result['success']:
+        return result
+
+    data = merge_extracted_data([cached, result['data']]) if cached is not None else result['data']
+    store_interview_extraction(interview_data, parent_name, data)
+    return {"success": True, "data": data, "error": None}
+
+
+def _extract_chunked(interview_data, parent_name, first_number=1):
+    """
+    Extract interview responses in chunks
+
+    Long interviews are split into chunks that are extracted concurrently
+    and merged with merge_extracted_data. Chunks that fail are retried on
+    their own, and a chunk whose output was truncated is split in half. A
+    single question that is still truncated gets one more try with
+    MAX_LONG_ANSWER_TOKENS - the same request again would only be cut off
+    at the same place.
+    """
+    pending = chunk_interview(interview_data, parent_name, first_number=first_number)
+    results = {}
+    errors = {}
+    # Response budget by chunk (first question number), where it isn't MAX_EXTRACTION_TOKENS
+    budgets = {}
+    given_up = []
+    for attempt in range(CHUNK_RETRIES + 1):
+        if not pending:
+            break
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_CHUNKS, len(pending))) as executor:
+            outcomes = list(executor.map(
+                lambda chunk: _extract_chunk(chunk, parent_name, budgets.get(chunk[0], MAX_EXTRACTION_TOKENS)),
+                pending
+            ))
+
+        retry = []
+        for chunk, result in zip(pending, outcomes):
+            if result['success']:
+                results[chunk[0]] = result['data']
+                errors.pop(chunk[0], None)
+            elif result.get('truncated') and len(chunk[1]) > 1:
+                retry.extend(_split_chunk(chunk))
+            elif result.get('truncated'):
+                errors[chunk[0]] = result['error']
+                if chunk[0] in budgets:
+                    given_up.append(chunk)
+                else:
+                    budgets[chunk[0]] = MAX_LONG_ANSWER_TOKENS
+                    retry.append(chunk)
+            else:
+                errors[chunk[0]] = result['error']
+                retry.append(chunk)
+        pending = retry
+
+    failed_chunks = sorted(given_up + pending, key=lambda chunk: chunk[0])
+    if failed_chunks:
+        failed = ", ".join(f"question {first_number}: {errors.get(first_number, 'truncated')}"
+                           for first_number, _ in failed_chunks)
         return {
             "success": False,
             "data": None,
-            "error": f"Extraction failed: {str(e)}"
+            "error": f"Extraction failed for {len(failed_chunks)} chunk(s) ({failed})"
         }
 
+    # Reduce in interview order so the result doesn't depend on which chunk finished first
+    records = [results[first_number] for first_number in sorted(results)]
+    return {
+        "success": True,
+        "data": records[0] if len(records) == 1 else merge_extracted_data(records),
+        "error": None
+    }
 
-def format_extraction_for_display(extracted_data):
+
+def _split_chunk(chunk):
+    first_number, items = chunk
+    middle = len(items) // 2
+    return [(first_number, items[:middle]), (first_number + middle, items[middle:])]
+
+
+def extract_turn_data(item, parent_name, question_number, use_cache=True):
     """
-    Format extracted data for nice display in Streamlit
+    Extract structured data from a single answer and its follow-ups
 
     Args:
-        extracted_data (dict): The extracted structured data (can be raw data or wrapped in 'data' key)
+        item (dict): One interview Q&A with followups
+        parent_name (str): Name of the person being interviewed
+        question_number (int): 1-based position of the question in the interview
+        use_cache (bool): False to send the answer to the model again (the result is still cached)
 
     Returns:
-        str: Formatted markdown text
+        dict: {"success": bool, "data": dict, "error": str}
     """
+    cached = get_cached_answer(item, parent_name) if use_cache else None
+    if cached is not None:
+        return {"success": True, "data": cached, "error": None}
 
-    if not extracted_data:
-        return "No data to display"
+    transcript = _build_transcript([item], parent_name, first_number=question_number)
+    result = _run_extraction(transcript, parent_name, MAX_TURN_EXTRACTION_TOKENS)
+    if result['success']:
+        store_answer_extraction(item, parent_name, result['data'])
+    return result
+
+
+# Fields that identify the same record when it's extracted from more than one answer
+MERGE_KEYS = {
+    "people": ("name",),
+    "places": ("location",),
+    "dates_and_events": ("date", "event"),
+    "themes_and_topics": ("theme",),
+    "values_and_personality": ("value_or_trait",),
+    "life_lessons": ("lesson",),
+    "jobs": ("position", "organization"),
+    "parents": ("name",),
+    "siblings": ("name",),
+    "children": ("name",),
+}
+
+
+def _merge_key(section, item):
+    if not isinstance(item, dict):
+        return ("", str(item).strip().lower())
+    fields = MERGE_KEYS.get(section, ())
+    return tuple(str(item.get(field) or "").strip().lower() for field in fields)
+
+
+def _merge_record(existing, new):
+    """Fill gaps in a record from a later mention of the same thing"""
+    for field, value in new.items():
+        if value in (None, "", []):
+            continue
+        current = existing.get(field)
+        if current in (None, "", []):
+            existing[field] = value
+        elif isinstance(current, list) and isinstance(value, list):
+            existing[field] = current + [v for v in value if v not in current]
+        elif field == "notes" and isinstance(current, str) and isinstance(value, str) and value not in current:
+            existing[field] = f"{current}; {value}"
+
+
+def _merge_list(section, merged, items):
+    index = {_merge_key(section, item): position for position, item in enumerate(merged)}
+    for item in items or []:
+        key = _merge_key(section, item)
+        if not any(key):
+            continue
+        if key in index:
+            if isinstance(item, dict):
+                _merge_record(merged[index[key]], item)
+        else:
+            index[key] = len(merged)
+            merged.append(dict(item) if isinstance(item, dict) else item)
+    return merged
+
+
+def merge_extracted_data(records):
+    """
+    Merge structured data extracted from separate parts of an interview
 
-    # Handle both formats: direct data or wrapped in 'data' key
-    if 'data' in extracted_data:
-        data = extracted_data['data']
-    else:
-        # Data is already in the correct format (directly in extracted_data)
-        data = extracted_data
+    Records are merged in order, so the result is the same every time.
+    Entries describing the same person, place, event etc. are combined,
+    with later answers filling in details the earlier ones left null.
 
+    Args:
+        records (list): Extracted data dicts (the "data" of extraction results)
+
+    Returns:
+        dict: One extracted data dict in the extraction schema
+    """
+    merged = {}
+    for record in records:
+        if not record:
+            continue
+        for section, value in record.items():
+            if section == "career_and_education" and isinstance(value, dict):
+                target = merged.setdefault(section, {"education": [], "jobs": []})
+                _merge_list("education", target["education"], value.get("education"))
+                _merge_list("jobs", target["jobs"], value.get("jobs"))
+            elif section == "family_tree" and isinstance(value, dict):
+                target = merged.setdefault(section, {"parents": [], "siblings": [], "spouse": {}, "children": []})
+                for relation in ("parents", "siblings", "children"):
+                    if isinstance(value.get(relation), list):
+                        _merge_list(relation, target[relation], value[relation])
+                if isinstance(value.get("spouse"), dict):
+                    _merge_record(target["spouse"], value["spouse"])
+            elif isinstance(value, list):
+                _merge_list(section, merged.setdefault(section, []), value)
+            elif section not in merged:
+                merged[section] = value
+    return merged
+
+
+def _birth_details(person):
+    details = []
+    if person.get('birth_date'):
+        details.append(f"born {person['birth_date']}")
+    if person.get('birth_place'):
+        details.append(f"in {person['birth_place']}")
+    return details
+
+
+def format_extraction_for_display(extracted_data):
+    """
+    Format extracted data for nice display in Streamlit
+
+    Args:
+        extracted_data (ExtractedData or dict): Extracted data in the current format
+            (profiles loaded through profile_model have already been migrated)
+
+    Returns:
+        str: Formatted markdown text
+    """
+    data = extracted_data if isinstance(extracted_data, ExtractedData) else ExtractedData.from_dict(extracted_data)
     if not data:
         return "No data to display"
 
-    markdown = ""
+    parts = []
+    add = parts.append
 
     # People
-    if data.get('people'):
-        markdown += "### 👥 People Mentioned\n\n"
-        for person in data['people']:
-            markdown += f"**{person.get('name', 'Unknown')}**"
+    if data.people:
+        add("### 👥 People Mentioned\n\n")
+        for person in data.people:
+            add(f"**{person.get('name', 'Unknown')}**")
             if person.get('relationship'):
-                markdown += f" - {person['relationship']}"
-            markdown += "\n"
+                add(f" - {person['relationship']}")
+            add("\n")
             if person.get('birth_date'):
-                markdown += f"- Born: {person['birth_date']}"
+                add(f"- Born: {person['birth_date']}")
                 if person.get('birth_place'):
-                    markdown += f" in {person['birth_place']}"
-                markdown += "\n"
+                    add(f" in {person['birth_place']}")
+                add("\n")
             if person.get('notes'):
-                markdown += f"- {person['notes']}\n"
-            markdown += "\n"
-
-    # Places - handle both 'places' and old 'important_places'
-    places = data.get('places') or data.get('important_places')
-    if places:
-        markdown += "### 📍 Places\n\n"
-        for place in places:
-            markdown += f"**{place.get('location', 'Unknown')}**\n"
+                add(f"- {person['notes']}\n")
+            add("\n")
+
+    # Places
+    if data.places:
+        add("### 📍 Places\n\n")
+        for place in data.places:
+            add(f"**{place.get('location', 'Unknown')}**\n")
             if place.get('significance'):
-                markdown += f"- {place['significance']}\n"
+                add(f"- {place['significance']}\n")
             if place.get('time_period'):
-                markdown += f"- Time period: {place['time_period']}\n"
-            markdown += "\n"
-
-    # Values and Personality - handle old combined format 'life_lessons_and_values'
-    values = data.get('values_and_personality')
-    if values:
-        markdown += "### 💎 Values & Personality\n\n"
-        for item in values:
-            markdown += f"**{item.get('value_or_trait', 'Unknown')}**\n"
+                add(f"- Time period: {place['time_period']}\n")
+            add("\n")
+
+    # Values and Personality
+    if data.values_and_personality:
+        add("### 💎 Values & Personality\n\n")
+        for item in data.values_and_personality:
+            add(f"**{item.get('value_or_trait', 'Unknown')}**\n")
             if item.get('evidence'):
-                markdown += f"- Evidence: {item['evidence']}\n"
-            markdown += "\n"
-
-    # Life Lessons - handle both new 'life_lessons' and old 'life_lessons_and_values'
-    life_lessons = data.get('life_lessons') or data.get('life_lessons_and_values')
-    if life_lessons:
-        markdown += "### 🎓 Life Lessons & Wisdom\n\n"
-        for lesson in life_lessons:
-            markdown += f"**{lesson.get('lesson', 'Unknown')}**\n"
+                add(f"- Evidence: {item['evidence']}\n")
+            add("\n")
+
+    # Life Lessons
+    if data.life_lessons:
+        add("### 🎓 Life Lessons & Wisdom\n\n")
+        for lesson in data.life_lessons:
+            add(f"**{lesson.get('lesson', 'Unknown')}**\n")
             if lesson.get('context'):
-                markdown += f"- Context: {lesson['context']}\n"
+                add(f"- Context: {lesson['context']}\n")
             if lesson.get('quote'):
-                markdown += f"- Quote: *\"{lesson['quote']}\"*\n"
+                add(f"- Quote: *\"{lesson['quote']}\"*\n")
             if lesson.get('source'):
-                markdown += f"- Source: {lesson['source']}\n"
-            markdown += "\n"
+                add(f"- Source: {lesson['source']}\n")
+            add("\n")
 
     # Themes
-    if data.get('themes_and_topics'):
-        markdown += "### 📚 Themes & Topics\n\n"
-        themes = [t.get('theme', 'Unknown') for t in data['themes_and_topics']]
-        markdown += ", ".join(themes) + "\n\n"
+    if data.themes_and_topics:
+        add("### 📚 Themes & Topics\n\n")
+        add(", ".join(t.get('theme', 'Unknown') for t in data.themes_and_topics) + "\n\n")
 
     # Family Tree
-    if data.get('family_tree'):
-        markdown += "### 👨‍👩‍👧‍👦 Family Tree\n\n"
-        family = data['family_tree']
-
-        # Parents - handle both old dict format and new list format
-        if family.get('parents'):
-            markdown += "**Parents:**\n\n"
-            parents_data = family['parents']
-
-            # Check if it's old format (dict with 'father'/'mother' keys) or new format (list)
-            if isinstance(parents_data, dict):
-                # Old format: { father: {...}, mother: {...} }
-                for role, parent in parents_data.items():
-                    if isinstance(parent, dict):
-                        name = parent.get('name', 'Unknown')
-                        markdown += f"- **{name}** ({role.title()})"
-
-                        birth_info = []
-                        if parent.get('birth_date'):
-                            birth_info.append(f"born {parent['birth_date']}")
-                        if parent.get('birth_place'):
-                            birth_info.append(f"in {parent['birth_place']}")
-
-                        if birth_info:
-                            markdown += f" - {', '.join(birth_info)}"
-                        markdown += "\n"
-
-                        if parent.get('notes'):
-                            markdown += f"  - {parent['notes']}\n"
-                        markdown += "\n"
-            else:
-                # New format: list of parent dicts
-                for parent in parents_data:
-                    if isinstance(parent, dict):
-                        name = parent.get('name', 'Unknown')
-                        markdown += f"- **{name}**"
-
-                        birth_info = []
-                        if parent.get('birth_date'):
-                            birth_info.append(f"born {parent['birth_date']}")
-                        if parent.get('birth_place'):
-                            birth_info.append(f"in {parent['birth_place']}")
-
-                        if birth_info:
-                            markdown += f" ({', '.join(birth_info)})"
-                        markdown += "\n"
-
-                        if parent.get('notes'):
-                            markdown += f"  - {parent['notes']}\n"
-                        markdown += "\n"
+    if data.has_family():
+        add("### 👨‍👩‍👧‍👦 Family Tree\n\n")
+        family = data.family_tree
+
+        # Parents (migrated {father, mother} data carries a role)
+        if family['parents']:
+            add("**Parents:**\n\n")
+            for parent in family['parents']:
+                birth_info = _birth_details(parent)
+                if parent.get('role'):
+                    add(f"- **{parent.get('name', 'Unknown')}** ({parent['role']})")
+                    if birth_info:
+                        add(f" - {', '.join(birth_info)}")
+                else:
+                    add(f"- **{parent.get('name', 'Unknown')}**")
+                    if birth_info:
+                        add(f" ({', '.join(birth_info)})")
+                add("\n")
+                if parent.get('notes'):
+                    add(f"  - {parent['notes']}\n")
+                add("\n")
 
         # Siblings
-        if family.get('siblings'):
-            markdown += "**Siblings:**\n\n"
+        if family['siblings']:
+            add("**Siblings:**\n\n")
             for sibling in family['siblings']:
                 name = sibling.get('name', 'Unknown')
                 relationship = sibling.get('relationship', '')
-                if relationship:
-                    markdown += f"- **{name}** ({relationship})"
-                else:
-                    markdown += f"- **{name}**"
+                add(f"- **{name}** ({relationship})" if relationship else f"- **{name}**")
 
-                birth_info = []
-                if sibling.get('birth_date'):
-                    birth_info.append(f"born {sibling['birth_date']}")
-                else:
-                    birth_info.append("birth date not mentioned")
-
-                if sibling.get('birth_place'):
-                    birth_info.append(f"in {sibling['birth_place']}")
-                else:
-                    birth_info.append("birth place not mentioned")
-
-                if birth_info:
-                    markdown += f" - {', '.join(birth_info)}"
-                markdown += "\n"
+                birth_info = [
+                    f"born {sibling['birth_date']}" if sibling.get('birth_date') else "birth date not mentioned",
+                    f"in {sibling['birth_place']}" if sibling.get('birth_place') else "birth place not mentioned"
+                ]
+                add(f" - {', '.join(birth_info)}\n")
 
                 if sibling.get('notes'):
-                    markdown += f"  - {sibling['notes']}\n"
-                markdown += "\n"
+                    add(f"  - {sibling['notes']}\n")
+                add("\n")
 
         # Spouse
-        if family.get('spouse') and family['spouse'].get('name'):
-            markdown += "**Spouse:**\n\n"
-            spouse = family['spouse']
-            markdown += f"- **{spouse.get('name')}**"
+        spouse = family['spouse']
+        if spouse and spouse.get('name'):
+            add("**Spouse:**\n\n")
+            add(f"- **{spouse.get('name')}**")
             if spouse.get('marriage_date'):
-                markdown += f" (married {spouse['marriage_date']})"
-            markdown += "\n"
+                add(f" (married {spouse['marriage_date']})")
+            add("\n")
             if spouse.get('notes'):
-                markdown += f"  - {spouse['notes']}\n"
-            markdown += "\n"
+                add(f"  - {spouse['notes']}\n")
+            add("\n")
 
         # Children
-        if family.get('children'):
-            markdown += "**Children:**\n\n"
+        if family['children']:
+            add("**Children:**\n\n")
             for child in family['children']:
-                name = child.get('name', 'Unknown')
-                markdown += f"- **{name}**"
+                add(f"- **{child.get('name', 'Unknown')}**")
                 if child.get('birth_date'):
-                    markdown += f" (born {child['birth_date']})"
-                markdown += "\n"
+                    add(f" (born {child['birth_date']})")
+                add("\n")
                 if child.get('notes'):
-                    markdown += f"  - {child['notes']}\n"
-                markdown += "\n"
+                    add(f"  - {child['notes']}\n")
+                add("\n")
+
+    return "".join(parts)
+
+
+def _inline_html(text):
+    """Convert the **bold** and *italic* used in the display markdown to HTML"""
+    text = html.escape(text, quote=False)
+    text = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", text)
+    return re.sub(r"\*(.+?)\*", r"<em>\1</em>", text)
 
-    return markdown
+
+def format_extraction_html(extracted_data):
+    """
+    Format extracted data as an HTML fragment (same content as format_extraction_for_display)
+
+    Args:
+        extracted_data (ExtractedData or dict): Extracted data in the current format
+
+    Returns:
+        str: HTML
+    """
+    markdown = format_extraction_for_display(extracted_data)
+    parts = []
+    list_depth = 0
+    for line in markdown.split("\n"):
+        stripped = line.lstrip(" ")
+        if not stripped:
+            continue
+        depth = (len(line) - len(stripped)) // 2 + 1 if stripped.startswith("- ") else 0
+        while list_depth > depth:
+            parts.append("</li></ul>")
+            list_depth -= 1
+        if depth and list_depth == depth:
+            parts.append("</li>")
+        while list_depth < depth:
+            # A deeper list goes inside the item above it
+            parts.append("<ul>")
+            list_depth += 1
+        if depth:
+            parts.append(f"<li>{_inline_html(stripped[2:])}")
+        elif stripped.startswith("### "):
+            parts.append(f"<h3>{_inline_html(stripped[4:])}</h3>")
+        else:
+            parts.append(f"<p>{_inline_html(stripped)}</p>")
+    parts.extend("</li></ul>" for _ in range(list_depth))
+    return "\n".join(parts)
 
 
 def test_extraction():
@@ -0,0 +1,191 @@
+"""
+Extraction Cache
+Persistent extraction results keyed by a hash of the normalized transcript and prompt version
+"""
+
+import os
+import re
+import json
+import hashlib
+import unicodedata
+from disk_cache import DiskCache, CACHE_DIR
+
+# Cache database for extraction results
+EXTRACTION_CACHE_PATH = f'{CACHE_DIR}/extractions.db'
+
+# Extraction results are a few KB each
+MAX_CACHED_EXTRACTIONS = 2000
+
+# Bump whenever the extraction prompt or output format changes so old results aren't reused
+EXTRACTION_PROMPT_VERSION = "extract-v2"
+
+# Model used for extraction - needs JSON output mode (gpt-4o, gpt-4-turbo and later)
+EXTRACTION_MODEL = os.getenv("EXTRACTION_MODEL", "gpt-4o")
+
+_cache = None
+
+
+def get_extraction_cache():
+    """
+    Get the shared extraction cache
+
+    Returns:
+        DiskCache: Cache of extraction results
+    """
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(EXTRACTION_CACHE_PATH, max_entries=MAX_CACHED_EXTRACTIONS)
+    return _cache
+
+
+def _normalize(text):
+    """Ignore differences that don't change what the model sees (unicode form, spacing)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def answer_hash(item, parent_name):
+    """
+    Hash one normalized Q&A with its follow-ups
+
+    Args:
+        item (dict): Interview Q&A with followups
+        parent_name (str): Name of the person being interviewed
+
+    Returns:
+        str: Hex digest
+    """
+    normalized = [_normalize(parent_name), _normalize(item.get('question')), _normalize(item.get('answer'))]
+    for followup in item.get('followups') or []:
+        normalized.append([_normalize(followup.get('question')), _normalize(followup.get('answer'))])
+    encoded = json.dumps(normalized, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def transcript_hashes(interview_data, parent_name):
+    """
+    Hash every prefix of an interview
+
+    transcript_hashes(...)[k] identifies the first k answers, so a resumed
+    interview can find the result for the part that was already extracted.
+
+    Args:
+        interview_data (list): Interview Q&A with followups
+        parent_name (str): Name of the person being interviewed
+
+    Returns:
+        list: len(interview_data) + 1 hex digests (the last one is the whole interview)
+    """
+    digest = hashlib.sha256(_normalize(parent_name).encode('utf-8')).hexdigest()
+    hashes = [digest]
+    for item in interview_data:
+        digest = hashlib.sha256(f"{digest}:{answer_hash(item, parent_name)}".encode('ascii')).hexdigest()
+        hashes.append(digest)
+    return hashes
+
+
+def _interview_key(transcript_hash):
+    return f"{EXTRACTION_PROMPT_VERSION}:{EXTRACTION_MODEL}:interview:{transcript_hash}"
+
+
+def _answer_key(item_hash):
+    return f"{EXTRACTION_PROMPT_VERSION}:{EXTRACTION_MODEL}:answer:{item_hash}"
+
+
+def _get(key):
+    try:
+        return get_extraction_cache().get(key)
+    except Exception as e:
+        # The cache is an optimization - never fail an extraction because of it
+        print(f"Extraction cache unavailable: {e}")
+        return None
+
+
+def _set(key, data):
+    try:
+        get_extraction_cache().set(key, data)
+    except Exception as e:
+        print(f"Could not cache extraction: {e}")
+
+
+def get_cached_prefix(interview_data, parent_name):
+    """
+    Find the longest already-extracted beginning of an interview
+
+    Args:
+        interview_data (list): Interview Q&A with followups
+        parent_name (str): Name of the person being interviewed
+
+    Returns:
+        tuple: (number of answers covered, extracted data) - (0, None) if nothing is cached
+    """
+    hashes = transcript_hashes(interview_data, parent_name)
+    for covered in range(len(interview_data), 0, -1):
+        data = _get(_interview_key(hashes[covered]))
+        if data is not None:
+            return covered, data
+    return 0, None
+
+
+def store_interview_extraction(interview_data, parent_name, data):
+    """
+    Save the extracted data for a whole interview
+
+    Args:
+        interview_data (list): Interview Q&A with followups
+        parent_name (str): Name of the person being interviewed
+        data (dict): Extracted data
+    """
+    _set(_interview_key(transcript_hashes(interview_data, parent_name)[-1]), data)
+
+
+def get_cached_answer(item, parent_name):
+    """
+    Look up the extracted data for a single answer
+
+    Returns:
+        dict: Extracted data, or None if this answer hasn't been extracted
+    """
+    return _get(_answer_key(answer_hash(item, parent_name)))
+
+
+def store_answer_extraction(item, parent_name, data):
+    """Save the extracted data for a single answer"""
+    _set(_answer_key(answer_hash(item, parent_name)), data)
+
+
+def get_extraction_cache_stats():
+    """
+    Get extraction cache size and hit rate
+
+    Returns:
+        dict: entries, bytes, hits, misses, evictions and hit_rate
+    """
+    return get_extraction_cache().stats()
+
+
+def test_extraction_cache():
+    """Test prefix lookups for a resumed interview in a throwaway cache"""
+    import tempfile
+    global _cache
+
+    answers = [
+        {"question": "Where were you born?", "answer": "Dayton,  Ohio.", "followups": []},
+        {"question": "What did your father do?", "answer": "He worked at the tire factory.", "followups": []},
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _cache = DiskCache(os.path.join(temp_dir, "extractions.db"), max_entries=MAX_CACHED_EXTRACTIONS)
+        try:
+            store_interview_extraction(answers[:1], "Test Person", {"places": [{"location": "Dayton, Ohio"}]})
+
+            covered, data = get_cached_prefix(answers, "Test Person")
+            print(f"Resumed interview: {covered} of {len(answers)} answers cached -> {data}")
+
+            respaced = [dict(answers[0], answer="Dayton, Ohio.")]
+            print(f"Whitespace-only change still hits: {get_cached_prefix(respaced, 'Test Person')[0] == 1}")
+            print(f"Stats: {get_extraction_cache_stats()}")
+        finally:
+            _cache = None
+
+
+if __name__ == "__main__":
+    test_extraction_cache()
@@ -0,0 +1,336 @@
+"""
+Extraction Schema Module
+Shape of extracted interview data, its validator, and an incremental parser for streamed JSON
+"""
+
+import re
+import json
+
+# The extraction output. Leaf strings describe the field (and are shown to the model as the
+# example); a one-item list means "list of"; {parent_name} is filled in when prompting.
+EXTRACTION_SCHEMA = {
+    "people": [
+        {
+            "name": "Full name",
+            "relationship": "Relationship to {parent_name}",
+            "birth_date": "Date if mentioned",
+            "birth_place": "Place if mentioned",
+            "notes": "Any additional details"
+        }
+    ],
+    "places": [
+        {
+            "location": "Place name",
+            "significance": "Why this place matters",
+            "time_period": "When they lived/visited",
+            "details": "Additional context"
+        }
+    ],
+    "dates_and_events": [
+        {
+            "date": "Date or time period",
+            "event": "What happened",
+            "significance": "Why it matters",
+            "people_involved": ["Names"]
+        }
+    ],
+    "themes_and_topics": [
+        {
+            "theme": "Main topic/category",
+            "description": "What was discussed",
+            "significance": "Why this is important to preserve"
+        }
+    ],
+    "values_and_personality": [
+        {
+            "value_or_trait": "The value or personality trait",
+            "evidence": "Specific story or quote that demonstrates this",
+            "significance": "What this reveals about {parent_name}"
+        }
+    ],
+    "life_lessons": [
+        {
+            "lesson": "The wisdom or advice",
+            "context": "Story or experience it came from",
+            "quote": "Direct quote if available"
+        }
+    ],
+    "career_and_education": {
+        "education": ["Schools, degrees, studies"],
+        "jobs": [
+            {
+                "position": "Job title/role",
+                "organization": "Company/place",
+                "time_period": "When",
+                "key_learnings": "What they learned"
+            }
+        ]
+    },
+    "family_tree": {
+        "parents": [
+            {
+                "name": "Full name",
+                "birth_date": "Date if mentioned",
+                "birth_place": "Place if mentioned",
+                "notes": "Any additional details"
+            }
+        ],
+        "siblings": [
+            {
+                "name": "Full name (include nicknames in parentheses)",
+                "birth_date": "Date if mentioned",
+                "birth_place": "Place if mentioned",
+                "relationship": "older brother/younger sister/twin/etc",
+                "notes": "Any additional details"
+            }
+        ],
+        "spouse": {
+            "name": "Spouse name if mentioned",
+            "marriage_date": "Date if mentioned",
+            "notes": "Any additional details"
+        },
+        "children": [
+            {
+                "name": "Child name if mentioned",
+                "birth_date": "Date if mentioned",
+                "notes": "Any additional details"
+            }
+        ]
+    }
+}
+
+# Top-level sections, in the order the model is asked to write them
+SECTIONS = list(EXTRACTION_SCHEMA.keys())
+
+# Placeholder values the model sometimes writes instead of null
+NULL_STRINGS = {"", "not mentioned", "unknown", "n/a", "none", "null", "not specified"}
+
+
+class SchemaError(ValueError):
+    """Extracted data that can't be coerced into the schema"""
+
+
+def _compile(spec, path):
+    """Turn a schema spec into a function that validates and cleans a value"""
+    if isinstance(spec, str):
+        def check_text(value):
+            if value is None or isinstance(value, (dict, list)):
+                return None
+            text = str(value).strip()
+            return None if text.lower() in NULL_STRINGS else text
+        return check_text
+
+    if isinstance(spec, list):
+        check_item = _compile(spec[0], f"{path}[]")
+
+        def check_list(value):
+            if value is None:
+                return []
+            if isinstance(value, dict) and isinstance(spec[0], dict):
+                value = [value]
+            elif not isinstance(value, list):
+                if isinstance(spec[0], str) and isinstance(value, str):
+                    value = [value]
+                else:
+                    raise SchemaError(f"{path} should be a list")
+            cleaned = []
+            for item in value:
+                if isinstance(spec[0], dict) and not isinstance(item, dict):
+                    continue
+                item = check_item(item)
+                # Drop entries with nothing in them
+                if item not in (None, {}) and not (isinstance(item, dict) and not any(item.values())):
+                    cleaned.append(item)
+            return cleaned
+        return check_list
+
+    checks = {field: _compile(field_spec, f"{path}.{field}") for field, field_spec in spec.items()}
+
+    def check_object(value):
+        if value is None:
+            value = {}
+        if not isinstance(value, dict):
+            raise SchemaError(f"{path} should be an object")
+        return {field: check(value.get(field)) for field, check in checks.items()}
+    return check_object
+
+
+# Compiled once - one validator per top-level section
+SECTION_VALIDATORS = {section: _compile(spec, section) for section, spec in EXTRACTION_SCHEMA.items()}
+
+
+def validate_section(section, value):
+    """
+    Validate and clean one section of extracted data
+
+    Null placeholders become null, a lone record or string becomes a
+    one-item list, unknown fields and empty records are dropped.
+
+    Args:
+        section (str): Top-level section name
+        value: Parsed JSON for the section
+
+    Returns:
+        The cleaned value
+
+    Raises:
+        SchemaError: If the value can't be coerced into the schema
+    """
+    if section not in SECTION_VALIDATORS:
+        raise SchemaError(f"Unknown section '{section}'")
+    return SECTION_VALIDATORS[section](value)
+
+
+def schema_example(sections, parent_name):
+    """
+    Render the schema for some sections as the JSON example shown to the model
+
+    Args:
+        sections (list): Section names
+        parent_name (str): Name of the person being interviewed
+
+    Returns:
+        str: Indented JSON
+    """
+    example = {section: EXTRACTION_SCHEMA[section] for section in sections}
+    return json.dumps(example, indent=2, ensure_ascii=False).replace("{parent_name}", parent_name)
+
+
+def repair_json(text):
+    """
+    Fix common almost-JSON mistakes: comments, trailing commas and Python literals
+
+    Args:
+        text (str): JSON-like text
+
+    Returns:
+        str: Text with the mistakes removed (strings are left untouched)
+    """
+    out = []
+    position = 0
+    length = len(text)
+    while position < length:
+        char = text[position]
+        if char == '"':
+            end = position + 1
+            while end < length and text[end] != '"':
+                end += 2 if text[end] == '\\' else 1
+            out.append(text[position:end + 1])
+            position = end + 1
+        elif text.startswith("//", position):
+            newline = text.find("\n", position)
+            position = length if newline == -1 else newline
+        else:
+            out.append(char)
+            position += 1
+    repaired = "".join(out)
+    repaired = re.sub(r",\s*([}\]])", r"\1", repaired)
+    return re.sub(r"\b(None|True|False)\b", lambda m: {"None": "null", "True": "true", "False": "false"}[m.group(1)],
+                  repaired)
+
+
+class SectionStreamParser:
+    """
+    Pull complete top-level sections out of a JSON object while it is still streaming
+
+    Feed text as it arrives; each call returns the (section, raw JSON text)
+    pairs that finished in it. Anything before the opening brace (such as a
+    markdown fence) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+        self.expecting_key = True
+        self.key_start = None
+        self.key = None
+        self.value_start = None
+        self.finished = False
+
+    def feed(self, text):
+        """
+        Add streamed text
+
+        Args:
+            text (str): Next piece of the response
+
+        Returns:
+            list: (section name, raw value text) for sections completed by this text
+        """
+        self.buffer += text
+        completed = []
+        while self.position < len(self.buffer) and not self.finished:
+            char = self.buffer[self.position]
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self.depth = 1
+            elif self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.expecting_key and self.key_start is not None:
+                        self.key = self.buffer[self.key_start:self.position]
+                        self.key_start = None
+            elif char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expecting_key:
+                    self.key_start = self.position + 1
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                if self.depth == 1:
+                    self._end_value(completed)
+                    self.finished = True
+                self.depth -= 1
+            elif self.depth == 1:
+                if char == ":" and self.expecting_key:
+                    self.expecting_key = False
+                    self.value_start = self.position + 1
+                elif char == ",":
+                    self._end_value(completed)
+            self.position += 1
+        return completed
+
+    def _end_value(self, completed):
+        if self.key is not None and self.value_start is not None:
+            completed.append((self.key, self.buffer[self.value_start:self.position].strip()))
+        self.key = None
+        self.value_start = None
+        self.expecting_key = True
+
+
+def test_extraction_schema():
+    """Test streaming a response with one broken section"""
+    response = '```json\n{"people": [{"name": "Clint", "birth_date": "Not mentioned", "extra": 1}],\n' \
+               '"places": [{"location": "Dayton", "significance": "Home",}], // trailing comma\n' \
+               '"themes_and_topics": "Family", "family_tree": {"spouse": {"name": "Ruth"}, "children": [{"na'
+
+    parser = SectionStreamParser()
+    sections = []
+    for start in range(0, len(response), 7):
+        sections.extend(parser.feed(response[start:start + 7]))
+
+    for section, raw in sections:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = json.loads(repair_json(raw))
+            print(f"{section}: repaired")
+        try:
+            print(f"{section}: {validate_section(section, value)}")
+        except SchemaError as e:
+            print(f"{section}: invalid ({e})")
+    received = {section for section, _ in sections}
+    print(f"Still needed: {[section for section in SECTIONS if section not in received]}")
+
+
+if __name__ == "__main__":
+    test_extraction_schema()
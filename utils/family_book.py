@@ -0,0 +1,354 @@
+"""
+Family Book
+Export several interviews as one PDF with a table of contents, family tree and timeline
+"""
+
+import os
+import io
+import json
+import hashlib
+import multiprocessing
+from datetime import date, datetime
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from pypdf import PdfReader, PdfWriter
+from pdf_export import FamilyVaultPDF, render_pdf_bytes
+from pdf_cache import pdf_cache_key, content_cache_key, get_cached_pdf, store_pdf
+from profile_model import load_profile
+
+# Bump when the front matter or merge changes so cached books are rebuilt
+FAMILY_BOOK_VERSION = "book-v1"
+
+# Interview sections laid out at once (each in its own process)
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Saved interviews
+PROFILES_DIR = 'data/parent_profiles'
+
+
+class FamilyBookPDF(FamilyVaultPDF):
+    """The book's own pages (title, contents, family tree, timeline) - a plain header instead of an interview's"""
+
+    def header(self):
+        self.set_font('Arial', 'B', 16)
+        self.cell(0, 10, 'Family Book', 0, 0, 'C')
+        self.ln(15)
+
+
+# ============================================
+# SECTIONS
+# ============================================
+
+def _render_section(filepath):
+    """Lay out one interview in a worker process"""
+    with open(filepath, 'rb') as f:
+        content = f.read()
+    pdf_bytes = render_pdf_bytes(json.loads(content.decode('utf-8')))
+    if pdf_bytes is None:
+        raise RuntimeError(f"PDF generation failed for {Path(filepath).name}")
+    return content_cache_key(content), bytes(pdf_bytes)
+
+
+def get_section_pdfs(filepaths, workers=DEFAULT_WORKERS, report_progress=None):
+    """
+    Get each interview's PDF, laying out only those not already cached
+
+    Sections are the same PDFs as single-interview downloads, so they share
+    one cache and an unchanged interview is never laid out again.
+
+    Args:
+        filepaths (list): Profile paths, in book order
+        workers (int): Processes laying out sections at once
+        report_progress: Optional callback(fraction, message)
+
+    Returns:
+        list: PDF bytes per profile, in the same order
+    """
+    sections = {filepath: get_cached_pdf(filepath) for filepath in filepaths}
+    pending = [filepath for filepath, pdf_bytes in sections.items() if pdf_bytes is None]
+    if report_progress:
+        report_progress(0.1, f"Laying out {len(pending)} of {len(filepaths)} interviews...")
+
+    if len(pending) > 1 and workers > 1:
+        # Spawned, so workers don't inherit the app's threads and open databases
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=context) as executor:
+            rendered = list(executor.map(_render_section, pending))
+    else:
+        rendered = [_render_section(filepath) for filepath in pending]
+
+    for filepath, (key, pdf_bytes) in zip(pending, rendered):
+        store_pdf(key, pdf_bytes)
+        sections[filepath] = pdf_bytes
+    return [sections[filepath] for filepath in filepaths]
+
+
+# ============================================
+# FRONT MATTER
+# ============================================
+
+def _book_graph(filepaths):
+    """The family graph, limited to relationships recorded in the book's interviews"""
+    from family_graph import FamilyGraph, get_family_graph
+
+    graph = get_family_graph()
+    profile_ids = {Path(filepath).stem for filepath in filepaths}
+    return FamilyGraph({profile_id: edges for profile_id, edges in graph.edges_by_profile.items()
+                        if profile_id in profile_ids}, graph.people)
+
+
+def _book_events(parent_names):
+    """Dated events from the book's interviews, in chronological order"""
+    from timeline import get_timeline
+
+    timeline = get_timeline()
+    if timeline.first_year is None:
+        return []
+    events = timeline.between(date(timeline.first_year, 1, 1), date(timeline.last_year, 12, 31))
+    return [event for event in events if event["parent_name"] in parent_names]
+
+
+def _draw_contents(pdf, entries):
+    """Table of contents - entries are (title, page number)"""
+    pdf.chapter_title('Contents')
+    pdf.set_font('Arial', '', 11)
+    pdf.set_text_color(0, 0, 0)
+    for title, page in entries:
+        pdf.cell(160, 7, title, 0, 0, 'L')
+        pdf.cell(0, 7, str(page), 0, 1, 'R')
+
+
+def _draw_family_tree(pdf, graph):
+    """One entry per person with their recorded parents, spouses, siblings and children"""
+    pdf.chapter_title('Family Tree')
+    people = set(graph.parents) | set(graph.children) | set(graph.siblings) | set(graph.spouses)
+    if not people:
+        pdf.body_text('No family relationships recorded yet.')
+        return
+
+    for person_id in sorted(people, key=lambda person: graph.name(person).lower()):
+        relations = [("Parents", graph.parents_of(person_id)), ("Spouse", graph.spouses_of(person_id)),
+                     ("Siblings", graph.siblings_of(person_id)), ("Children", graph.children_of(person_id))]
+        pdf.set_font('Arial', 'B', 11)
+        pdf.cell(0, 6, graph.name(person_id), 0, 1)
+        pdf.set_font('Arial', '', 10)
+        for label, relatives in relations:
+            if relatives:
+                names = ", ".join(sorted(graph.name(relative) for relative in relatives))
+                pdf.multi_cell(0, 5, f'    {label}: {names}', new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(2)
+
+
+def _draw_timeline(pdf, events):
+    """Dated events grouped by decade"""
+    pdf.chapter_title('Family Timeline')
+    if not events:
+        pdf.body_text('No dated events recorded yet.')
+        return
+
+    decade = None
+    for event in events:
+        event_decade = int(event['start'][:3]) * 10
+        if event_decade != decade:
+            decade = event_decade
+            pdf.section_title(f'{decade}s')
+        pdf.set_font('Arial', 'B', 10)
+        pdf.cell(0, 5, f"  {event['date']}", 0, 1)
+        pdf.set_font('Arial', '', 10)
+        pdf.multi_cell(0, 5, f"    {event['event'] or ''} ({event['parent_name']})", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(2)
+
+
+def _title_page(title):
+    """Start a book with its title page"""
+    pdf = FamilyBookPDF(None)
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 24)
+    pdf.ln(40)
+    pdf.cell(0, 14, title, 0, 1, 'C')
+    pdf.set_font('Arial', '', 11)
+    pdf.cell(0, 6, f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M")}', 0, 1, 'C')
+    return pdf
+
+
+def _front_matter(title, contents, graph, events):
+    """
+    Lay out the title page, contents, family tree and timeline
+
+    Returns:
+        tuple: (FamilyBookPDF, {chapter title: first page number})
+    """
+    pdf = _title_page(title)
+    pdf.add_page()
+    _draw_contents(pdf, contents)
+
+    chapters = {}
+    for chapter, draw, data in (("Family Tree", _draw_family_tree, graph), ("Family Timeline", _draw_timeline, events)):
+        pdf.add_page()
+        chapters[chapter] = pdf.page_no()
+        draw(pdf, data)
+    return pdf, chapters
+
+
+# ============================================
+# BOOK
+# ============================================
+
+def _merge_book(title, parent_names, sections, graph, events):
+    """Front matter followed by the cached interview PDFs"""
+    section_pages = [len(PdfReader(io.BytesIO(pdf_bytes)).pages) for pdf_bytes in sections]
+
+    # Lay out once to measure the front matter, then again with real page numbers
+    placeholder = [(chapter, 0) for chapter in ["Family Tree", "Family Timeline"] + parent_names]
+    front, chapters = _front_matter(title, placeholder, graph, events)
+    page = front.pages_count + 1
+    starts = []
+    for pages in section_pages:
+        starts.append(page)
+        page += pages
+    contents = list(chapters.items()) + list(zip(parent_names, starts))
+    front, chapters = _front_matter(title, contents, graph, events)
+
+    writer = PdfWriter()
+    writer.append(io.BytesIO(bytes(front.output())))
+    for chapter, first_page in chapters.items():
+        writer.add_outline_item(chapter, first_page - 1)
+    for parent_name, pdf_bytes in zip(parent_names, sections):
+        writer.append(io.BytesIO(pdf_bytes), outline_item=parent_name)
+
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def build_family_book(filepaths, title="Our Family Book", workers=DEFAULT_WORKERS, report_progress=None):
+    """
+    Lay out a family book from saved interviews
+
+    Interview sections are laid out in parallel (or taken from the PDF
+    cache) and merged behind the front matter.
+
+    Args:
+        filepaths (list): Profile paths, in book order
+        title (str): Title page text
+        workers (int): Processes laying out sections at once
+        report_progress: Optional callback(fraction, message)
+
+    Returns:
+        bytes: PDF document
+    """
+    loaded = [(filepath, load_profile(filepath)) for filepath in filepaths]
+    for filepath, profile in loaded:
+        if profile is None:
+            print(f"Leaving unreadable profile out of the family book: {filepath}")
+    loaded = [(filepath, profile) for filepath, profile in loaded if profile is not None]
+    filepaths = [filepath for filepath, _ in loaded]
+    parent_names = [profile.parent_name for _, profile in loaded]
+
+    graph = _book_graph(filepaths)
+    events = _book_events(set(parent_names))
+
+    sections = get_section_pdfs(filepaths, workers, report_progress)
+    if report_progress:
+        report_progress(0.8, "Merging family book...")
+    return _merge_book(title, parent_names, sections, graph, events)
+
+
+def book_cache_key(filepaths):
+    """
+    Get the cache key for a family book of these profiles
+
+    Args:
+        filepaths (list): Profile paths, in book order
+
+    Returns:
+        str: Cache key, or None if a profile can't be read
+    """
+    keys = [pdf_cache_key(filepath) for filepath in filepaths]
+    if None in keys:
+        return None
+    digest = hashlib.sha256("\n".join(keys).encode('utf-8')).hexdigest()
+    return f"{FAMILY_BOOK_VERSION}:{digest}"
+
+
+def get_cached_book(filepaths):
+    """
+    Get the family book of these profiles, if this exact selection has been exported
+
+    Args:
+        filepaths (list): Profile paths, in book order
+
+    Returns:
+        bytes: PDF document, or None if it still needs building
+    """
+    from pdf_cache import get_pdf_cache
+
+    key = book_cache_key(filepaths)
+    if key is None:
+        return None
+    try:
+        return get_pdf_cache().get(key)
+    except Exception as e:
+        print(f"PDF cache unavailable: {e}")
+        return None
+
+
+def export_family_book(filepaths=None, workers=DEFAULT_WORKERS, report_progress=None):
+    """
+    Build (or reuse) the family book and cache it
+
+    Args:
+        filepaths (list): Profile paths, in book order (default: every saved interview)
+        workers (int): Processes laying out sections at once
+        report_progress: Optional callback(fraction, message)
+
+    Returns:
+        bytes: PDF document
+    """
+    if filepaths is None:
+        filepaths = sorted(str(path) for path in Path(PROFILES_DIR).glob('*.json'))
+
+    cached = get_cached_book(filepaths)
+    if cached is not None:
+        return cached
+
+    key = book_cache_key(filepaths)
+    book = build_family_book(filepaths, workers=workers, report_progress=report_progress)
+    if key is not None:
+        store_pdf(key, book)
+    return book
+
+
+def test_family_book():
+    """Build a small family book from throwaway profiles into a throwaway PDF cache"""
+    import json
+    import tempfile
+    import time
+    import pdf_cache
+    from disk_cache import DiskCache
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_cache._cache = DiskCache(os.path.join(temp_dir, "pdfs.db"), max_bytes=pdf_cache.MAX_CACHED_PDF_BYTES)
+        filepaths = []
+        for name, place in (("Margaret Smith", "Cleveland"), ("Walter Smith", "Dayton")):
+            filepath = os.path.join(temp_dir, f"{name.replace(' ', '_')}.json")
+            with open(filepath, 'w') as f:
+                json.dump({"parent_name": name, "interview_data": {"questions_and_answers": [
+                    {"question": "Where did you grow up?", "category": "Childhood",
+                     "answer": f"I grew up in {place}.", "followups": []}]}}, f)
+            filepaths.append(filepath)
+
+        try:
+            started = time.perf_counter()
+            book = export_family_book(filepaths, workers=2)
+            middle = time.perf_counter()
+            again = export_family_book(filepaths, workers=2)
+            finished = time.perf_counter()
+            print(f"Book: {len(book)} bytes in {1000 * (middle - started):.0f} ms, "
+                  f"cached: {1000 * (finished - middle):.1f} ms, same: {book == again}")
+        finally:
+            pdf_cache._cache = None
+
+
+if __name__ == "__main__":
+    test_family_book()
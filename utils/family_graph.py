@@ -0,0 +1,386 @@
+"""
+Family Graph Module
+One family tree across every interview, indexed for ancestor, descendant and relationship queries
+"""
+
+import os
+import json
+import tempfile
+import threading
+from collections import deque
+from entity_resolution import load_people_index, profile_id_for, PEOPLE_INDEX_PATH
+from json_store import write_json_atomic, file_lock
+
+# Where the family graph is kept
+FAMILY_GRAPH_PATH = 'data/family_graph.json'
+
+# Bump when edges are derived differently so the graph is rebuilt
+FAMILY_GRAPH_VERSION = 1
+
+# Longest relationship path searched for (in relationship steps)
+MAX_PATH_LENGTH = 8
+
+# How each relation a mention has to the interviewee becomes a directed edge.
+# Edges read "source is <relation> of target"; child/grandchild are stored reversed.
+MENTION_EDGES = {
+    "parent": ("mention", "parent", "self"),
+    "child": ("self", "parent", "mention"),
+    "sibling": ("mention", "sibling", "self"),
+    "spouse": ("mention", "spouse", "self"),
+    "grandparent": ("mention", "grandparent", "self"),
+    "grandchild": ("self", "grandparent", "mention"),
+}
+
+# Relationship paths (after grandparent steps are expanded) with a name of their own
+KINSHIP_TERMS = {
+    ("parent",): "parent", ("child",): "child", ("sibling",): "sibling", ("spouse",): "spouse",
+    ("parent", "sibling"): "aunt or uncle", ("sibling", "child"): "niece or nephew",
+    ("parent", "sibling", "child"): "cousin", ("parent", "child"): "sibling",
+    ("parent", "parent", "sibling"): "great-aunt or great-uncle",
+    ("spouse", "parent"): "parent-in-law", ("child", "spouse"): "child-in-law",
+    ("spouse", "sibling"): "sibling-in-law", ("sibling", "spouse"): "sibling-in-law",
+    ("spouse", "child"): "stepchild", ("parent", "spouse"): "step-parent",
+}
+
+_graph_lock = threading.Lock()
+_loaded = {"mtime": None, "graph": None}
+
+
+class FamilyGraph:
+    """
+    People and their family relationships, with adjacency indexes
+
+    Siblings are assumed to share parents, so a parent recorded in one
+    sibling's interview is found from the other sibling too.
+    """
+
+    def __init__(self, edges_by_profile, people):
+        self.edges_by_profile = edges_by_profile
+        self.people = people
+        self.parents = {}
+        self.children = {}
+        self.siblings = {}
+        self.spouses = {}
+        self.grandparents = {}
+        self.grandchildren = {}
+        for edges in edges_by_profile.values():
+            for source, relation, target in edges:
+                self._link(source, relation, target)
+
+    def _link(self, source, relation, target):
+        if source == target:
+            return
+        if relation == "parent":
+            self.parents.setdefault(target, set()).add(source)
+            self.children.setdefault(source, set()).add(target)
+        elif relation == "grandparent":
+            self.grandparents.setdefault(target, set()).add(source)
+            self.grandchildren.setdefault(source, set()).add(target)
+        else:
+            index = self.siblings if relation == "sibling" else self.spouses
+            index.setdefault(source, set()).add(target)
+            index.setdefault(target, set()).add(source)
+
+    def name(self, person_id):
+        """Display name of a person"""
+        return self.people.get(person_id, {}).get("name") or person_id
+
+    def parents_of(self, person_id):
+        """Parents of a person, including those recorded for their siblings"""
+        found = set(self.parents.get(person_id, ()))
+        for sibling in self.siblings.get(person_id, ()):
+            found |= self.parents.get(sibling, set())
+        return found
+
+    def children_of(self, person_id):
+        """Children of a person, including siblings of their recorded children"""
+        found = set(self.children.get(person_id, ()))
+        for child in list(found):
+            found |= self.siblings.get(child, set())
+        found.discard(person_id)
+        return found
+
+    def siblings_of(self, person_id):
+        """Siblings of a person, including other children of their parents"""
+        found = set(self.siblings.get(person_id, ()))
+        for parent in self.parents.get(person_id, ()):
+            found |= self.children.get(parent, set())
+        found.discard(person_id)
+        return found
+
+    def spouses_of(self, person_id):
+        """Spouses of a person"""
+        return set(self.spouses.get(person_id, ()))
+
+    def _generations(self, person_id, step, skip, max_generations):
+        """Breadth-first walk one or two generations at a time"""
+        found = {}
+        queue = deque([(person_id, 0)])
+        while queue:
+            current, generation = queue.popleft()
+            moves = [(other, generation + 1) for other in step(current)]
+            moves += [(other, generation + 2) for other in skip.get(current, ())]
+            for other, other_generation in moves:
+                if other == person_id or (max_generations and other_generation > max_generations):
+                    continue
+                if other not in found or other_generation < found[other]:
+                    found[other] = other_generation
+                    queue.append((other, other_generation))
+        return sorted(found.items(), key=lambda item: (item[1], self.name(item[0])))
+
+    def ancestors(self, person_id, max_generations=None):
+        """
+        Find everyone a person descends from
+
+        Args:
+            person_id (str): Person ID
+            max_generations (int): Stop after this many generations (None for all)
+
+        Returns:
+            list: (person ID, generation) - 1 for parents, 2 for grandparents...
+        """
+        return self._generations(person_id, self.parents_of, self.grandparents, max_generations)
+
+    def descendants(self, person_id, max_generations=None):
+        """
+        Find everyone descended from a person
+
+        Returns:
+            list: (person ID, generation) - 1 for children, 2 for grandchildren...
+        """
+        return self._generations(person_id, self.children_of, self.grandchildren, max_generations)
+
+    def relationship_path(self, from_id, to_id):
+        """
+        Find the shortest chain of relationships between two people
+
+        Args:
+            from_id (str): Person ID
+            to_id (str): Person ID
+
+        Returns:
+            list: (relation, person ID) steps, where each person is the relation of the
+                  one before - or None if they aren't connected
+        """
+        if from_id == to_id:
+            return []
+        previous = {from_id: None}
+        queue = deque([(from_id, 0)])
+        while queue:
+            current, length = queue.popleft()
+            if length >= MAX_PATH_LENGTH:
+                continue
+            neighbours = [("parent", other) for other in self.parents.get(current, ())]
+            neighbours += [("child", other) for other in self.children.get(current, ())]
+            neighbours += [("sibling", other) for other in self.siblings.get(current, ())]
+            neighbours += [("spouse", other) for other in self.spouses.get(current, ())]
+            neighbours += [("grandparent", other) for other in self.grandparents.get(current, ())]
+            neighbours += [("grandchild", other) for other in self.grandchildren.get(current, ())]
+            for relation, other in neighbours:
+                if other in previous:
+                    continue
+                previous[other] = (current, relation)
+                if other == to_id:
+                    path = []
+                    while previous[other] is not None:
+                        before, step = previous[other]
+                        path.append((step, other))
+                        other = before
+                    return path[::-1]
+                queue.append((other, length + 1))
+        return None
+
+
+def describe_path(path):
+    """
+    Name the relationship a path describes
+
+    Args:
+        path (list): Result of FamilyGraph.relationship_path
+
+    Returns:
+        str: e.g. "grandchild", "cousin" or "parent's sibling's spouse"
+    """
+    steps = []
+    for relation, _ in path:
+        if relation == "grandparent":
+            steps += ["parent", "parent"]
+        elif relation == "grandchild":
+            steps += ["child", "child"]
+        else:
+            steps.append(relation)
+    steps = tuple(steps)
+
+    if steps in KINSHIP_TERMS:
+        return KINSHIP_TERMS[steps]
+    if len(set(steps)) == 1 and steps[0] in ("parent", "child"):
+        return "great-" * (len(steps) - 2) + "grand" + steps[0]
+    return "'s ".join(steps)
+
+
+# ============================================
+# STORAGE
+# ============================================
+
+def profile_edges(profile_id, index):
+    """
+    Derive the family edges one interview contributes
+
+    Args:
+        profile_id (str): Profile ID
+        index (dict): People index
+
+    Returns:
+        list: [source person ID, relation, target person ID] edges
+    """
+    mentions = [mention for mention in index["mentions"] if mention["profile"] == profile_id]
+    self_ids = [mention["person_id"] for mention in mentions if mention["relation"] == "self"]
+    if not self_ids:
+        return []
+
+    edges = []
+    for mention in mentions:
+        shape = MENTION_EDGES.get(mention["relation"])
+        if not shape or not mention.get("person_id") or mention["person_id"] == self_ids[0]:
+            continue
+        ends = {"self": self_ids[0], "mention": mention["person_id"]}
+        edge = [ends[shape[0]], shape[1], ends[shape[2]]]
+        if edge not in edges:
+            edges.append(edge)
+    return edges
+
+
+def _empty_graph():
+    return {"version": FAMILY_GRAPH_VERSION, "edges": {}, "people": {}}
+
+
+def _load_graph_data(graph_path):
+    try:
+        with open(graph_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get("version") == FAMILY_GRAPH_VERSION else None
+
+
+def _refresh_people(data, index):
+    """Follow merged person IDs and refresh names from the people index"""
+    replaced = index["replaced"]
+    ids = set()
+    for profile_id, edges in data["edges"].items():
+        for edge in edges:
+            edge[0] = replaced.get(edge[0], edge[0])
+            edge[2] = replaced.get(edge[2], edge[2])
+            ids.update((edge[0], edge[2]))
+    data["people"] = {person_id: {"name": index["people"][person_id]["name"],
+                                  "birth_year": index["people"][person_id]["birth_year"]}
+                      for person_id in ids if person_id in index["people"]}
+
+
+def update_family_graph(filepath, index_path=PEOPLE_INDEX_PATH, graph_path=FAMILY_GRAPH_PATH):
+    """
+    Replace one profile's edges in the family graph
+
+    Call after the profile's people have been added to the people index.
+
+    Args:
+        filepath (str): Path of the saved profile
+        index_path (str): People index location
+        graph_path (str): Graph location
+
+    Returns:
+        int: Number of edges the profile contributes
+    """
+    index = load_people_index(index_path)
+    with _graph_lock, file_lock(graph_path):
+        data = _load_graph_data(graph_path)
+        if data is None:
+            data = _build_graph_data(index)
+        else:
+            data["edges"][profile_id_for(filepath)] = profile_edges(profile_id_for(filepath), index)
+            _refresh_people(data, index)
+        write_json_atomic(graph_path, data)
+    return len(data["edges"].get(profile_id_for(filepath), []))
+
+
+def _build_graph_data(index):
+    data = _empty_graph()
+    for profile_id in index["parent_names"]:
+        data["edges"][profile_id] = profile_edges(profile_id, index)
+    _refresh_people(data, index)
+    return data
+
+
+def rebuild_family_graph(index_path=PEOPLE_INDEX_PATH, graph_path=FAMILY_GRAPH_PATH):
+    """
+    Rebuild the family graph from every profile in the people index
+
+    Returns:
+        int: Number of people in the graph
+    """
+    with _graph_lock, file_lock(graph_path):
+        data = _build_graph_data(load_people_index(index_path))
+        write_json_atomic(graph_path, data)
+    return len(data["people"])
+
+
+def get_family_graph(graph_path=FAMILY_GRAPH_PATH, index_path=PEOPLE_INDEX_PATH):
+    """
+    Load the family graph (reused from memory until the file changes)
+
+    Returns:
+        FamilyGraph: The graph (empty if there is nothing to build it from)
+    """
+    if not os.path.exists(graph_path) and os.path.exists(index_path):
+        rebuild_family_graph(index_path, graph_path)
+    try:
+        mtime = os.path.getmtime(graph_path)
+    except OSError:
+        return FamilyGraph({}, {})
+    if _loaded["mtime"] == (graph_path, mtime):
+        return _loaded["graph"]
+
+    data = _load_graph_data(graph_path) or _empty_graph()
+    graph = FamilyGraph(data["edges"], data["people"])
+    _loaded["mtime"] = (graph_path, mtime)
+    _loaded["graph"] = graph
+    return graph
+
+
+def test_family_graph():
+    """Test kinship queries across three family members' interviews"""
+    import shutil
+    from entity_resolution import update_people_index
+
+    temp_dir = tempfile.mkdtemp()
+    index_path = os.path.join(temp_dir, "people_index.json")
+    graph_path = os.path.join(temp_dir, "family_graph.json")
+    try:
+        profiles = {
+            "Margaret_Johnson_1.json": {"parent_name": "Margaret Johnson", "extracted_data": {"family_tree": {
+                "parents": [{"name": "Walter Smith"}], "siblings": [{"name": "Ruth Smith"}],
+                "children": [{"name": "Clinton Johnson", "birth_date": "1967"}, {"name": "Anne Johnson"}]}}},
+            "Clint_Johnson_1.json": {"parent_name": "Clint Johnson", "extracted_data": {"family_tree": {
+                "parents": [{"name": "Maggie Johnson"}], "children": [{"name": "Amy Johnson"}, {"name": "Ben Johnson"}]}}},
+            "Ruth_Smith_1.json": {"parent_name": "Ruth Smith", "extracted_data": {"family_tree": {
+                "children": [{"name": "Carol Davis"}]}}},
+        }
+        for filepath, profile in profiles.items():
+            update_people_index(filepath, profile, index_path)
+            update_family_graph(filepath, index_path, graph_path)
+
+        graph = get_family_graph(graph_path, index_path)
+        margaret = next(pid for pid, person in graph.people.items() if person["name"] == "Margaret Johnson")
+        amy = next(pid for pid, person in graph.people.items() if person["name"] == "Amy Johnson")
+        carol = next(pid for pid, person in graph.people.items() if person["name"] == "Carol Davis")
+
+        print(f"Margaret's grandchildren: {[graph.name(pid) for pid, gen in graph.descendants(margaret) if gen == 2]}")
+        print(f"Amy's ancestors: {[(graph.name(pid), gen) for pid, gen in graph.ancestors(amy)]}")
+        path = graph.relationship_path(amy, carol)
+        print(f"Carol is Amy's {describe_path(path)} via {[graph.name(pid) for _, pid in path]}")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_family_graph()
@@ -0,0 +1,311 @@
+"""
+Gazetteer Module
+Normalize place names to canonical keys and index where the family lived, was born and what happened there
+"""
+
+import re
+import json
+import threading
+from json_store import ProfileIndex, PROFILES_DIR
+
+# Known places and what contains them (shipped with the app)
+GAZETTEER_PATH = 'data/gazetteer.json'
+
+# Where each profile's normalized place mentions are kept between runs
+PLACE_INDEX_PATH = 'data/place_index.json'
+
+# Bump when normalize_place or the gazetteer changes so every profile is indexed again
+PLACE_INDEX_VERSION = 2
+
+# Words in front of a place that aren't part of its name
+PLACE_FILLER = r"^(?:the|a|an|in|at|near|outside(?: of)?|downtown|just outside(?: of)?|small town (?:of|near)|city of|town of)\s+"
+
+# A town name next to these is naming a lake, river or sea ("Lake Erie", "Hudson River"), not the town
+WATER_BEFORE = r"(?:lake|loch|gulf of|bay of|sea of)\s+$"
+WATER_AFTER = r"^\s+(?:lake|river|creek|bay|sea|ocean|sound|harbou?r|pond|canal)\b"
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+class Gazetteer:
+    """Known places with their containment chain and name lookup"""
+
+    def __init__(self, places):
+        self.places = {place["key"]: place for place in places}
+        self.names = {}
+        self.codes = {}
+        for place in places:
+            for alias in [place["name"]] + place.get("aliases", []):
+                keys = self.names.setdefault(alias.lower(), [])
+                if place["key"] not in keys:
+                    keys.append(place["key"])
+            for code in place.get("codes", []):
+                self.codes.setdefault(code.upper(), []).append(place["key"])
+        # Longest names first so "new york city" wins over "new york"
+        aliases = sorted(self.names, key=len, reverse=True)
+        self.pattern = re.compile(r"(?<![\w.])(" + "|".join(re.escape(alias) for alias in aliases) + r")(?![\w])") \
+            if aliases else None
+
+    def chain(self, key):
+        """The place and everything containing it, most specific first"""
+        chain = []
+        while key:
+            chain.append(key)
+            key = self.places[key].get("parent")
+        return chain
+
+    def display_name(self, key):
+        """e.g. "Cleveland, Ohio, United States" """
+        return ", ".join(self.places[part]["name"] for part in self.chain(key))
+
+    def find(self, text):
+        """
+        Find known place names in text
+
+        Returns:
+            list: (start, end, candidate keys) for each name found
+        """
+        if self.pattern is None:
+            return []
+        lowered = text.lower()
+        found = [(match.start(), match.end(), self.names[match.group(1)])
+                 for match in self.pattern.finditer(lowered)
+                 if not re.search(WATER_BEFORE, lowered[:match.start()])
+                 and not re.search(WATER_AFTER, lowered[match.end():])]
+        # Two-letter codes only count in capitals at the end of a part ("Cleveland, OH" / "Dayton OH")
+        for match in re.finditer(r"(?:^|[\s,])([A-Z]{2})(?=\s*(?:,|$|\d))", text):
+            if match.group(1) in self.codes:
+                found.append((match.start(1), match.end(1), self.codes[match.group(1)]))
+        return found
+
+
+def get_gazetteer(path=GAZETTEER_PATH):
+    """
+    Load the gazetteer once per process
+
+    Returns:
+        Gazetteer: Known places (empty if the data file is missing)
+    """
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    places = json.load(f)["places"]
+            except Exception as e:
+                print(f"Gazetteer unavailable: {e}")
+                places = []
+            _gazetteer = Gazetteer(places)
+        return _gazetteer
+
+
+def _slug(text):
+    return re.sub(r"[^\w]+", "-", text.lower()).strip("-")
+
+
+def normalize_place(text, gazetteer=None):
+    """
+    Turn a place as written into a canonical key
+
+    "Cleveland, Ohio", "Cleveland OH" and "cleveland" all become
+    "us/ohio/cleveland". A street or neighbourhood the gazetteer doesn't know
+    becomes a child of the known place it's in ("Maple Street, Cleveland" ->
+    "us/ohio/cleveland/maple-street"), as does a town it doesn't know inside a
+    region it does ("Paris, Texas" -> "us/texas/paris"); a name that is ambiguous
+    on its own ("Springfield") or unknown is keyed by its text.
+
+    Args:
+        text (str): Place as written
+        gazetteer (Gazetteer): Known places (the shipped one by default)
+
+    Returns:
+        dict: key, name (display), known (gazetteer key or None) and ancestors (keys
+              containing it, most specific first) - or None for empty text
+    """
+    gazetteer = gazetteer or get_gazetteer()
+    text = re.sub(r"\s+", " ", str(text or "")).strip(" ,.")
+    if not text:
+        return None
+
+    found = gazetteer.find(text)
+    best = None
+    unlisted = False
+    if found:
+        # The candidate whose containment chain explains the most names in the text
+        scored = {}
+        for _, _, keys in found:
+            for key in keys:
+                chain = set(gazetteer.chain(key))
+                covered = sum(1 for _, _, other_keys in found if chain & set(other_keys))
+                scored[key] = (covered, len(chain))
+        top = max(scored.values())
+        leaders = [key for key, score in scored.items() if score == top]
+        if len(leaders) > 1:
+            # Same name at the same level in different places - only resolve if one contains the rest
+            leaders = [key for key in leaders if all(other in gazetteer.chain(key) for other in leaders)]
+        best = leaders[0] if len(leaders) == 1 else None
+
+        if best is None:
+            # Places written most specific first, so the last one named contains the rest - "Paris, Texas"
+            # is a Paris the gazetteer doesn't know, inside Texas (not the Paris in France)
+            last = max(found, key=lambda match: match[0])
+            if last[0] > 0 and len(last[2]) == 1:
+                best = last[2][0]
+                unlisted = True
+
+    if best is None:
+        key = _slug(text)
+        return {"key": key, "name": text, "known": None, "ancestors": []}
+
+    # A separate part before the first known name is somewhere inside it ("Maple Street, Cleveland")
+    first_known = min(start for start, _, keys in found if set(keys) & set(gazetteer.chain(best)))
+    prefix = text[:first_known].rstrip()
+    local = re.sub(PLACE_FILLER, "", prefix.strip(" ,"), flags=re.IGNORECASE) \
+        if prefix.endswith(",") or unlisted else ""
+    chain = gazetteer.chain(best)
+    if local and _slug(local):
+        return {"key": f"{best}/{_slug(local)}", "name": f"{local}, {gazetteer.display_name(best)}",
+                "known": best, "ancestors": chain}
+    return {"key": best, "name": gazetteer.display_name(best), "known": best, "ancestors": chain[1:]}
+
+
+# ============================================
+# PLACE INDEX
+# ============================================
+
+def profile_places(profile, gazetteer=None):
+    """
+    Normalize every place mentioned in one profile's extracted data
+
+    Args:
+        profile (Profile): Saved interview
+
+    Returns:
+        list: Mentions - key, ancestors, place, text, kind ("lived"/"born"/"event"), person, detail
+    """
+    gazetteer = gazetteer or get_gazetteer()
+    extracted = profile.extracted
+    if not extracted:
+        return []
+
+    mentions = []
+    seen = set()
+
+    def add(text, kind, person, detail):
+        place = normalize_place(text, gazetteer)
+        # The same person is often in both people and family_tree
+        if place and (place["key"], kind, person, detail) not in seen:
+            seen.add((place["key"], kind, person, detail))
+            mentions.append({"key": place["key"], "ancestors": place["ancestors"], "place": place["name"],
+                             "text": text, "kind": kind, "person": person, "detail": detail})
+
+    for place in extracted.places:
+        detail = ", ".join(part for part in (place.get('significance'), place.get('time_period')) if part)
+        add(place.get('location'), "lived", profile.parent_name, detail)
+
+    family = extracted.family_tree
+    members = extracted.people + family['parents'] + family['siblings'] + family['children']
+    if family['spouse']:
+        members.append(family['spouse'])
+    for person in members:
+        if person.get('birth_place') and person.get('name'):
+            add(person['birth_place'], "born", person['name'], person.get('birth_date') or "")
+
+    # Events name places in passing - only count names the gazetteer resolves on their own
+    for event in extracted.dates_and_events:
+        text = event.get('event') or ""
+        for start, end, keys in gazetteer.find(text):
+            if len(keys) == 1:
+                people = ", ".join(event.get('people_involved') or []) or profile.parent_name
+                add(text[start:end], "event", people, f"{event.get('date') or 'Undated'}: {text}")
+    return mentions
+
+
+def _aggregate(profiles):
+    """Inverted indexes: place key (and every place containing it) -> mentions and counts, person -> mentions"""
+    places = {}
+    people = {}
+    for path, entry in profiles.items():
+        for mention in entry["mentions"]:
+            mention = dict(mention, parent_name=entry["parent_name"])
+            people.setdefault(mention["person"].lower(), []).append(mention)
+            for key in [mention["key"]] + mention["ancestors"]:
+                place = places.setdefault(key, {"mentions": [], "people": set(), "interviews": set()})
+                place["mentions"].append(mention)
+                place["people"].add(mention["person"])
+                place["interviews"].add(entry["parent_name"])
+    for place in places.values():
+        place["people"] = sorted(place["people"])
+        place["interviews"] = sorted(place["interviews"])
+        place["counts"] = {"mentions": len(place["mentions"]), "people": len(place["people"]),
+                           "interviews": len(place["interviews"])}
+    return {"places": places, "people": people}
+
+
+def _place_entry(profile):
+    return {"parent_name": profile.parent_name if profile else "Unknown",
+            "mentions": profile_places(profile) if profile else []}
+
+
+_index = ProfileIndex(PLACE_INDEX_VERSION, _place_entry, _aggregate, "place index")
+
+
+def get_place_index(profiles_dir=PROFILES_DIR, index_path=PLACE_INDEX_PATH):
+    """
+    Get the place index across every saved interview
+
+    Only profiles that changed since the index was last saved are
+    normalized again, and the aggregated index is reused until one does.
+
+    Returns:
+        dict: "places" (place key -> mentions, people, interviews and counts) and
+              "people" (lowercase name -> their mentions)
+    """
+    return _index.get(profiles_dir, index_path)
+
+
+def find_place(text, index=None):
+    """
+    Look up a place in the index
+
+    Args:
+        text (str): Place as written, e.g. "Ohio" or "Cleveland OH"
+        index (dict): Place index (the current one by default)
+
+    Returns:
+        dict: The place's mentions, people, interviews and counts, or None if nobody is linked to it
+    """
+    index = get_place_index() if index is None else index
+    place = normalize_place(text)
+    return index["places"].get(place["key"]) if place else None
+
+
+def test_gazetteer():
+    """Test normalization and a roll-up from city to state"""
+    from profile_model import Profile
+
+    for text in ["Cleveland, Ohio", "Cleveland OH", "cleveland", "Maple Street, Cleveland, Ohio", "New York",
+                 "Springfield", "Springfield, Illinois", "a farm outside Dayton", "Naples, Italy", "Tulsa, Oklahoma",
+                 "Paris, Texas", "Paris TX", "Paris, France", "Our house near Lake Erie", "Erie, Pennsylvania"]:
+        place = normalize_place(text)
+        print(f"{text!r:>34} -> {place['key']:<34} {place['name']}")
+
+    profile = Profile.from_dict({
+        "parent_name": "Margaret Johnson",
+        "metadata": {"schema_version": 2},
+        "extracted_data": {
+            "places": [{"location": "Maple Street, Cleveland", "significance": "Childhood home", "time_period": "1946-1966"}],
+            "people": [{"name": "Walter Smith", "relationship": "Father", "birth_place": "Dayton OH"}],
+            "dates_and_events": [{"date": "1967", "event": "Moved to Columbus for Robert's job"}]
+        }
+    })
+    index = _aggregate({"margaret.json": {"parent_name": profile.parent_name, "mentions": profile_places(profile)}})
+    ohio = index["places"]["us/ohio"]
+    print(f"Ohio: {ohio['counts']} people={ohio['people']}")
+    for mention in ohio["mentions"]:
+        print(f"  {mention['kind']:<6} {mention['person']:<17} {mention['place']}")
+
+
+if __name__ == "__main__":
+    test_gazetteer()
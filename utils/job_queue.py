@@ -0,0 +1,431 @@
+"""
+Job Queue Module
+Persistent SQLite-backed background jobs for slow tasks (voice cloning, extraction, PDF export)
+"""
+
+import os
+import json
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+# Default location of the job database (shared by all sessions)
+JOBS_DB_PATH = 'data/jobs.db'
+
+# Number of worker threads (jobs are mostly waiting on API calls)
+DEFAULT_WORKERS = 2
+
+# How many times a failed job is retried before giving up
+DEFAULT_MAX_RETRIES = 2
+
+# Delay before a retry, multiplied by the attempt number
+RETRY_BACKOFF_SECONDS = 5
+
+# How often idle workers check for retries or jobs queued by other processes
+POLL_INTERVAL_SECONDS = 1.0
+
+# Job statuses
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    job_type TEXT NOT NULL,
+    subject TEXT,
+    idempotency_key TEXT UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_retries INTEGER NOT NULL,
+    owner TEXT,
+    run_after REAL NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, run_after);
+CREATE INDEX IF NOT EXISTS idx_jobs_subject ON jobs (job_type, subject);
+"""
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _row_to_job(row):
+    """Convert a jobs table row into a plain dict"""
+    if row is None:
+        return None
+    job = dict(row)
+    job['payload'] = json.loads(job['payload']) if job['payload'] else None
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+
+class JobQueue:
+    """Persistent job queue with worker threads, retries and idempotency keys"""
+
+    def __init__(self, db_path=JOBS_DB_PATH, num_workers=DEFAULT_WORKERS):
+        self.db_path = db_path
+        self.num_workers = num_workers
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers = {}
+        self._workers = []
+        self._wakeup = threading.Condition()
+        self._stopping = False
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One transaction (committed, or rolled back on error) on a connection that is always closed
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+
+    def register(self, job_type, handler):
+        """
+        Register the function that runs jobs of a given type
+
+        Args:
+            job_type (str): Job type name
+            handler (callable): handler(payload, report_progress) -> JSON-serializable result.
+                report_progress(progress: float 0-1, message: str, result=None) updates job
+                status; a result passed here is kept if the job then fails, and a retry of
+                the job gets it back as payload['previous_result'] (for work that mustn't
+                be done twice).
+        """
+        self._handlers[job_type] = handler
+
+    def start(self):
+        """Recover jobs orphaned by a dead process and start worker threads"""
+        if self._workers:
+            return
+        self._recover_orphaned_jobs()
+        self._stopping = False
+        for idx in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{idx}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout=5):
+        """Ask worker threads to exit after their current job"""
+        self._stopping = True
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def enqueue(self, job_type, payload, idempotency_key=None, subject=None, max_retries=DEFAULT_MAX_RETRIES):
+        """
+        Add a job to the queue
+
+        If a job with the same idempotency key already exists it is reused
+        (failed jobs are re-queued) instead of creating a duplicate.
+
+        Args:
+            job_type (str): Registered job type
+            payload (dict): JSON-serializable job arguments
+            idempotency_key (str): Optional key identifying identical work
+            subject (str): Optional thing the job is about (e.g. a profile path), for lookups
+            max_retries (int): Retries allowed after the first failed attempt
+
+        Returns:
+            str: Job ID
+        """
+        job_id = uuid.uuid4().hex
+        now = _now()
+
+        with self._connect() as conn:
+            if idempotency_key:
+                existing = conn.execute(
+                    "SELECT id, status FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+                if existing:
+                    if existing['status'] == STATUS_FAILED:
+                        conn.execute(
+                            "UPDATE jobs SET status = ?, attempts = 0, error = NULL, progress = 0, "
+                            "message = NULL, run_after = ?, updated_at = ? WHERE id = ?",
+                            (STATUS_QUEUED, time.time(), now, existing['id'])
+                        )
+                        self._notify()
+                    return existing['id']
+
+            conn.execute(
+                "INSERT INTO jobs (id, job_type, subject, idempotency_key, payload, status, max_retries, "
+                "run_after, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, job_type, subject, idempotency_key, json.dumps(payload), STATUS_QUEUED,
+                 max_retries, time.time(), now, now)
+            )
+
+        self._notify()
+        return job_id
+
+    def requeue(self, job_id):
+        """
+        Run a finished job again (e.g. when its output file was cleaned up)
+
+        It becomes the latest job for its subject again, as if just enqueued.
+
+        Args:
+            job_id (str): Job ID
+        """
+        now = _now()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, error = NULL, result = NULL, progress = 0, "
+                "message = NULL, run_after = ?, created_at = ?, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                (STATUS_QUEUED, time.time(), now, now, job_id, *FINISHED_STATUSES)
+            )
+        self._notify()
+
+    def get_job(self, job_id):
+        """
+        Get the current state of a job
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            dict: Job record, or None if not found
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row)
+
+    def get_latest_job(self, job_type, subject):
+        """
+        Get the most recently created job of a type for a subject
+
+        Args:
+            job_type (str): Job type
+            subject (str): Subject passed to enqueue()
+
+        Returns:
+            dict: Job record, or None if not found
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE job_type = ? AND subject = ? ORDER BY created_at DESC LIMIT 1",
+                (job_type, subject)
+            ).fetchone()
+        return _row_to_job(row)
+
+    def find_job(self, idempotency_key):
+        """
+        Get the job enqueued under an idempotency key, without queuing it again
+
+        Args:
+            idempotency_key (str): Key passed to enqueue()
+
+        Returns:
+            dict: Job record, or None if not found
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+        return _row_to_job(row)
+
+    def list_jobs(self, status=None, limit=50):
+        """
+        List recent jobs, newest first
+
+        Args:
+            status (str): Optional status filter
+            limit (int): Maximum number of jobs
+
+        Returns:
+            list: Job records
+        """
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def wait(self, job_id, timeout=None, poll_interval=0.2):
+        """
+        Block until a job finishes (for scripts and tests, not the UI)
+
+        Args:
+            job_id (str): Job ID
+            timeout (float): Seconds to wait, or None for no limit
+
+        Returns:
+            dict: Final job record, or the current one if the timeout expired
+        """
+        deadline = time.time() + timeout if timeout else None
+        while True:
+            job = self.get_job(job_id)
+            if job is None or job['status'] in FINISHED_STATUSES:
+                return job
+            if deadline and time.time() >= deadline:
+                return job
+            time.sleep(poll_interval)
+
+    def _notify(self):
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def _recover_orphaned_jobs(self):
+        """Re-queue jobs left 'running' by processes on this host that no longer exist"""
+        hostname = socket.gethostname()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, owner FROM jobs WHERE status = ?", (STATUS_RUNNING,)).fetchall()
+            for row in rows:
+                owner_host, _, owner_pid = (row['owner'] or '').rpartition(':')
+                if owner_host != hostname or row['owner'] == self.owner:
+                    continue
+                if owner_pid.isdigit() and _process_alive(int(owner_pid)):
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, message = ?, run_after = ?, updated_at = ? "
+                    "WHERE id = ? AND status = ?",
+                    (STATUS_QUEUED, "Resumed after restart", time.time(), _now(), row['id'], STATUS_RUNNING)
+                )
+
+    def _claim_next(self):
+        """Atomically take the next runnable job this process has a handler for"""
+        if not self._handlers:
+            return None
+
+        placeholders = ",".join("?" for _ in self._handlers)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"SELECT * FROM jobs WHERE status = ? AND run_after <= ? AND job_type IN ({placeholders}) "
+                f"ORDER BY created_at LIMIT 1",
+                (STATUS_QUEUED, time.time(), *self._handlers.keys())
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (STATUS_RUNNING, self.owner, _now(), row['id'])
+            )
+            conn.execute("COMMIT")
+
+        job = _row_to_job(row)
+        job['attempts'] += 1
+        return job
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = _now()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _worker_loop(self):
+        while not self._stopping:
+            try:
+                job = self._claim_next()
+            except sqlite3.Error as e:
+                print(f"Job queue error: {e}")
+                job = None
+
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(POLL_INTERVAL_SECONDS)
+                continue
+
+            self._run_job(job)
+
+    def _run_job(self, job):
+        handler = self._handlers[job['job_type']]
+
+        def report_progress(progress, message=None, result=None):
+            fields = {"progress": max(0.0, min(1.0, float(progress))), "message": message}
+            if result is not None:
+                fields["result"] = json.dumps(result)
+            self._update(job['id'], **fields)
+
+        payload = job['payload']
+        if job['result'] is not None:
+            # Saved by an earlier attempt that then failed
+            payload = dict(payload, previous_result=job['result'])
+
+        try:
+            result = handler(payload, report_progress)
+            self._update(job['id'], status=STATUS_SUCCEEDED, progress=1.0,
+                         result=json.dumps(result), error=None, owner=None)
+        except Exception as e:
+            error_msg = str(e) or e.__class__.__name__
+            print(f"Job {job['job_type']} ({job['id']}) failed: {error_msg}")
+            print(traceback.format_exc())
+
+            if job['attempts'] <= job['max_retries']:
+                self._update(job['id'], status=STATUS_QUEUED, error=error_msg, owner=None,
+                             message=f"Retrying after error: {error_msg}",
+                             run_after=time.time() + RETRY_BACKOFF_SECONDS * job['attempts'])
+            else:
+                self._update(job['id'], status=STATUS_FAILED, error=error_msg, owner=None)
+
+
+def _process_alive(pid):
+    """Check whether a local process ID is still running"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def test_job_queue():
+    """Test the queue with a temporary database"""
+    import tempfile
+
+    db_path = os.path.join(tempfile.mkdtemp(), "jobs.db")
+    queue = JobQueue(db_path, num_workers=2)
+
+    calls = {"count": 0}
+
+    def flaky(payload, report_progress):
+        calls["count"] += 1
+        report_progress(0.5, "Halfway")
+        if calls["count"] == 1:
+            raise RuntimeError("Temporary failure")
+        return {"doubled": payload["value"] * 2}
+
+    queue.register("double", flaky)
+    queue.start()
+
+    job_id = queue.enqueue("double", {"value": 21}, idempotency_key="double:21")
+    duplicate_id = queue.enqueue("double", {"value": 21}, idempotency_key="double:21")
+    print(f"Idempotent enqueue: {'✅' if job_id == duplicate_id else '❌'}")
+
+    job = queue.wait(job_id, timeout=15)
+    print(f"Status: {job['status']} after {job['attempts']} attempt(s)")
+    print(f"Result: {job['result']}")
+    queue.stop()
+
+
+if __name__ == "__main__":
+    test_job_queue()
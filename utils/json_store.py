@@ -0,0 +1,216 @@
+"""
+JSON Store Module
+Atomic JSON files, locks shared between processes, and indexes derived per saved profile that only refresh the profiles that changed
+"""
+
+import os
+import json
+import tempfile
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows - file_lock only serializes threads of this process
+    fcntl = None
+
+# Saved interviews
+PROFILES_DIR = 'data/parent_profiles'
+
+
+def write_json_atomic(path, data, indent=None, unless_changed_since=None):
+    """
+    Write JSON so readers never see a half-written file
+
+    Args:
+        path (str): Destination file
+        data: JSON-serializable value
+        indent (int): Pretty-print indent (None = compact)
+        unless_changed_since (os.stat_result): Skip the write if the file's
+            mtime or size no longer matches this (it changed since it was read)
+
+    Returns:
+        bool: True if written, False if skipped because the file changed
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+        if unless_changed_since is not None:
+            current = os.stat(path)
+            if ((current.st_mtime_ns, current.st_size)
+                    != (unless_changed_since.st_mtime_ns, unless_changed_since.st_size)):
+                os.remove(temp_path)
+                return False
+        os.replace(temp_path, path)
+        return True
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive lock on a file across processes
+
+    For read-modify-write of a shared file (the people index, the family
+    graph) while the app and a command-line tool like reextract_vault.py both
+    run. The lock is taken on "<path>.lock" so the file itself can still be
+    replaced atomically.
+
+    Args:
+        path (str): File being updated
+    """
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def profile_signatures(profiles_dir=PROFILES_DIR):
+    """
+    Get the (mtime, size) of every saved profile
+
+    Args:
+        profiles_dir (str): Folder of saved profiles
+
+    Returns:
+        dict: Profile path -> [mtime_ns, size]
+    """
+    stats = {}
+    for path in Path(profiles_dir).glob('*.json'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        stats[str(path)] = [stat.st_mtime_ns, stat.st_size]
+    return stats
+
+
+class ProfileIndex:
+    """
+    An index with one entry per saved profile, persisted to JSON
+
+    Only profiles whose mtime or size changed since the index was saved are
+    read again, and the finished index is reused until any profile changes.
+    """
+
+    def __init__(self, version, build_entry, finalize, label):
+        """
+        Args:
+            version (int): Bump to rebuild every entry (e.g. when build_entry changes)
+            build_entry: function(Profile or None) -> dict stored for that profile
+            finalize: function({path: entry}) -> the value get() returns
+            label (str): Name used in error messages
+        """
+        self.version = version
+        self.build_entry = build_entry
+        self.finalize = finalize
+        self.label = label
+        self._lock = threading.Lock()
+        self._loaded = {"key": None, "value": None}
+
+    def _load(self, index_path):
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {"version": self.version, "profiles": {}}
+        if index.get("version") != self.version:
+            return {"version": self.version, "profiles": {}}
+        return index
+
+    def get(self, profiles_dir, index_path):
+        """
+        Get the index, refreshing entries for profiles that changed
+
+        Args:
+            profiles_dir (str): Folder of saved profiles
+            index_path (str): Where the per-profile entries are persisted
+
+        Returns:
+            Whatever finalize() builds from the entries
+        """
+        from profile_model import load_profile
+
+        stats = profile_signatures(profiles_dir)
+        key = (profiles_dir, index_path, tuple(sorted((path, tuple(stat)) for path, stat in stats.items())))
+
+        with self._lock:
+            if self._loaded["key"] == key:
+                return self._loaded["value"]
+
+            index = self._load(index_path)
+            changed = False
+            for path in list(index["profiles"]):
+                if path not in stats:
+                    del index["profiles"][path]
+                    changed = True
+            for path, stat in stats.items():
+                entry = index["profiles"].get(path)
+                if entry and entry["signature"] == stat:
+                    continue
+                index["profiles"][path] = dict(self.build_entry(load_profile(path)), signature=stat)
+                changed = True
+            if changed:
+                try:
+                    write_json_atomic(index_path, index)
+                except Exception as e:
+                    print(f"Could not save {self.label}: {e}")
+
+            value = self.finalize(index["profiles"])
+            self._loaded["key"] = key
+            self._loaded["value"] = value
+            return value
+
+
+def test_json_store():
+    """Test that only changed profiles are rebuilt"""
+    from profile_model import PROFILE_SCHEMA_VERSION
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        profiles_dir = os.path.join(temp_dir, "profiles")
+        index_path = os.path.join(temp_dir, "index.json")
+        # Current schema version, so reading them doesn't migrate and rewrite them
+        metadata = {"schema_version": PROFILE_SCHEMA_VERSION}
+        for name in ("Margaret Smith", "Walter Smith"):
+            write_json_atomic(os.path.join(profiles_dir, f"{name.split()[0]}.json"),
+                              {"parent_name": name, "metadata": metadata})
+
+        built = []
+
+        def build_entry(profile):
+            built.append(profile.parent_name)
+            return {"name": profile.parent_name}
+
+        index = ProfileIndex(1, build_entry, lambda entries: sorted(entry["name"] for entry in entries.values()),
+                             "test index")
+        print(f"First: {index.get(profiles_dir, index_path)}, built {built}")
+        built.clear()
+        write_json_atomic(os.path.join(profiles_dir, "Walter.json"),
+                          {"parent_name": "Walter Smith Sr.", "metadata": metadata}, indent=2)
+        print(f"After one edit: {index.get(profiles_dir, index_path)}, built {built}")
+
+        path = os.path.join(profiles_dir, "Margaret.json")
+        stale = os.stat(path)
+        write_json_atomic(path, {"parent_name": "Margaret Johnson"}, indent=4)
+        print(f"Write over a changed file skipped: {not write_json_atomic(path, {}, unless_changed_since=stale)}")
+
+        with file_lock(index_path):
+            print(f"Locked: {os.path.exists(index_path + '.lock')}")
+
+
+if __name__ == "__main__":
+    test_json_store()
@@ -0,0 +1,215 @@
+"""
+Language Detection Module
+Fast local language identification for transcripts (no API calls)
+"""
+
+import re
+import unicodedata
+
+# Script -> language for languages with their own writing system
+SCRIPT_LANGUAGES = {
+    "HANGUL": "ko",
+    "ARABIC": "ar",
+    "HEBREW": "he",
+    "GREEK": "el",
+    "CYRILLIC": "ru",
+    "DEVANAGARI": "hi",
+    "CJK": "zh",
+}
+
+# Most frequent function words of each Latin-script language
+STOPWORDS = {
+    "en": "the and was were that with for have had this they there when from what would my we i it of to in is".split(),
+    "es": "el la los las que de y en un una por con para del se mi mis era fue muy pero cuando yo es".split(),
+    "fr": "le la les et est que un une des du dans pour pas avec je mon ma mes nous était il elle qui".split(),
+    "de": "der die das und ist ich nicht mit ein eine den dem war wir mein meine auch auf für sie es zu".split(),
+    "it": "il la che di e un una per non con sono era mio mia gli del della nel io anche ho".split(),
+    "pt": "o a os as que de e um uma para com não do da em eu meu minha era foi muito mas".split(),
+    "nl": "de het een en van is dat niet ik was mijn met op voor zijn er ze wij hij maar".split(),
+    "pl": "i w nie na że się z do to jest jak był była mój moja ale tak mnie ja przez".split(),
+    "sv": "och att det som en är på för med jag var inte har min mitt till av de vi".split(),
+    "no": "og at det som en er på for med jeg var ikke har min mitt til av de vi ble".split(),
+    "da": "og at det som en er på for med jeg var ikke har min mit til af de vi blev".split(),
+    "fi": "ja on että oli ei se hän minä mutta kun niin myös olen minun meidän ole".split(),
+    "tr": "ve bir bu da de için ile ben çok ama gibi olarak benim annem babam var".split(),
+    "vi": "và là của có không tôi một những được cho người với này khi đã".split(),
+}
+
+# Letters that only (or mostly) occur in one language's spelling
+DISTINCTIVE_LETTERS = {
+    "es": "ñ¿¡",
+    "pt": "ãõ",
+    "de": "ß",
+    "pl": "łżźśćńę",
+    "tr": "ğışİ",
+    "vi": "ơưạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹđ",
+    "fr": "œç",
+    "da": "ø",
+    "no": "ø",
+    "sv": "å",
+}
+
+# Whisper reports detected languages by name - map them to codes
+LANGUAGE_NAMES = {
+    "english": "en", "spanish": "es", "french": "fr", "german": "de", "italian": "it",
+    "portuguese": "pt", "chinese": "zh", "japanese": "ja", "korean": "ko", "arabic": "ar",
+    "hindi": "hi", "russian": "ru", "vietnamese": "vi", "polish": "pl", "dutch": "nl",
+    "greek": "el", "hebrew": "he", "turkish": "tr", "swedish": "sv", "norwegian": "no",
+    "nynorsk": "no", "danish": "da", "finnish": "fi",
+}
+
+# Fraction of letters in a non-Latin script needed to call the language from the script alone
+SCRIPT_THRESHOLD = 0.3
+
+# Too few words to say anything useful
+MIN_WORDS = 3
+
+# Below this a detected language is a guess (short answers, names, a tie between languages) - don't act on it
+MIN_LANGUAGE_CONFIDENCE = 0.1
+
+_STOPWORD_SETS = {language: set(words) for language, words in STOPWORDS.items()}
+
+
+def normalize_language(language):
+    """
+    Convert a language name or code to a two-letter code
+
+    Args:
+        language (str): e.g. "Spanish", "spanish" or "es"
+
+    Returns:
+        str: Two-letter code, or None if unknown
+    """
+    if not language:
+        return None
+    language = language.strip().lower()
+    if language in LANGUAGE_NAMES:
+        return LANGUAGE_NAMES[language]
+    # Interview language options such as "Chinese (Simplified)"
+    base = language.split(" (")[0]
+    if base in LANGUAGE_NAMES:
+        return LANGUAGE_NAMES[base]
+    if len(language) == 2 or (len(language) > 2 and language[2] in "-_"):
+        return language[:2]
+    return None
+
+
+def _script_counts(text):
+    """Count letters per writing system"""
+    counts = {}
+    letters = 0
+    for char in text:
+        if not char.isalpha():
+            continue
+        letters += 1
+        name = unicodedata.name(char, "")
+        if name.startswith(("HIRAGANA", "KATAKANA")):
+            script = "KANA"
+        elif name.startswith("CJK"):
+            script = "CJK"
+        else:
+            script = name.split(" ")[0]
+        counts[script] = counts.get(script, 0) + 1
+    return counts, letters
+
+
+def detect_language(text):
+    """
+    Guess the language of a piece of text
+
+    Non-Latin scripts are identified by their characters; Latin-script
+    languages by their most common words and distinctive letters.
+
+    Args:
+        text (str): Text to identify (a transcript or part of one)
+
+    Returns:
+        tuple: (language code or None, confidence 0-1)
+    """
+    if not text or not text.strip():
+        return None, 0.0
+
+    counts, letters = _script_counts(text)
+    if letters == 0:
+        return None, 0.0
+
+    # Any kana means Japanese (Japanese text mixes kana with CJK ideographs)
+    if counts.get("KANA", 0) / float(letters) > 0.05:
+        return "ja", min(1.0, (counts.get("KANA", 0) + counts.get("CJK", 0)) / float(letters))
+    for script, language in SCRIPT_LANGUAGES.items():
+        share = counts.get(script, 0) / float(letters)
+        if share >= SCRIPT_THRESHOLD:
+            return language, share
+
+    words = re.findall(r"[^\W\d_]+", text.lower())
+    if len(words) < MIN_WORDS:
+        return None, 0.0
+
+    lowered = text.lower()
+    scores = {}
+    for language, stopwords in _STOPWORD_SETS.items():
+        hits = sum(1 for word in words if word in stopwords)
+        bonus = sum(lowered.count(char) for char in DISTINCTIVE_LETTERS.get(language, ""))
+        scores[language] = (hits + 2 * bonus) / float(len(words))
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    best, best_score = ranked[0]
+    if best_score == 0:
+        return None, 0.0
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    confidence = min(1.0, best_score) * (1.0 - runner_up / best_score)
+    return best, round(confidence, 3)
+
+
+def should_translate(mode, expected_language, confidence=1.0):
+    """
+    Decide whether a recording should go to the translation endpoint
+
+    In auto mode an unsure guess transcribes as spoken - that text can
+    still be translated afterwards, but translating English by mistake
+    can't be undone.
+
+    Args:
+        mode (str): "auto" (English transcripts, translating only non-English speech),
+                    "translate" (always) or "original" (never)
+        expected_language (str): Language the speaker is expected to use (code or name)
+        confidence (float): How sure detect_language was of expected_language
+                            (1.0 when the interviewer chose it)
+
+    Returns:
+        bool: True to translate to English, False to transcribe as spoken
+    """
+    if mode == "translate":
+        return True
+    if mode == "original":
+        return False
+    language = normalize_language(expected_language)
+    return language is not None and language != "en" and confidence >= MIN_LANGUAGE_CONFIDENCE
+
+
+def test_language_detect():
+    """Test detection on short samples"""
+    samples = [
+        "My father worked at the tire factory and we lived near the river.",
+        "Mi padre trabajaba en la fábrica y vivíamos cerca del río con mis abuelos.",
+        "Mon père travaillait à l'usine et nous habitions près de la rivière.",
+        "Mein Vater arbeitete in der Fabrik und wir wohnten am Fluss.",
+        "Mój ojciec pracował w fabryce, a my mieszkaliśmy nad rzeką.",
+        "Мой отец работал на заводе, и мы жили у реки.",
+        "私の父は工場で働いていました。",
+        "我父亲在工厂工作，我们住在河边。",
+        "아버지는 공장에서 일하셨습니다.",
+        "Ok",
+    ]
+    for sample in samples:
+        language, confidence = detect_language(sample)
+        print(f"{language or '??':>3} ({confidence:.2f})  {sample}")
+
+    print(f"Auto, Spanish interview -> translate: {should_translate('auto', 'Spanish')}")
+    print(f"Auto, English speaker   -> translate: {should_translate('auto', 'en')}")
+    print(f"Auto, unsure Spanish    -> translate: {should_translate('auto', 'es', 0.1)}")
+    print(f"Whisper 'spanish' -> {normalize_language('spanish')}")
+
+
+if __name__ == "__main__":
+    test_language_detect()
@@ -0,0 +1,173 @@
+"""
+PDF Cache
+Generated interview PDFs, laid out once per profile content hash and served from a size-bounded cache
+"""
+
+import os
+import hashlib
+import threading
+from disk_cache import DiskCache, CACHE_DIR
+
+# Cache database for generated PDFs
+PDF_CACHE_PATH = f'{CACHE_DIR}/pdfs.db'
+
+# PDFs are the largest cached artifacts - bound the cache by size, not count
+MAX_CACHED_PDF_BYTES = 256 * 1024 * 1024
+
+# Bump when pdf_export's layout changes so old PDFs are regenerated
+PDF_TEMPLATE_VERSION = "pdf-v1"
+
+_cache = None
+
+# Cache keys of profiles already hashed in this process, by profile path -> (mtime, size, key)
+_keys = {}
+_keys_lock = threading.Lock()
+
+
+def get_pdf_cache():
+    """
+    Get the shared PDF cache
+
+    Returns:
+        DiskCache: Cache of generated PDF bytes
+    """
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(PDF_CACHE_PATH, max_bytes=MAX_CACHED_PDF_BYTES)
+    return _cache
+
+
+def content_cache_key(content):
+    """
+    Get the cache key for a profile's file content
+
+    Args:
+        content (bytes): Raw profile JSON
+
+    Returns:
+        str: Template version and content hash
+    """
+    return f"{PDF_TEMPLATE_VERSION}:{hashlib.sha256(content).hexdigest()}"
+
+
+def pdf_cache_key(filepath):
+    """
+    Get the cache key for a saved profile
+
+    Unchanged files aren't re-read, so Streamlit reruns cost a stat call.
+
+    Args:
+        filepath (str): Path to the profile JSON
+
+    Returns:
+        str: Cache key, or None if the file can't be read
+    """
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+
+    path = os.path.abspath(filepath)
+    with _keys_lock:
+        remembered = _keys.get(path)
+    if remembered and remembered[:2] == (stat.st_mtime_ns, stat.st_size):
+        return remembered[2]
+
+    try:
+        with open(filepath, 'rb') as f:
+            key = content_cache_key(f.read())
+    except OSError as e:
+        print(f"Error loading file: {e}")
+        return None
+
+    with _keys_lock:
+        _keys[path] = (stat.st_mtime_ns, stat.st_size, key)
+    return key
+
+
+def get_cached_pdf(filepath):
+    """
+    Get the generated PDF for a saved profile, if this exact content has been exported
+
+    Args:
+        filepath (str): Path to the profile JSON
+
+    Returns:
+        bytes: PDF document, or None if it still needs generating
+    """
+    key = pdf_cache_key(filepath)
+    if key is None:
+        return None
+    try:
+        return get_pdf_cache().get(key)
+    except Exception as e:
+        print(f"PDF cache unavailable: {e}")
+        return None
+
+
+def is_pdf_cached(key):
+    """
+    Check whether a PDF is cached without loading it
+
+    Args:
+        key (str): Cache key from pdf_cache_key()
+
+    Returns:
+        bool: True if the PDF is stored
+    """
+    try:
+        return get_pdf_cache().contains(key)
+    except Exception as e:
+        print(f"PDF cache unavailable: {e}")
+        return False
+
+
+def store_pdf(key, pdf_bytes):
+    """
+    Cache a generated PDF, evicting the least recently downloaded ones if over the size limit
+
+    Args:
+        key (str): Cache key of the profile content it was generated from
+        pdf_bytes (bytes): PDF document
+
+    Returns:
+        bool: True if stored - downloads are only served from the cache, so callers must not
+              report an export that couldn't be stored as done
+    """
+    try:
+        get_pdf_cache().set(key, pdf_bytes)
+        return True
+    except Exception as e:
+        print(f"Could not cache PDF: {e}")
+        return False
+
+
+def test_pdf_cache():
+    """Test that a stored PDF is served for the same content and not for changed content, in a throwaway cache"""
+    import json
+    import tempfile
+    global _cache
+
+    profile = {"parent_name": "Margaret Smith", "interview_data": {"questions_and_answers": []}}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _cache = DiskCache(os.path.join(temp_dir, "pdfs.db"), max_bytes=MAX_CACHED_PDF_BYTES)
+        filepath = os.path.join(temp_dir, "margaret.json")
+        with open(filepath, 'w') as f:
+            json.dump(profile, f)
+        try:
+            key = pdf_cache_key(filepath)
+            print(f"Before export: {get_cached_pdf(filepath)}")
+            print(f"Stored: {store_pdf(key, b'%PDF-1.3 test')}")
+            print(f"After export: {get_cached_pdf(filepath)!r}, cached: {is_pdf_cached(key)}")
+
+            profile["parent_name"] = "Margaret Johnson"
+            with open(filepath, 'w') as changed:
+                json.dump(profile, changed)
+            print(f"After edit: {get_cached_pdf(filepath)}")
+            print(f"Stats: {get_pdf_cache().stats()}")
+        finally:
+            _cache = None
+
+
+if __name__ == "__main__":
+    test_pdf_cache()
@@ -6,6 +6,10 @@ Export Family Vault interviews to PDF format
 from fpdf import FPDF
 from datetime import datetime
 import json
+from profile_model import Profile
+
+# Download chunk size for iter_pdf_chunks
+PDF_CHUNK_SIZE = 64 * 1024
 
 
 class FamilyVaultPDF(FPDF):
@@ -64,149 +68,207 @@ class FamilyVaultPDF(FPDF):
         self.ln(4)
 
 
-def export_to_pdf(interview_data, output_path):
+def build_pdf(interview_data):
     """
-    Export interview data to a formatted PDF
+    Lay out interview data as a formatted PDF document
 
     Args:
-        interview_data (dict): Complete interview data
-        output_path (str): Path where PDF should be saved
+        interview_data (dict): Complete interview data (any schema version)
 
     Returns:
-        bool: True if successful, False otherwise
+        FamilyVaultPDF: Laid-out document, ready for output()
     """
+    profile = Profile.from_dict(interview_data)
 
-    try:
-        parent_name = interview_data.get('parent_name', 'Unknown')
-        interview_date = interview_data.get('interview_date', 'Unknown date')
+    # Create PDF
+    pdf = FamilyVaultPDF(profile.parent_name)
+    pdf.add_page()
+    layout_interview(pdf, profile)
+    return pdf
 
-        # Create PDF
-        pdf = FamilyVaultPDF(parent_name)
-        pdf.add_page()
 
-        # Title page info
-        pdf.set_font('Arial', '', 11)
-        pdf.cell(0, 6, f'Interview Date: {interview_date[:10]}', 0, 1)
-        pdf.cell(0, 6, f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M")}', 0, 1)
-        pdf.ln(10)
-
-        # Interview Q&A Section
-        if 'interview_data' in interview_data:
-            pdf.chapter_title('📝 Interview Responses')
-
-            qa_data = interview_data['interview_data'].get('questions_and_answers', [])
-
-            for idx, item in enumerate(qa_data, 1):
-                pdf.section_title(f'{item.get("category", "General")} - Question {idx}')
-
-                # Main question and answer
-                pdf.question_answer(
-                    item.get('question', 'No question'),
-                    item.get('answer', 'No answer')
-                )
-
-                # Follow-up questions
-                if item.get('followups'):
-                    for fup_idx, followup in enumerate(item['followups'], 1):
-                        pdf.set_font('Arial', 'I', 10)
-                        pdf.set_text_color(100, 100, 100)
-                        pdf.cell(0, 5, f'Follow-up {fup_idx}:', 0, 1)
-
-                        pdf.question_answer(
-                            followup.get('question', ''),
-                            followup.get('answer', '')
-                        )
-
-        # Extracted Data Section
-        if interview_data.get('extracted_data'):
-            pdf.add_page()
-            pdf.chapter_title('📊 Extracted Structured Data')
-
-            extracted = interview_data['extracted_data']
-
-            # Family Tree
-            if extracted.get('family_tree'):
-                pdf.section_title('👨‍👩‍👧‍👦 Family Tree')
-                family = extracted['family_tree']
-
-                # Parents
-                if family.get('parents'):
-                    pdf.set_font('Arial', 'B', 11)
-                    pdf.cell(0, 6, 'Parents:', 0, 1)
-                    pdf.set_font('Arial', '', 10)
-                    for parent in family['parents']:
-                        name = parent.get('name', 'Unknown')
-                        birth = parent.get('birth_date', 'Unknown')
-                        place = parent.get('birth_place', 'Unknown')
-                        pdf.cell(0, 5, f'  • {name} (born {birth} in {place})', 0, 1)
-                        if parent.get('notes'):
-                            pdf.set_font('Arial', 'I', 9)
-                            pdf.multi_cell(0, 5, f'    {parent["notes"]}')
-                            pdf.set_font('Arial', '', 10)
-                    pdf.ln(3)
-
-                # Siblings
-                if family.get('siblings'):
-                    pdf.set_font('Arial', 'B', 11)
-                    pdf.cell(0, 6, 'Siblings:', 0, 1)
-                    pdf.set_font('Arial', '', 10)
-                    for sibling in family['siblings']:
-                        name = sibling.get('name', 'Unknown')
-                        relationship = sibling.get('relationship', '')
-                        birth = sibling.get('birth_date', 'Unknown')
-                        pdf.cell(0, 5, f'  • {name} ({relationship}) - born {birth}', 0, 1)
-                        if sibling.get('notes'):
-                            pdf.set_font('Arial', 'I', 9)
-                            pdf.multi_cell(0, 5, f'    {sibling["notes"]}')
-                            pdf.set_font('Arial', '', 10)
-                    pdf.ln(3)
-
-            # Places
-            if extracted.get('places'):
-                pdf.section_title('📍 Important Places')
-                for place in extracted['places']:
-                    location = place.get('location', 'Unknown')
-                    significance = place.get('significance', '')
-                    pdf.set_font('Arial', 'B', 10)
-                    pdf.cell(0, 5, f'  • {location}', 0, 1)
-                    if significance:
+def layout_interview(pdf, profile):
+    """
+    Lay out one interview from the current page onwards
+
+    Args:
+        pdf (FamilyVaultPDF): Document to add to (a single interview or a family book)
+        profile (Profile): Saved interview
+    """
+    interview_date = profile.interview_date or 'Unknown date'
+
+    # Title page info
+    pdf.set_font('Arial', '', 11)
+    pdf.cell(0, 6, f'Interview Date: {interview_date[:10]}', 0, 1)
+    pdf.cell(0, 6, f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M")}', 0, 1)
+    pdf.ln(10)
+
+    # Interview Q&A Section
+    if profile.answers:
+        pdf.chapter_title('📝 Interview Responses')
+
+        for idx, item in enumerate(profile.answers, 1):
+            pdf.section_title(f'{item.get("category", "General")} - Question {idx}')
+
+            # Main question and answer
+            pdf.question_answer(
+                item.get('question', 'No question'),
+                item.get('answer', 'No answer')
+            )
+
+            # Follow-up questions
+            if item.get('followups'):
+                for fup_idx, followup in enumerate(item['followups'], 1):
+                    pdf.set_font('Arial', 'I', 10)
+                    pdf.set_text_color(100, 100, 100)
+                    pdf.cell(0, 5, f'Follow-up {fup_idx}:', 0, 1)
+
+                    pdf.question_answer(
+                        followup.get('question', ''),
+                        followup.get('answer', '')
+                    )
+
+    # Extracted Data Section
+    extracted = profile.extracted
+    if extracted:
+        pdf.add_page()
+        pdf.chapter_title('📊 Extracted Structured Data')
+
+        # Family Tree
+        if extracted.has_family():
+            pdf.section_title('👨‍👩‍👧‍👦 Family Tree')
+            family = extracted.family_tree
+
+            # Parents
+            if family['parents']:
+                pdf.set_font('Arial', 'B', 11)
+                pdf.cell(0, 6, 'Parents:', 0, 1)
+                pdf.set_font('Arial', '', 10)
+                for parent in family['parents']:
+                    name = parent.get('name', 'Unknown')
+                    birth = parent.get('birth_date', 'Unknown')
+                    place = parent.get('birth_place', 'Unknown')
+                    pdf.cell(0, 5, f'  • {name} (born {birth} in {place})', 0, 1)
+                    if parent.get('notes'):
+                        pdf.set_font('Arial', 'I', 9)
+                        pdf.multi_cell(0, 5, f'    {parent["notes"]}')
                         pdf.set_font('Arial', '', 10)
-                        pdf.multi_cell(0, 5, f'    {significance}')
                 pdf.ln(3)
 
-            # Values and Personality
-            if extracted.get('values_and_personality'):
-                pdf.section_title('💎 Values & Personality')
-                for value in extracted['values_and_personality']:
-                    trait = value.get('value_or_trait', '')
-                    evidence = value.get('evidence', '')
-                    pdf.set_font('Arial', 'B', 10)
-                    pdf.cell(0, 5, f'  • {trait}', 0, 1)
-                    if evidence:
+            # Siblings
+            if family['siblings']:
+                pdf.set_font('Arial', 'B', 11)
+                pdf.cell(0, 6, 'Siblings:', 0, 1)
+                pdf.set_font('Arial', '', 10)
+                for sibling in family['siblings']:
+                    name = sibling.get('name', 'Unknown')
+                    relationship = sibling.get('relationship', '')
+                    birth = sibling.get('birth_date', 'Unknown')
+                    pdf.cell(0, 5, f'  • {name} ({relationship}) - born {birth}', 0, 1)
+                    if sibling.get('notes'):
+                        pdf.set_font('Arial', 'I', 9)
+                        pdf.multi_cell(0, 5, f'    {sibling["notes"]}')
                         pdf.set_font('Arial', '', 10)
-                        pdf.multi_cell(0, 5, f'    {evidence}')
                 pdf.ln(3)
 
-            # Life Lessons
-            if extracted.get('life_lessons'):
-                pdf.section_title('🎓 Life Lessons & Wisdom')
-                for lesson in extracted['life_lessons']:
-                    lesson_text = lesson.get('lesson', '')
-                    quote = lesson.get('quote', '')
-                    pdf.set_font('Arial', 'B', 10)
-                    pdf.multi_cell(0, 5, f'  • {lesson_text}')
-                    if quote:
-                        pdf.set_font('Arial', 'I', 10)
-                        pdf.multi_cell(0, 5, f'    "{quote}"')
+        # Places
+        if extracted.places:
+            pdf.section_title('📍 Important Places')
+            for place in extracted.places:
+                location = place.get('location', 'Unknown')
+                significance = place.get('significance', '')
+                pdf.set_font('Arial', 'B', 10)
+                pdf.cell(0, 5, f'  • {location}', 0, 1)
+                if significance:
                     pdf.set_font('Arial', '', 10)
-                pdf.ln(3)
+                    pdf.multi_cell(0, 5, f'    {significance}')
+            pdf.ln(3)
+
+        # Values and Personality
+        if extracted.values_and_personality:
+            pdf.section_title('💎 Values & Personality')
+            for value in extracted.values_and_personality:
+                trait = value.get('value_or_trait', '')
+                evidence = value.get('evidence', '')
+                pdf.set_font('Arial', 'B', 10)
+                pdf.cell(0, 5, f'  • {trait}', 0, 1)
+                if evidence:
+                    pdf.set_font('Arial', '', 10)
+                    pdf.multi_cell(0, 5, f'    {evidence}')
+            pdf.ln(3)
+
+        # Life Lessons
+        if extracted.life_lessons:
+            pdf.section_title('🎓 Life Lessons & Wisdom')
+            for lesson in extracted.life_lessons:
+                lesson_text = lesson.get('lesson', '')
+                quote = lesson.get('quote', '')
+                pdf.set_font('Arial', 'B', 10)
+                pdf.multi_cell(0, 5, f'  • {lesson_text}')
+                if quote:
+                    pdf.set_font('Arial', 'I', 10)
+                    pdf.multi_cell(0, 5, f'    "{quote}"')
+                pdf.set_font('Arial', '', 10)
+            pdf.ln(3)
+
+
+def render_pdf_bytes(interview_data):
+    """
+    Render interview data to PDF bytes in memory, without touching the filesystem
 
-        # Save PDF
-        pdf.output(output_path)
-        return True
+    Args:
+        interview_data (dict): Complete interview data (any schema version)
 
+    Returns:
+        bytearray: PDF document, or None if generation failed
+    """
+    try:
+        return build_pdf(interview_data).output()
     except Exception as e:
         print(f"Error generating PDF: {e}")
+        return None
+
+
+def iter_pdf_chunks(pdf_bytes, chunk_size=PDF_CHUNK_SIZE):
+    """
+    Yield a rendered PDF in chunks for streaming to a client or file
+
+    Chunks are views into the one buffer, so streaming doesn't copy the document.
+
+    Args:
+        pdf_bytes (bytes): PDF from render_pdf_bytes()
+        chunk_size (int): Bytes per chunk
+
+    Yields:
+        memoryview: Consecutive slices of the document
+    """
+    view = memoryview(pdf_bytes)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+def export_to_pdf(interview_data, output_path):
+    """
+    Export interview data to a formatted PDF file
+
+    Args:
+        interview_data (dict): Complete interview data (any schema version)
+        output_path (str): Path where PDF should be saved
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    pdf_bytes = render_pdf_bytes(interview_data)
+    if pdf_bytes is None:
+        return False
+
+    try:
+        with open(output_path, 'wb') as f:
+            for chunk in iter_pdf_chunks(pdf_bytes):
+                f.write(chunk)
+        return True
+    except OSError as e:
+        print(f"Error saving PDF: {e}")
         return False
 
 
@@ -228,6 +290,11 @@ def test_pdf_export():
         }
     }
 
+    pdf_bytes = render_pdf_bytes(sample_data)
+    if pdf_bytes is not None:
+        chunks = sum(1 for _ in iter_pdf_chunks(pdf_bytes, chunk_size=1024))
+        print(f"Rendered {len(pdf_bytes)} bytes in memory ({chunks} x 1 KB chunks)")
+
     output = "test_export.pdf"
     success = export_to_pdf(sample_data, output)
 
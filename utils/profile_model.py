@@ -0,0 +1,322 @@
+"""
+Profile Model
+Canonical in-memory form of a saved interview, migrated from older file formats once on load
+"""
+
+import os
+import json
+import tempfile
+import threading
+from extraction_schema import SECTIONS
+from json_store import write_json_atomic
+
+# Bump when the saved profile layout changes, and add a migration step below
+# 1: anything saved before versioning (legacy extracted data shapes)
+# 2: extracted data always has every section in the current shape
+PROFILE_SCHEMA_VERSION = 2
+
+# Sections holding an object rather than a list, and their empty value
+OBJECT_SECTIONS = {
+    "career_and_education": {"education": [], "jobs": []},
+    "family_tree": {"parents": [], "siblings": [], "spouse": None, "children": []}
+}
+
+# Profiles already loaded in this process, by path -> (mtime, size, Profile)
+_memory = {}
+_memory_lock = threading.Lock()
+
+
+class ExtractedData:
+    """
+    Extracted data with every section present
+
+    List sections are lists of record dicts; career_and_education and
+    family_tree are dicts with all of their keys. Keys the app doesn't know
+    about are kept in `extra` so nothing is lost when the profile is saved.
+    """
+
+    __slots__ = tuple(SECTIONS) + ("extra",)
+
+    def __init__(self, **sections):
+        for section in SECTIONS:
+            value = sections.pop(section, None)
+            if section in OBJECT_SECTIONS:
+                # Fresh lists per instance, so appending to one profile's parents can't reach another's
+                defaults = {key: list(default) if isinstance(default, list) else default
+                            for key, default in OBJECT_SECTIONS[section].items()}
+                if isinstance(value, dict):
+                    defaults.update(value)
+                value = defaults
+            elif not isinstance(value, list):
+                value = []
+            setattr(self, section, value)
+        self.extra = sections
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build from extracted data in the current format
+
+        Returns:
+            ExtractedData: The data, or None if there is none
+        """
+        if not data:
+            return None
+        return cls(**data)
+
+    def to_dict(self):
+        """Extracted data as saved in the profile"""
+        data = {section: getattr(self, section) for section in SECTIONS}
+        data.update(self.extra)
+        return data
+
+    def has_family(self):
+        """Whether the family tree has anyone in it"""
+        family = self.family_tree
+        spouse = family['spouse']
+        return bool(family['parents'] or family['siblings'] or family['children'] or (spouse and spouse.get('name')))
+
+    def __bool__(self):
+        for section in SECTIONS:
+            if section == "family_tree":
+                found = self.has_family()
+            elif section in OBJECT_SECTIONS:
+                found = any(getattr(self, section).values())
+            else:
+                found = getattr(self, section)
+            if found:
+                return True
+        return False
+
+
+class Profile:
+    """A saved interview in the current schema version"""
+
+    __slots__ = ("parent_name", "interview_date", "interview_data", "extracted", "metadata", "extra")
+
+    def __init__(self, parent_name, interview_date=None, interview_data=None, extracted=None, metadata=None, extra=None):
+        self.parent_name = parent_name
+        self.interview_date = interview_date
+        self.interview_data = interview_data
+        self.extracted = extracted
+        self.metadata = metadata
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, profile):
+        """
+        Build from a saved profile of any schema version
+
+        Args:
+            profile (dict): Saved interview data
+
+        Returns:
+            Profile: The profile
+        """
+        profile, _ = migrate_profile(profile)
+        extra = {key: value for key, value in profile.items()
+                 if key not in ("parent_name", "interview_date", "interview_data", "extracted_data", "metadata")}
+        interview_data = dict(profile.get('interview_data') or {})
+        interview_data.setdefault('questions_and_answers', [])
+        return cls(
+            parent_name=profile.get('parent_name') or 'Unknown',
+            interview_date=profile.get('interview_date'),
+            interview_data=interview_data,
+            extracted=ExtractedData.from_dict(profile.get('extracted_data')),
+            metadata=profile.get('metadata') or {},
+            extra=extra
+        )
+
+    @property
+    def answers(self):
+        """Interview Q&A with followups"""
+        return self.interview_data['questions_and_answers']
+
+    def to_dict(self):
+        """The profile as saved to JSON"""
+        profile = {
+            "parent_name": self.parent_name,
+            "interview_date": self.interview_date,
+            "interview_data": self.interview_data,
+            "extracted_data": self.extracted.to_dict() if self.extracted is not None else None,
+            "metadata": dict(self.metadata, schema_version=PROFILE_SCHEMA_VERSION)
+        }
+        profile.update(self.extra)
+        return profile
+
+
+# ============================================
+# MIGRATION
+# ============================================
+
+def _migrate_v1(profile):
+    """Older extracted data: wrapped in 'data', renamed sections, parents as {father, mother}"""
+    data = profile.get('extracted_data')
+    if not data:
+        profile['extracted_data'] = None
+        return profile
+
+    # Handle both formats: direct data or wrapped in 'data' key
+    data = data['data'] if 'data' in data else data
+    if not data:
+        profile['extracted_data'] = None
+        return profile
+
+    data = dict(data)
+    for old, new in (("important_places", "places"), ("life_lessons_and_values", "life_lessons")):
+        legacy = data.pop(old, None)
+        if not data.get(new):
+            data[new] = legacy
+
+    family = data.get('family_tree')
+    if isinstance(family, dict):
+        family = dict(family)
+        if isinstance(family.get('parents'), dict):
+            family['parents'] = [dict(parent, role=role.title()) for role, parent in family['parents'].items()
+                                 if isinstance(parent, dict)]
+        for members in ("parents", "siblings", "children"):
+            family[members] = [member for member in family.get(members) or [] if isinstance(member, dict)]
+        if not isinstance(family.get('spouse'), dict):
+            family['spouse'] = None
+        data['family_tree'] = family
+
+    profile['extracted_data'] = ExtractedData(**data).to_dict()
+    return profile
+
+
+# Step that upgrades a profile from each version to the next
+MIGRATIONS = {1: _migrate_v1}
+
+
+def profile_schema_version(profile):
+    """Schema version a saved profile was written in"""
+    return (profile.get('metadata') or {}).get('schema_version', 1)
+
+
+def migrate_profile(profile):
+    """
+    Bring a saved profile up to the current schema version
+
+    Args:
+        profile (dict): Saved interview data (not modified)
+
+    Returns:
+        tuple: (profile dict in the current version, whether anything changed)
+    """
+    version = profile_schema_version(profile)
+    if version >= PROFILE_SCHEMA_VERSION:
+        return profile, False
+
+    profile = dict(profile)
+    while version < PROFILE_SCHEMA_VERSION:
+        profile = MIGRATIONS[version](profile)
+        version += 1
+    profile['metadata'] = dict(profile.get('metadata') or {}, schema_version=PROFILE_SCHEMA_VERSION)
+    return profile, True
+
+
+def _write_back(filepath, profile, stat):
+    """Save a migrated profile, unless the file changed since it was read"""
+    try:
+        write_json_atomic(filepath, profile, indent=2, unless_changed_since=stat)
+    except Exception as e:
+        # The profile is still usable - it will be migrated again next time
+        print(f"Could not save migrated profile: {e}")
+
+
+def read_profile(filepath):
+    """
+    Read a saved profile as a dict in the current schema version
+
+    Profiles in an older version are migrated and written back, so each
+    file is only migrated the first time it is read.
+
+    Args:
+        filepath (str): Path to the profile JSON
+
+    Returns:
+        dict: Interview data (a fresh copy the caller may modify)
+
+    Raises:
+        OSError, ValueError: If the file can't be read
+    """
+    stat = os.stat(filepath)
+    with open(filepath, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+
+    profile, migrated = migrate_profile(profile)
+    if migrated:
+        _write_back(filepath, profile, stat)
+    return profile
+
+
+def load_profile(filepath):
+    """
+    Load a saved profile as a Profile, reusing it until the file changes
+
+    The returned Profile is shared - treat it as read-only and use
+    read_profile for data you want to modify.
+
+    Args:
+        filepath (str): Path to the profile JSON
+
+    Returns:
+        Profile: The profile, or None if it can't be read
+    """
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+
+    key = os.path.abspath(filepath)
+    with _memory_lock:
+        remembered = _memory.get(key)
+    if remembered and remembered[:2] == (stat.st_mtime_ns, stat.st_size):
+        return remembered[2]
+
+    try:
+        profile = Profile.from_dict(read_profile(filepath))
+        # Writing back a migration changes the file
+        stat = os.stat(filepath)
+    except Exception as e:
+        print(f"Error loading file: {e}")
+        return None
+
+    with _memory_lock:
+        _memory[key] = (stat.st_mtime_ns, stat.st_size, profile)
+    return profile
+
+
+def test_profile_model():
+    """Test migrating a legacy profile on first load"""
+    legacy = {
+        "parent_name": "Margaret Smith",
+        "interview_date": "2024-03-01T10:00:00",
+        "interview_data": {"questions_and_answers": []},
+        "extracted_data": {
+            "data": {
+                "important_places": [{"location": "Cleveland, Ohio", "significance": "Childhood home"}],
+                "family_tree": {"parents": {"father": {"name": "Walter Smith"}, "mother": {"name": "Ruth Smith"}}}
+            }
+        },
+        "voice_id": "abc123"
+    }
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(legacy, f)
+    try:
+        profile = load_profile(f.name)
+        print(f"Places: {profile.extracted.places}")
+        print(f"Parents: {profile.extracted.family_tree['parents']}")
+        print(f"Kept voice_id: {profile.extra}")
+        with open(f.name, 'r', encoding='utf-8') as saved:
+            print(f"Written back as version {profile_schema_version(json.load(saved))}")
+        print(f"Reused until changed: {load_profile(f.name) is profile}")
+        first, second = ExtractedData(), ExtractedData()
+        first.family_tree['siblings'].append({"name": "Ann"})
+        print(f"Defaults not shared: {second.family_tree['siblings'] == []}")
+    finally:
+        os.remove(f.name)
+
+
+if __name__ == "__main__":
+    test_profile_model()
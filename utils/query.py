@@ -4,10 +4,12 @@ Search through interview data and answer questions using AI
 """
 
 import os
+import re
 import json
 from pathlib import Path
 from openai import OpenAI
 from dotenv import load_dotenv
+from profile_model import read_profile
 
 # Load environment variables
 load_dotenv()
@@ -15,10 +17,49 @@ load_dotenv()
 # Initialize OpenAI client
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# "Who are Margaret's grandchildren?" / "How is Amy related to Carol?"
+RELATIVES_QUESTION = re.compile(
+    r"^\s*(?:who|list|name)\s+(?:are|were|is|was)?\s*(?:all\s+)?(?:of\s+)?(?P<name>[^?]+?)['’]s?\s+(?P<relation>[a-z-]+)\s*\??\s*$",
+    re.IGNORECASE)
+RELATED_QUESTION = re.compile(r"^\s*how\s+(?:is|was|are|were)\s+(?P<a>.+?)\s+related\s+to\s+(?P<b>[^?]+?)\s*\??\s*$",
+                              re.IGNORECASE)
+
+# "What happened in the family during the 1970s?" / "What was going on between 1950 and 1955?"
+CHRONOLOGY_QUESTION = re.compile(
+    r"^\s*what\s+(?:happened|was\s+going\s+on|went\s+on|events?\s+(?:happened|were\s+there))\b"
+    r"(?P<period>.*?\b(?:in|during|between|from|around)\b[^?]+?)\s*\??\s*$",
+    re.IGNORECASE)
+
+# "Who in the family lived in Ohio?" / "Where did Margaret grow up?"
+PLACE_PEOPLE_QUESTION = re.compile(
+    r"^\s*who\s+(?:in\s+(?:the|my|our)\s+family\s+)?(?:(?:has|have|had|ever)\s+)*"
+    r"(?P<verb>lived|lives|live|grew\s+up|was\s+born|were\s+born|is\s+from|was\s+from|came\s+from|comes\s+from|"
+    r"been|visited|went|moved)(?:\s+(?:in|to|at|from))?\s+(?P<place>[^?]+?)\s*\??\s*$",
+    re.IGNORECASE)
+PERSON_PLACES_QUESTION = re.compile(
+    r"^\s*where\s+(?:did|does|do|has|have|was|were|is)\s+(?P<name>.+?)\s+"
+    r"(?P<verb>live|lived|grow\s+up|grew\s+up|come\s+from|from|born|been|move|moved|travel|traveled|travelled)\b[^?]*\??\s*$",
+    re.IGNORECASE)
+
+# Events listed in a timeline answer before summarizing the rest
+MAX_TIMELINE_ANSWER_EVENTS = 12
+
+# Relatives that can be looked up in the family graph -> (lookup, generations, singular)
+RELATIVE_LOOKUPS = {
+    "children": ("descendants", 1, "child"), "kids": ("descendants", 1, "child"),
+    "grandchildren": ("descendants", 2, "grandchild"), "grandkids": ("descendants", 2, "grandchild"),
+    "great-grandchildren": ("descendants", 3, "great-grandchild"),
+    "descendants": ("descendants", None, "descendant"),
+    "parents": ("ancestors", 1, "parent"), "grandparents": ("ancestors", 2, "grandparent"),
+    "great-grandparents": ("ancestors", 3, "great-grandparent"), "ancestors": ("ancestors", None, "ancestor"),
+    "siblings": ("siblings_of", None, "sibling"), "spouse": ("spouses_of", None, "spouse"),
+    "husband": ("spouses_of", None, "husband"), "wife": ("spouses_of", None, "wife"),
+}
+
 
 def load_interview_file(filepath):
     """
-    Load interview data from JSON file
+    Load interview data from JSON file (profiles saved by older versions are migrated)
 
     Args:
         filepath (str): Path to the interview JSON file
@@ -27,8 +68,7 @@ def load_interview_file(filepath):
         dict: Interview data or None if failed
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_profile(filepath)
     except Exception as e:
         print(f"Error loading file: {e}")
         return None
@@ -55,6 +95,201 @@ def get_all_interview_files():
     return files
 
 
+def _join_names(names):
+    return names[0] if len(names) == 1 else f"{', '.join(names[:-1])} and {names[-1]}"
+
+
+def _find_in_graph(graph, name):
+    """The one person in the family graph a name refers to (None if unknown or ambiguous)"""
+    from entity_resolution import find_people
+
+    matches = [person["id"] for person in find_people(name.strip()) if person["id"] in graph.people]
+    return matches[0] if len(matches) == 1 else None
+
+
+def _answer_chronology(question):
+    """Answer "what happened during <period>" from the timeline index"""
+    from timeline import get_timeline, parse_date
+
+    match = CHRONOLOGY_QUESTION.match(question)
+    period = parse_date(match.group('period')) if match else None
+    if not period:
+        return None
+
+    events = get_timeline().between(period[0], period[1])
+    if not events:
+        # Nothing dated in that period - the interviews themselves may still say
+        return None
+
+    lines = [f"- {event['date']}: {event['event']} ({event['parent_name']})"
+             for event in events[:MAX_TIMELINE_ANSWER_EVENTS]]
+    if len(events) > MAX_TIMELINE_ANSWER_EVENTS:
+        lines.append(f"- ...and {len(events) - MAX_TIMELINE_ANSWER_EVENTS} more on the timeline")
+    answer = f"{len(events)} event{'s' if len(events) != 1 else ''} from that time:\n" + "\n".join(lines)
+    return {"success": True, "answer": answer, "parent_name": None, "error": None,
+            "source_label": "the family timeline"}
+
+
+def _place_kinds(verb):
+    """Which place mentions a question's verb asks about"""
+    verb = verb.lower()
+    if "born" in verb:
+        return ("born",)
+    if any(word in verb for word in ("live", "grew", "grow", "from")):
+        return ("lived", "born")
+    return ("lived", "born", "event")
+
+
+def _describe_place_mention(mention, with_place=True):
+    where = mention['place'] if with_place else ""
+    if mention['kind'] == "born":
+        text = f"born in {where}" if with_place else "born there"
+    elif mention['kind'] == "event":
+        return mention['detail']
+    else:
+        text = where or "lived there"
+    return f"{text} ({mention['detail']})" if mention['detail'] else text
+
+
+def _answer_places(question):
+    """Answer "who lived in X" and "where did X live" from the place index"""
+    from gazetteer import get_place_index, normalize_place
+
+    match = PLACE_PEOPLE_QUESTION.match(question)
+    if match:
+        place = normalize_place(match.group('place'))
+        entry = get_place_index()["places"].get(place["key"]) if place else None
+        kinds = _place_kinds(match.group('verb'))
+        mentions = [mention for mention in entry["mentions"] if mention["kind"] in kinds] if entry else []
+        if not mentions:
+            return None
+
+        by_person = {}
+        for mention in mentions:
+            by_person.setdefault(mention["person"], []).append(mention)
+        lines = [f"- {person}: {'; '.join(_describe_place_mention(mention) for mention in person_mentions)}"
+                 for person, person_mentions in sorted(by_person.items())]
+        count = f"{len(by_person)} {'person' if len(by_person) == 1 else 'people'}"
+        answer = f"{count} in the family linked to {place['name']}:\n" + "\n".join(lines)
+        return {"success": True, "answer": answer, "parent_name": None, "error": None,
+                "source_label": "the places named in the interviews"}
+
+    match = PERSON_PLACES_QUESTION.match(question)
+    if match:
+        from entity_resolution import find_people
+
+        name = match.group('name').strip()
+        names = {name.lower()}
+        for person in find_people(name):
+            names.update(alias.lower() for alias in [person["name"]] + person["aliases"])
+        people = get_place_index()["people"]
+        kinds = _place_kinds(match.group('verb'))
+        # Full names and known aliases first; otherwise "Margaret" matches "Margaret Johnson"
+        # when the people index has no alias for her
+        keys = [key for key in people if key in names]
+        if not keys:
+            words = [set(known.split()) for known in names]
+            keys = [key for key in people if any(known <= set(key.split()) for known in words)]
+
+        # Each matching person answered separately - two Margarets are never blended
+        by_person = {}
+        for key in sorted(keys):
+            for mention in people[key]:
+                if mention["kind"] in kinds:
+                    by_person.setdefault(mention["person"], []).append(mention)
+        if not by_person:
+            return None
+
+        sections = [f"{person}:\n" + "\n".join(dict.fromkeys(f"- {_describe_place_mention(mention)}"
+                                                               for mention in person_mentions))
+                    for person, person_mentions in by_person.items()]
+        answer = "\n\n".join(sections)
+        parent_name = None
+        if len(by_person) > 1:
+            answer = f"{len(by_person)} people in the family match \"{name}\":\n\n" + answer
+        else:
+            parent_name = next(iter(by_person.values()))[0]["parent_name"]
+        return {"success": True, "answer": answer, "parent_name": parent_name, "error": None,
+                "source_label": "the places named in the interviews"}
+
+    return None
+
+
+def _answer_kinship(question):
+    """Answer "who are X's <relatives>" and "how is X related to Y" from the family graph"""
+    from family_graph import get_family_graph, describe_path
+
+    graph = get_family_graph()
+    if not graph.people:
+        return None
+
+    match = RELATIVES_QUESTION.match(question)
+    if match and match.group('relation').lower() in RELATIVE_LOOKUPS:
+        person_id = _find_in_graph(graph, match.group('name'))
+        if not person_id:
+            return None
+        lookup, generations, singular = RELATIVE_LOOKUPS[match.group('relation').lower()]
+        if lookup in ("ancestors", "descendants"):
+            found = [(relative, generation) for relative, generation in getattr(graph, lookup)(person_id, generations)
+                     if generations is None or generation == generations]
+            if generations is None:
+                names = [f"{graph.name(relative)} ({describe_path([('parent' if lookup == 'ancestors' else 'child', None)] * generation)})"
+                         for relative, generation in found]
+            else:
+                names = [graph.name(relative) for relative, _ in found]
+        else:
+            names = sorted(graph.name(relative) for relative in getattr(graph, lookup)(person_id))
+        if not names:
+            # Not in the tree - the interviews themselves may still say
+            return None
+
+        person = graph.name(person_id)
+        if len(names) == 1:
+            answer = f"{person}'s {singular} is {names[0]}."
+        else:
+            answer = f"{person}'s {match.group('relation').lower()} are {_join_names(names)}."
+        return {"success": True, "answer": answer, "parent_name": person, "error": None,
+                "source_label": "the family tree"}
+
+    match = RELATED_QUESTION.match(question)
+    if match:
+        from_id = _find_in_graph(graph, match.group('b'))
+        to_id = _find_in_graph(graph, match.group('a'))
+        if not from_id or not to_id or from_id == to_id:
+            return None
+        path = graph.relationship_path(from_id, to_id)
+        if not path:
+            return None
+        answer = f"{graph.name(to_id)} is {graph.name(from_id)}'s {describe_path(path)}"
+        if len(path) > 1:
+            answer += f" (through {_join_names([graph.name(person_id) for _, person_id in path[:-1]])})"
+        return {"success": True, "answer": answer + ".", "parent_name": graph.name(from_id), "error": None,
+                "source_label": "the family tree"}
+
+    return None
+
+
+def answer_locally(question):
+    """
+    Answer a family tree, chronology or place question from the local indexes, without calling the AI
+
+    Handles "who are X's children / grandchildren / parents / ancestors /
+    siblings / spouse...", "how is X related to Y", "what happened in the
+    family during the 1970s", "who lived in Ohio" and "where did X grow up".
+
+    The indexes cover every saved interview, so only use this when searching all of them.
+
+    Args:
+        question (str): The user's question
+
+    Returns:
+        dict: Answer like search_and_answer plus source_label (where it came from, e.g.
+              "the family tree"), or None if the question isn't one the family graph,
+              timeline or place index can answer
+    """
+    return _answer_kinship(question) or _answer_chronology(question) or _answer_places(question)
+
+
 def search_and_answer(question, interview_data):
     """
     Search through interview data and generate an answer to the question
@@ -0,0 +1,144 @@
+"""
+Render Cache
+Markdown and HTML of each profile's extracted data, rendered once per profile content hash
+"""
+
+import os
+import json
+import hashlib
+import threading
+from disk_cache import DiskCache, CACHE_DIR
+from extraction import format_extraction_for_display, format_extraction_html
+from profile_model import Profile
+
+# Cache database for rendered artifacts
+RENDER_CACHE_PATH = f'{CACHE_DIR}/renders.db'
+
+# Rendered artifacts are small - one per saved profile version
+MAX_CACHED_RENDERS = 2000
+
+# Bump when format_extraction_for_display / format_extraction_html output changes
+RENDER_VERSION = "render-v1"
+
+_cache = None
+
+# Artifacts already served in this process, by profile path -> (mtime, size, artifact)
+_memory = {}
+_memory_lock = threading.Lock()
+
+
+def get_render_cache():
+    """
+    Get the shared render cache
+
+    Returns:
+        DiskCache: Cache of rendered artifacts
+    """
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(RENDER_CACHE_PATH, max_entries=MAX_CACHED_RENDERS)
+    return _cache
+
+
+def render_artifact(profile):
+    """
+    Render a profile's extracted data
+
+    Args:
+        profile (Profile): Saved interview
+
+    Returns:
+        dict: parent_name, has_data, markdown and html
+    """
+    extracted = profile.extracted
+    return {
+        "parent_name": profile.parent_name,
+        "has_data": bool(extracted),
+        "markdown": format_extraction_for_display(extracted) if extracted else "",
+        "html": format_extraction_html(extracted) if extracted else ""
+    }
+
+
+def get_profile_render(filepath):
+    """
+    Get the rendered extracted data for a saved profile
+
+    Unchanged files are served from memory without being read; changed
+    files are hashed and looked up in the shared cache, and only rendered
+    if that exact content hasn't been rendered before.
+
+    Args:
+        filepath (str): Path to the profile JSON
+
+    Returns:
+        dict: parent_name, has_data, markdown and html - or None if the file can't be read
+    """
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+
+    key = os.path.abspath(filepath)
+    with _memory_lock:
+        remembered = _memory.get(key)
+    if remembered and remembered[:2] == (stat.st_mtime_ns, stat.st_size):
+        return remembered[2]
+
+    try:
+        with open(filepath, 'rb') as f:
+            content = f.read()
+    except OSError as e:
+        print(f"Error loading file: {e}")
+        return None
+
+    cache_key = f"{RENDER_VERSION}:{hashlib.sha256(content).hexdigest()}"
+    artifact = None
+    try:
+        artifact = get_render_cache().get(cache_key)
+    except Exception as e:
+        # The cache is an optimization - render without it
+        print(f"Render cache unavailable: {e}")
+
+    if artifact is None:
+        try:
+            artifact = render_artifact(Profile.from_dict(json.loads(content.decode('utf-8'))))
+        except Exception as e:
+            print(f"Error rendering {filepath}: {e}")
+            return None
+        try:
+            get_render_cache().set(cache_key, artifact)
+        except Exception as e:
+            print(f"Could not cache render: {e}")
+
+    with _memory_lock:
+        _memory[key] = (stat.st_mtime_ns, stat.st_size, artifact)
+    return artifact
+
+
+def test_render_cache():
+    """Test that a second lookup is served without re-rendering"""
+    import tempfile
+    import time
+
+    profile = {
+        "parent_name": "Margaret Smith",
+        "extracted_data": {"places": [{"location": "Cleveland, Ohio", "significance": "Childhood home"}]}
+    }
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(profile, f)
+    try:
+        started = time.perf_counter()
+        first = get_profile_render(f.name)
+        middle = time.perf_counter()
+        second = get_profile_render(f.name)
+        finished = time.perf_counter()
+        print(first["markdown"])
+        print(first["html"])
+        print(f"First: {1000 * (middle - started):.2f} ms, repeat: {1000 * (finished - middle):.3f} ms, "
+              f"same artifact: {first is second}")
+    finally:
+        os.remove(f.name)
+
+
+if __name__ == "__main__":
+    test_render_cache()
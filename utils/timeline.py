@@ -0,0 +1,348 @@
+"""
+Timeline Module
+Normalize free-text dates into intervals and index every interview's events by time
+"""
+
+import re
+import calendar
+from datetime import date
+from json_store import ProfileIndex, PROFILES_DIR
+
+# Where normalized events are kept between runs
+TIMELINE_INDEX_PATH = 'data/timeline_index.json'
+
+# Bump when parse_date changes so every profile is normalized again
+TIMELINE_INDEX_VERSION = 2
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+MONTHS["sept"] = 9
+
+# Seasons -> (first month, last month)
+SEASONS = {"spring": (3, 5), "summer": (6, 8), "fall": (9, 11), "autumn": (9, 11)}
+
+# "the sixties" -> 1960s (two-digit decades are assumed to be in the 1900s)
+DECADE_WORDS = {"twenties": 2, "thirties": 3, "forties": 4, "fifties": 5, "sixties": 6, "seventies": 7,
+                "eighties": 8, "nineties": 9}
+
+# Named periods people date things by
+ERAS = {
+    "world war i": (1914, 1918), "world war 1": (1914, 1918), "first world war": (1914, 1918),
+    "great war": (1914, 1918), "world war ii": (1939, 1945), "world war 2": (1939, 1945),
+    "second world war": (1939, 1945), "wwii": (1939, 1945), "ww2": (1939, 1945), "wwi": (1914, 1918),
+    "great depression": (1929, 1939), "the depression": (1929, 1939), "korean war": (1950, 1953),
+    "vietnam war": (1955, 1975), "gulf war": (1990, 1991),
+}
+
+# Words that make a following decade an age, not a date ("in her 30s", "his late twenties")
+AGE_OWNERS = {"her", "his", "my", "their", "our", "your", "in"}
+
+# Precision from finest to coarsest
+PRECISIONS = ["day", "month", "season", "year", "decade", "era", "century"]
+
+_MONTH = r"(" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+_QUALIFIER = r"(?:(early|mid|middle|late)[\s-]+)?"
+
+
+# ============================================
+# DATE NORMALIZATION
+# ============================================
+
+def _month_end(year, month):
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _part(start_year, length, qualifier):
+    """Early/mid/late thirds of a span of years"""
+    if not qualifier:
+        return start_year, start_year + length - 1
+    third = max(1, length // 3)
+    if qualifier == "early":
+        return start_year, start_year + third
+    if qualifier in ("mid", "middle"):
+        return start_year + third, start_year + length - 1 - third
+    return start_year + length - 1 - third, start_year + length - 1
+
+
+def _years(first, last, precision):
+    return date(first, 1, 1), date(last, 12, 31), precision
+
+
+def _not_age(text, match):
+    """Drop a decade match that follows "her", "his", "my"... - "in her thirties" is an age"""
+    if match is None:
+        return None
+    before = re.findall(r"[a-z]+", text[:match.start()])
+    return None if before and before[-1] in AGE_OWNERS else match
+
+
+def _parse_point(text):
+    """Find the first date expression in text - (start, end, precision) or None"""
+    try:
+        match = re.search(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b", text)
+        if match:
+            day = date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+            return day, day, "day"
+        match = re.search(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b", text)
+        if match:
+            day = date(int(match.group(3)), int(match.group(1)), int(match.group(2)))
+            return day, day, "day"
+        match = re.search(r"\b" + _MONTH + r"\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b", text)
+        if match:
+            day = date(int(match.group(3)), MONTHS[match.group(1)], int(match.group(2)))
+            return day, day, "day"
+        match = re.search(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?" + _MONTH + r",?\s+(\d{4})\b", text)
+        if match:
+            day = date(int(match.group(3)), MONTHS[match.group(2)], int(match.group(1)))
+            return day, day, "day"
+    except ValueError:
+        # Not a real day (e.g. 13/45/1960) - fall through to coarser forms
+        pass
+
+    match = re.search(r"\b" + _MONTH + r",?\s+(?:of\s+)?(\d{4})\b", text)
+    if match:
+        year, month = int(match.group(2)), MONTHS[match.group(1)]
+        return date(year, month, 1), _month_end(year, month), "month"
+    match = re.search(r"\b(\d{4})-(0[1-9]|1[0-2])\b", text)
+    if match:
+        year, month = int(match.group(1)), int(match.group(2))
+        return date(year, month, 1), _month_end(year, month), "month"
+    match = re.search(r"\b(spring|summer|fall|autumn)\s+(?:of\s+)?(\d{4})\b", text)
+    if match:
+        year = int(match.group(2))
+        first, last = SEASONS[match.group(1)]
+        return date(year, first, 1), _month_end(year, last), "season"
+
+    match = re.search(r"\b" + _QUALIFIER + r"(1[5-9]|20)00['’]?s\b", text)
+    if match:
+        return _years(*_part(int(match.group(2)) * 100, 100, match.group(1)), "century")
+    match = re.search(r"\b" + _QUALIFIER + r"(1[5-9]\d|20\d)0['’]?s\b", text)
+    if match:
+        return _years(*_part(int(match.group(2)) * 10, 10, match.group(1)), "decade")
+    # Two-digit decades need "the" or an apostrophe ("the 70s", "late '70s") - a bare "30s" is usually an age
+    match = (re.search(r"\bthe\s+" + _QUALIFIER + r"['’]?(\d)0['’]?s\b", text)
+             or _not_age(text, re.search(r"\b" + _QUALIFIER + r"(?<![\w'’])['’](\d)0s\b", text)))
+    if match:
+        return _years(*_part(1900 + int(match.group(2)) * 10, 10, match.group(1)), "decade")
+    match = _not_age(text, re.search(r"\b" + _QUALIFIER + r"(" + "|".join(DECADE_WORDS) + r")\b", text))
+    if match:
+        return _years(*_part(1900 + DECADE_WORDS[match.group(2)] * 10, 10, match.group(1)), "decade")
+
+    match = re.search(r"\b" + _QUALIFIER + r"(1[5-9]\d\d|20\d\d)\b", text)
+    if match:
+        year = int(match.group(2))
+        if not match.group(1):
+            return _years(year, year, "year")
+        months = {"early": (1, 4), "mid": (5, 8), "middle": (5, 8), "late": (9, 12)}[match.group(1)]
+        return date(year, months[0], 1), _month_end(year, months[1]), "season"
+
+    for era, (first, last) in ERAS.items():
+        if re.search(r"\b" + re.escape(era) + r"\b", text):
+            return _years(first, last, "era")
+    return None
+
+
+def parse_date(text):
+    """
+    Normalize a free-text date into an interval
+
+    Understands days, months, seasons, years, decades ("1960s", "the
+    sixties", "late '70s"), centuries, ranges ("1946-66", "between 1950 and
+    1955") and named periods ("during World War II").
+
+    Args:
+        text (str): Date as written, e.g. "March 15, 1920" or "early 1960s"
+
+    Returns:
+        tuple: (start date, end date, precision) - or None if there's no date in it
+    """
+    if not text:
+        return None
+    text = str(text).lower().replace("–", "-").replace("—", "-").strip()
+
+    # Ranges: both sides must be dates ("1946-66" borrows the century)
+    match = re.search(r"^(?:.*?\b(?:from|between)\s+)?(?P<a>.+?)\s*(?:-|\bto\b|\buntil\b|\btill\b|\bthrough\b|\bthru\b|\band\b)"
+                      r"\s*(?P<b>.+)$", text)
+    if match and not re.search(r"\b\d{4}-\d{1,2}-\d{1,2}\b", text):
+        first = _parse_point(match.group('a'))
+        second_text = match.group('b')
+        if first and re.fullmatch(r"\d{2}s?\b.*", second_text):
+            second_text = f"{first[0].year // 100}{second_text}"
+        second = _parse_point(second_text)
+        if first and second and second[1] >= first[0]:
+            precision = max(first[2], second[2], key=PRECISIONS.index)
+            return first[0], second[1], precision
+
+    return _parse_point(text)
+
+
+# ============================================
+# INTERVAL TREE
+# ============================================
+
+class IntervalTree:
+    """
+    Centered interval tree over (start, end, item) with inclusive ends
+
+    Built once from a list of intervals; finds everything overlapping a
+    query interval in O(log n + matches).
+    """
+
+    def __init__(self, intervals):
+        self.size = len(intervals)
+        self.root = self._build(list(intervals))
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        points = sorted(point for start, end, _ in intervals for point in (start, end))
+        center = points[len(points) // 2]
+        here = [interval for interval in intervals if interval[0] <= center <= interval[1]]
+        left = [interval for interval in intervals if interval[1] < center]
+        right = [interval for interval in intervals if interval[0] > center]
+        return {
+            "center": center,
+            "by_start": sorted(here, key=lambda interval: interval[0]),
+            "by_end": sorted(here, key=lambda interval: interval[1], reverse=True),
+            "left": self._build(left),
+            "right": self._build(right)
+        }
+
+    def overlapping(self, start, end):
+        """
+        Find intervals overlapping [start, end]
+
+        Returns:
+            list: (start, end, item) tuples
+        """
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if end < node["center"]:
+                for interval in node["by_start"]:
+                    if interval[0] > end:
+                        break
+                    found.append(interval)
+                stack.append(node["left"])
+            elif start > node["center"]:
+                for interval in node["by_end"]:
+                    if interval[1] < start:
+                        break
+                    found.append(interval)
+                stack.append(node["right"])
+            else:
+                found.extend(node["by_start"])
+                stack.extend((node["left"], node["right"]))
+        return found
+
+
+class Timeline:
+    """Every dated event across the vault, indexed by time"""
+
+    def __init__(self, events, undated):
+        self.undated = undated
+        self.tree = IntervalTree([(date.fromisoformat(event["start"]).toordinal(),
+                                   date.fromisoformat(event["end"]).toordinal(), event) for event in events])
+        self.first_year = min((int(event["start"][:4]) for event in events), default=None)
+        self.last_year = max((int(event["end"][:4]) for event in events), default=None)
+
+    def between(self, start, end):
+        """
+        Find events overlapping a period
+
+        Args:
+            start (date): First day of the period
+            end (date): Last day of the period
+
+        Returns:
+            list: Event dicts in chronological order
+        """
+        found = self.tree.overlapping(start.toordinal(), end.toordinal())
+        return [event for _, _, event in sorted(found, key=lambda interval: (interval[0], interval[1]))]
+
+    def __len__(self):
+        return self.tree.size
+
+
+# ============================================
+# INDEX
+# ============================================
+
+def profile_events(profile):
+    """
+    Normalize the dates of one profile's events
+
+    Args:
+        profile (Profile): Saved interview
+
+    Returns:
+        list: Event dicts with start/end (ISO dates, or None if undated) and precision
+    """
+    events = []
+    for item in profile.extracted.dates_and_events if profile.extracted else []:
+        interval = parse_date(item.get('date'))
+        events.append({
+            "date": item.get('date'),
+            "event": item.get('event'),
+            "significance": item.get('significance'),
+            "people_involved": item.get('people_involved') or [],
+            "parent_name": profile.parent_name,
+            "start": interval[0].isoformat() if interval else None,
+            "end": interval[1].isoformat() if interval else None,
+            "precision": interval[2] if interval else None
+        })
+    return events
+
+
+def _timeline_entry(profile):
+    return {"events": profile_events(profile) if profile else []}
+
+
+def _build_timeline(entries):
+    events = [event for entry in entries.values() for event in entry["events"]]
+    return Timeline([event for event in events if event["start"]],
+                    [event for event in events if not event["start"]])
+
+
+_index = ProfileIndex(TIMELINE_INDEX_VERSION, _timeline_entry, _build_timeline, "timeline index")
+
+
+def get_timeline(profiles_dir=PROFILES_DIR, index_path=TIMELINE_INDEX_PATH):
+    """
+    Get the timeline of every saved interview
+
+    Only profiles that changed since the index was last saved are
+    normalized again, and the interval tree is reused until one does.
+
+    Returns:
+        Timeline: Indexed events
+    """
+    return _index.get(profiles_dir, index_path)
+
+
+def test_timeline():
+    """Test date normalization and a decade query"""
+    import time
+
+    for text in ["March 15, 1920", "15th of March 1920", "June 1944", "summer of 1965", "1960s", "early 1960s",
+                 "the late '70s", "the sixties", "1946-66", "between 1950 and 1955", "from 1946 until 1966",
+                 "1800s", "circa 1932", "during World War II", "after the war", "1965-03-02", "1960s-70s",
+                 "the 70s", "mid-'50s", "in her 30s", "in his late twenties", "in my 40s"]:
+        print(f"{text!r:>26} -> {parse_date(text)}")
+
+    events = []
+    for year in range(1900, 2020):
+        start, end, precision = parse_date(str(year))
+        events.append({"date": str(year), "event": f"Event {year}", "start": start.isoformat(),
+                       "end": end.isoformat(), "precision": precision})
+    timeline = Timeline(events, [])
+    started = time.perf_counter()
+    found = timeline.between(date(1970, 1, 1), date(1979, 12, 31))
+    print(f"1970s: {[event['date'] for event in found]} in {1000 * (time.perf_counter() - started):.3f} ms")
+
+
+if __name__ == "__main__":
+    test_timeline()
@@ -0,0 +1,136 @@
+"""
+Transcription Cache
+Persistent Whisper results keyed by a SHA-256 of the audio, shared across sessions
+"""
+
+import hashlib
+from disk_cache import DiskCache, CACHE_DIR
+
+# Cache database for transcripts
+TRANSCRIPTION_CACHE_PATH = f'{CACHE_DIR}/transcriptions.db'
+
+# Transcripts are small text - keep plenty of them
+MAX_CACHED_TRANSCRIPTS = 5000
+
+# Audio is hashed in slices of this size so large recordings are never copied
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# Bump when the request settings or stored format change so old transcripts aren't reused
+TRANSCRIPT_FORMAT = "verbose-v1"
+
+_cache = None
+
+
+def get_transcription_cache():
+    """
+    Get the shared transcription cache
+
+    Returns:
+        DiskCache: Cache of transcripts
+    """
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(TRANSCRIPTION_CACHE_PATH, max_entries=MAX_CACHED_TRANSCRIPTS)
+    return _cache
+
+
+def audio_fingerprint(view):
+    """
+    SHA-256 of audio data, hashed slice by slice straight from its buffer
+
+    Args:
+        view (memoryview): Audio data
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    for start in range(0, len(view), HASH_CHUNK_BYTES):
+        digest.update(view[start:start + HASH_CHUNK_BYTES])
+    return digest.hexdigest()
+
+
+def transcription_key(fingerprint, mode, engine):
+    """
+    Build the cache key for a recording
+
+    Args:
+        fingerprint (str): audio_fingerprint of the recording
+        mode (str): "transcribe" or "translate"
+        engine (str): cache_id of the ASR backend that produced the transcript
+
+    Returns:
+        str: Cache key
+    """
+    return f"{engine}:{TRANSCRIPT_FORMAT}:{mode}:{fingerprint}"
+
+
+def get_cached_transcript(fingerprint, mode, engine):
+    """
+    Look up a previous transcript of the same audio
+
+    Args:
+        fingerprint (str): audio_fingerprint of the recording
+        mode (str): "transcribe" or "translate"
+        engine (str): cache_id of the ASR backend
+
+    Returns:
+        dict: {"text", "segments"} transcript, or None if this audio hasn't been transcribed in this mode
+    """
+    try:
+        return get_transcription_cache().get(transcription_key(fingerprint, mode, engine))
+    except Exception as e:
+        # The cache is an optimization - never fail a transcription because of it
+        print(f"Transcription cache unavailable: {e}")
+        return None
+
+
+def store_transcript(fingerprint, mode, engine, transcript):
+    """
+    Save a transcript for reuse
+
+    Args:
+        fingerprint (str): audio_fingerprint of the recording
+        mode (str): "transcribe" or "translate"
+        engine (str): cache_id of the ASR backend
+        transcript (dict): {"text", "segments"} from transcribe_audio_detailed
+    """
+    try:
+        get_transcription_cache().set(transcription_key(fingerprint, mode, engine), transcript)
+    except Exception as e:
+        print(f"Could not cache transcript: {e}")
+
+
+def get_transcription_cache_stats():
+    """
+    Get transcription cache size and hit rate
+
+    Returns:
+        dict: entries, bytes, hits, misses, evictions and hit_rate
+    """
+    return get_transcription_cache().stats()
+
+
+def test_transcription_cache():
+    """Test hashing and a cache round trip in a throwaway cache"""
+    import os
+    import tempfile
+    global _cache
+
+    view = memoryview(b"RIFF" + bytes(3 * HASH_CHUNK_BYTES))
+    fingerprint = audio_fingerprint(view)
+    print(f"Fingerprint: {fingerprint[:16]}...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _cache = DiskCache(os.path.join(temp_dir, "transcriptions.db"), max_entries=MAX_CACHED_TRANSCRIPTS)
+        try:
+            store_transcript(fingerprint, "transcribe", "whisper-1", {"text": "Hello from the cache", "segments": []})
+            print(f"Transcribe: {get_cached_transcript(fingerprint, 'transcribe', 'whisper-1')}")
+            print(f"Translate: {get_cached_transcript(fingerprint, 'translate', 'whisper-1')}")
+            print(f"Stats: {get_transcription_cache_stats()}")
+        finally:
+            _cache = None
+
+
+if __name__ == "__main__":
+    test_transcription_cache()
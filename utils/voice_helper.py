@@ -305,6 +305,9 @@ def clone_voice_from_audio_bytes(audio_bytes, person_name):
     """
     Create a voice clone from audio bytes (e.g., from Streamlit audio input)
 
+    The recording is probed locally and transcoded only if its headers need
+    it, so each clone attempt makes exactly one upload.
+
     Args:
         audio_bytes: Audio data as bytes or file-like object
         person_name (str): Name of person for voice clone
@@ -314,9 +317,10 @@ def clone_voice_from_audio_bytes(audio_bytes, person_name):
     """
     try:
         from elevenlabs.client import ElevenLabs
+        from audio_format import normalize_audio, extension_for
+        from audio_analysis import analyze_audio, MIN_CLONE_SPEECH_SECONDS
         import os
         import tempfile
-        import subprocess
 
         # Get API key
         api_key = os.getenv('ELEVENLABS_API_KEY')
@@ -333,91 +337,42 @@ def clone_voice_from_audio_bytes(audio_bytes, person_name):
         else:
             audio_data = audio_bytes
 
-        temp_dir = tempfile.gettempdir()
-        safe_name = person_name.replace(' ', '_').replace("'", "").replace('"', '')
-
-        # Detect audio format from magic bytes
-        if audio_data[:4] == b'RIFF':
-            input_ext = '.wav'
-        elif audio_data[:4] == b'OggS':
-            input_ext = '.ogg'
-        elif audio_data[:4] == b'\x1aE\xdf\xa3':
-            input_ext = '.webm'
-        elif audio_data[:3] == b'ID3' or audio_data[:2] == b'\xff\xfb':
-            input_ext = '.mp3'
-        else:
-            input_ext = '.ogg'  # Streamlit often uses ogg
+        # Validate headers and transcode up front if the provider would reject the file
+        success, audio_data, audio_info, error = normalize_audio(audio_data)
+        if not success:
+            return False, None, error
 
-        # Try approach 1: Send raw audio directly (ElevenLabs supports webm, ogg, wav, mp3)
-        raw_audio_path = os.path.join(temp_dir, f"voice_sample_{safe_name}{input_ext}")
-        with open(raw_audio_path, 'wb') as f:
-            f.write(audio_data)
+        if audio_info["duration"] is not None and audio_info["duration"] < MIN_CLONE_SPEECH_SECONDS:
+            return False, None, (f"Audio too short ({audio_info['duration']:.0f} seconds). "
+                                 f"Need at least {MIN_CLONE_SPEECH_SECONDS} seconds.")
 
-        temp_audio_path = raw_audio_path  # Start with raw file
+        # Reject recordings without enough actual speech before uploading
+        analysis = analyze_audio(audio_data)
+        if analysis is not None and analysis['speech_seconds'] < MIN_CLONE_SPEECH_SECONDS:
+            return False, None, (f"Only {analysis['speech_seconds']:.0f} seconds of speech detected. "
+                                 f"Need at least {MIN_CLONE_SPEECH_SECONDS} seconds.")
 
-        # Check file size
-        file_size = os.path.getsize(raw_audio_path)
-        if file_size < 10000:
-            return False, None, f"Audio too short ({file_size} bytes). Need at least 30 seconds."
+        temp_dir = tempfile.gettempdir()
+        safe_name = person_name.replace(' ', '_').replace("'", "").replace('"', '')
+        audio_path = os.path.join(temp_dir, f"voice_sample_{safe_name}{extension_for(audio_info)}")
+        with open(audio_path, 'wb') as f:
+            f.write(audio_data)
 
-        # Try to use raw file first, if ElevenLabs rejects it, convert with ffmpeg
         client = ElevenLabs(api_key=api_key)
-
         try:
-            # First attempt: use raw audio file
             voice = client.voices.ivc.create(
                 name=f"{person_name}_FamilyVault",
                 description=f"Cloned voice of {person_name} from Family Vault interview",
-                files=[raw_audio_path]
+                files=[audio_path]
             )
+        finally:
             # Clean up
             try:
-                os.remove(raw_audio_path)
+                os.remove(audio_path)
             except:
                 pass
-            return True, voice.voice_id, None
 
-        except Exception as first_error:
-            # If raw file failed, try converting with ffmpeg
-            first_error_msg = str(first_error)
-            if "invalid_content" in first_error_msg.lower() or "corrupted" in first_error_msg.lower():
-                try:
-                    import imageio_ffmpeg
-                    ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
-
-                    # Convert to WAV (most reliable format)
-                    converted_path = os.path.join(temp_dir, f"converted_voice_{safe_name}.wav")
-                    result = subprocess.run(
-                        [ffmpeg_path, '-y', '-i', raw_audio_path,
-                         '-acodec', 'pcm_s16le', '-ar', '22050', '-ac', '1',
-                         converted_path],
-                        capture_output=True,
-                        text=True,
-                        timeout=60
-                    )
-
-                    if result.returncode == 0 and os.path.exists(converted_path):
-                        temp_audio_path = converted_path
-                        # Try again with converted file
-                        voice = client.voices.ivc.create(
-                            name=f"{person_name}_FamilyVault",
-                            description=f"Cloned voice of {person_name} from Family Vault interview",
-                            files=[temp_audio_path]
-                        )
-                        # Clean up
-                        for f in [raw_audio_path, converted_path]:
-                            try:
-                                os.remove(f)
-                            except:
-                                pass
-                        return True, voice.voice_id, None
-                    else:
-                        return False, None, f"Audio conversion failed: {result.stderr[:200]}"
-                except Exception as conv_error:
-                    return False, None, f"Conversion failed: {str(conv_error)}"
-            else:
-                # Different error, not format related
-                raise first_error
+        return True, voice.voice_id, None
 
     except Exception as e:
         error_msg = str(e)
@@ -446,22 +401,23 @@ def combine_audio_samples(audio_samples):
         if not audio_samples:
             return False, None, "No audio samples provided"
 
-        # Calculate total size
-        total_size = sum(len(s['audio_data']) for s in audio_samples)
+        from audio_analysis import select_clone_samples
 
-        if total_size < 50000:  # Less than ~50KB
-            return False, None, f"Audio too short ({total_size} bytes). Need more recordings."
+        # Rank samples by detected speech and recording quality
+        success, selected, error = select_clone_samples(audio_samples)
+        if not success:
+            return False, None, error
 
-        # For simplicity, use the largest sample (best quality likely)
+        # For simplicity, use the best sample
         # In production, could use pydub to concatenate
-        largest_sample = max(audio_samples, key=lambda s: len(s['audio_data']))
+        best_sample = selected[0]
 
         # Save to temp file
         temp_dir = tempfile.gettempdir()
         combined_path = os.path.join(temp_dir, "combined_voice_sample.wav")
 
         with open(combined_path, 'wb') as f:
-            f.write(largest_sample['audio_data'])
+            f.write(best_sample['audio_data'])
 
         return True, combined_path, None
 
@@ -482,9 +438,10 @@ def auto_clone_voice_from_samples(audio_samples, person_name):
     """
     try:
         from elevenlabs.client import ElevenLabs
+        from audio_format import normalize_audio, extension_for
+        from audio_analysis import select_clone_samples
         import os
         import tempfile
-        import subprocess
 
         if not audio_samples:
             return False, None, "No audio samples collected during interview"
@@ -494,92 +451,51 @@ def auto_clone_voice_from_samples(audio_samples, person_name):
         if not api_key:
             return False, None, "ElevenLabs API key not set"
 
-        # Find the largest/best audio sample
-        total_size = sum(len(s['audio_data']) for s in audio_samples)
-
-        if total_size < 30000:  # Need at least ~30KB
-            return False, None, f"Not enough audio recorded ({total_size} bytes). Need more voice samples."
+        # Validate and (only where needed) transcode every sample before ranking,
+        # so speech detection also covers recordings that arrived as ogg/webm
+        normalized_samples = []
+        last_error = None
+        for sample in audio_samples:
+            success, audio_data, audio_info, error = normalize_audio(sample['audio_data'])
+            if success:
+                normalized_samples.append({'audio_data': audio_data, 'audio_info': audio_info})
+            else:
+                last_error = error
+        if not normalized_samples:
+            return False, None, last_error or "No usable audio samples"
 
-        # Use the largest sample for best quality
-        largest_sample = max(audio_samples, key=lambda s: len(s['audio_data']))
-        audio_data = largest_sample['audio_data']
+        # Rank samples by detected speech and quality, rejecting too little speech
+        success, selected_samples, error = select_clone_samples(normalized_samples)
+        if not success:
+            return False, None, error
 
         temp_dir = tempfile.gettempdir()
         safe_name = person_name.replace(' ', '_').replace("'", "").replace('"', '')
 
-        # Detect audio format from magic bytes
-        if audio_data[:4] == b'RIFF':
-            input_ext = '.wav'
-        elif audio_data[:4] == b'OggS':
-            input_ext = '.ogg'
-        elif audio_data[:4] == b'\x1aE\xdf\xa3':
-            input_ext = '.webm'
-        elif audio_data[:3] == b'ID3' or audio_data[:2] == b'\xff\xfb':
-            input_ext = '.mp3'
-        else:
-            input_ext = '.ogg'  # Streamlit often uses ogg
-
-        # Save raw audio
-        raw_audio_path = os.path.join(temp_dir, f"auto_voice_{safe_name}{input_ext}")
-        with open(raw_audio_path, 'wb') as f:
-            f.write(audio_data)
+        # Save each selected sample as its own file (ElevenLabs accepts several)
+        audio_paths = []
+        for idx, sample in enumerate(selected_samples):
+            audio_path = os.path.join(temp_dir, f"auto_voice_{safe_name}_{idx}{extension_for(sample['audio_info'])}")
+            with open(audio_path, 'wb') as f:
+                f.write(sample['audio_data'])
+            audio_paths.append(audio_path)
 
-        # Initialize client
         client = ElevenLabs(api_key=api_key)
-
         try:
-            # First attempt: use raw audio file directly
             voice = client.voices.ivc.create(
                 name=f"{person_name}_FamilyVault",
                 description=f"Auto-cloned voice of {person_name} from Family Vault interview",
-                files=[raw_audio_path]
+                files=audio_paths
             )
+        finally:
             # Clean up
-            try:
-                os.remove(raw_audio_path)
-            except:
-                pass
-            return True, voice.voice_id, None
-
-        except Exception as first_error:
-            # If raw file failed, try converting with ffmpeg
-            first_error_msg = str(first_error)
-            if "invalid_content" in first_error_msg.lower() or "corrupted" in first_error_msg.lower():
+            for f in audio_paths:
                 try:
-                    import imageio_ffmpeg
-                    ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
-
-                    # Convert to WAV
-                    converted_path = os.path.join(temp_dir, f"converted_auto_voice_{safe_name}.wav")
-                    result = subprocess.run(
-                        [ffmpeg_path, '-y', '-i', raw_audio_path,
-                         '-acodec', 'pcm_s16le', '-ar', '22050', '-ac', '1',
-                         converted_path],
-                        capture_output=True,
-                        text=True,
-                        timeout=60
-                    )
-
-                    if result.returncode == 0 and os.path.exists(converted_path):
-                        # Try again with converted file
-                        voice = client.voices.ivc.create(
-                            name=f"{person_name}_FamilyVault",
-                            description=f"Auto-cloned voice of {person_name} from Family Vault interview",
-                            files=[converted_path]
-                        )
-                        # Clean up
-                        for f in [raw_audio_path, converted_path]:
-                            try:
-                                os.remove(f)
-                            except:
-                                pass
-                        return True, voice.voice_id, None
-                    else:
-                        return False, None, f"Audio conversion failed: {result.stderr[:200]}"
-                except Exception as conv_error:
-                    return False, None, f"Conversion failed: {str(conv_error)}"
-            else:
-                raise first_error
+                    os.remove(f)
+                except:
+                    pass
+
+        return True, voice.voice_id, None
 
     except Exception as e:
         error_msg = str(e)
@@ -604,18 +520,20 @@ def update_profile_voice_id(profile_path, voice_id):
     """
     try:
         import json
+        from json_store import write_json_atomic, file_lock
 
-        # Read existing profile
-        with open(profile_path, 'r', encoding='utf-8') as f:
-            profile = json.load(f)
+        # Locked from read to write, so an extraction saving meanwhile isn't overwritten
+        with file_lock(profile_path):
+            # Read existing profile
+            with open(profile_path, 'r', encoding='utf-8') as f:
+                profile = json.load(f)
 
-        # Add voice_id
-        profile['voice_id'] = voice_id
-        profile['voice_cloned_at'] = __import__('datetime').datetime.now().isoformat()
+            # Add voice_id
+            profile['voice_id'] = voice_id
+            profile['voice_cloned_at'] = __import__('datetime').datetime.now().isoformat()
 
-        # Save updated profile
-        with open(profile_path, 'w', encoding='utf-8') as f:
-            json.dump(profile, f, indent=2, ensure_ascii=False)
+            # Save updated profile (atomically - the app may be reading it)
+            write_json_atomic(profile_path, profile, indent=2)
 
         return True, None
 
@@ -0,0 +1,209 @@
+"""
+Voice Match Module
+Find where in the original interview recordings an answer was actually said
+"""
+
+import os
+import re
+from audio_archive import AudioArchive
+
+# Minimum word-overlap score (Dice coefficient over content words) to count as a match
+MATCH_THRESHOLD = 0.5
+
+# Answers can span a few Whisper segments
+MAX_WINDOW_SEGMENTS = 3
+
+# Segments with fewer content words than this are too vague to match on
+MIN_SEGMENT_WORDS = 3
+
+# Padding added around a matched range so playback doesn't clip the first/last word
+PLAYBACK_PADDING_SECONDS = 0.25
+
+# Function words and pronouns - ignored so "I grew up in Ohio" matches "She grew up in Ohio"
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "so", "of", "in", "on", "at", "to", "for", "with",
+    "from", "by", "as", "is", "was", "were", "are", "be", "been", "am", "it", "its", "that",
+    "this", "there", "then", "than", "i", "me", "my", "mine", "we", "us", "our", "you", "your",
+    "he", "him", "his", "she", "her", "hers", "they", "them", "their", "um", "uh", "like",
+    "just", "really", "very", "well", "oh", "yeah", "had", "have", "has", "did", "do", "does"
+}
+
+# Per-archive segment indexes, reused until the archive changes
+_index_cache = {}
+
+
+def content_tokens(text):
+    """
+    Get the meaningful words of a sentence
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        set: Lowercased content words
+    """
+    words = re.findall(r"[\w']+", (text or "").lower())
+    return {word for word in words if word not in STOPWORDS and len(word) > 1}
+
+
+def build_segment_index(archive):
+    """
+    Index every timestamped segment in an archive by its content words
+
+    Args:
+        archive (AudioArchive): Interview audio archive
+
+    Returns:
+        dict: {"segments": [(clip_id, start, end, text, tokens)], "postings": {word: [segment numbers]}}
+    """
+    key = os.path.abspath(archive.path)
+    size = os.path.getsize(archive.path)
+    cached = _index_cache.get(key)
+    if cached and cached[0] == size:
+        return cached[1]
+
+    segments = []
+    postings = {}
+    for clip_id, entry in sorted(archive.list_clips().items(), key=lambda item: item[1]["offset"]):
+        for segment in entry.get("segments", []):
+            tokens = content_tokens(segment["text"])
+            for token in tokens:
+                postings.setdefault(token, []).append(len(segments))
+            segments.append((clip_id, segment["start"], segment["end"], segment["text"], tokens))
+
+    index = {"segments": segments, "postings": postings}
+    _index_cache[key] = (size, index)
+    return index
+
+
+def _dice(a, b):
+    if not a or not b:
+        return 0.0
+    return 2.0 * len(a & b) / (len(a) + len(b))
+
+
+def find_source_segment(answer, archive_path, min_score=MATCH_THRESHOLD):
+    """
+    Find the recorded segment(s) an answer most closely repeats
+
+    Args:
+        answer (str): Answer text
+        archive_path (str): Path to the interview's audio archive
+        min_score (float): Minimum overlap score to accept
+
+    Returns:
+        dict: clip_id, start, end, text and score of the best match, or None
+    """
+    archive = AudioArchive(archive_path)
+    answer_tokens = content_tokens(answer)
+    if not archive.exists() or len(answer_tokens) < MIN_SEGMENT_WORDS:
+        return None
+
+    index = build_segment_index(archive)
+    segments = index["segments"]
+
+    # Only look at windows around segments that share at least one word with the answer
+    candidates = set()
+    for token in answer_tokens:
+        candidates.update(index["postings"].get(token, []))
+
+    best = None
+    for position in candidates:
+        clip_id = segments[position][0]
+        for first in range(max(0, position - MAX_WINDOW_SEGMENTS + 1), position + 1):
+            window_tokens = set()
+            for last in range(first, min(len(segments), first + MAX_WINDOW_SEGMENTS)):
+                if segments[last][0] != clip_id:
+                    break
+                window_tokens |= segments[last][4]
+                if last < position or len(window_tokens) < MIN_SEGMENT_WORDS:
+                    continue
+                score = _dice(answer_tokens, window_tokens)
+                if best is None or score > best["score"]:
+                    best = {
+                        "clip_id": clip_id,
+                        "start": segments[first][1],
+                        "end": segments[last][2],
+                        "text": " ".join(segment[3] for segment in segments[first:last + 1]),
+                        "score": score
+                    }
+
+    if best is None or best["score"] < min_score:
+        return None
+    return best
+
+
+def find_original_recording(answer, profile):
+    """
+    Find the original recording of an answer in a saved interview
+
+    Args:
+        answer (str): Answer text
+        profile (dict): Saved interview data
+
+    Returns:
+        dict: Match from find_source_segment plus 'archive_path', or None
+    """
+    archive_path = (profile or {}).get('metadata', {}).get('audio_archive')
+    if not archive_path or not os.path.exists(archive_path):
+        return None
+    try:
+        match = find_source_segment(answer, archive_path)
+    except Exception as e:
+        print(f"Voice match failed: {e}")
+        return None
+    if match:
+        match["archive_path"] = archive_path
+    return match
+
+
+def read_matched_audio(match):
+    """
+    Read the matched range of the original recording
+
+    Args:
+        match (dict): Result of find_original_recording
+
+    Returns:
+        bytes: WAV audio, or None if it can't be read
+    """
+    try:
+        return AudioArchive(match["archive_path"]).read_clip_range(
+            match["clip_id"],
+            max(0.0, match["start"] - PLAYBACK_PADDING_SECONDS),
+            match["end"] + PLAYBACK_PADDING_SECONDS
+        )
+    except Exception as e:
+        print(f"Could not read original recording: {e}")
+        return None
+
+
+def test_voice_match():
+    """Test matching against an archive with synthetic timestamped clips"""
+    import tempfile
+    import numpy as np
+    from audio_analysis import encode_wav
+
+    recording = encode_wav(np.zeros(16000 * 12, dtype=np.float32), 16000)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive = AudioArchive(os.path.join(temp_dir, "test.fva"))
+        archive.append_clip("q0", recording, {"segments": [
+            {"start": 0.0, "end": 4.0, "text": "I was born in Dayton, Ohio in 1952."},
+            {"start": 4.0, "end": 8.5, "text": "My father worked at the tire factory for thirty years."},
+            {"start": 8.5, "end": 12.0, "text": "We moved to Chicago when I was ten."}
+        ]})
+
+        for answer in ("She was born in Dayton, Ohio in 1952.",
+                       "Her father worked at a tire factory for thirty years.",
+                       "Her favourite colour is blue."):
+            match = find_source_segment(answer, archive.path)
+            if match:
+                audio = read_matched_audio(dict(match, archive_path=archive.path))
+                print(f"{answer!r} -> {match['clip_id']} {match['start']}-{match['end']}s "
+                      f"(score {match['score']:.2f}, {len(audio)} bytes)")
+            else:
+                print(f"{answer!r} -> no match (use TTS)")
+
+
+if __name__ == "__main__":
+    test_voice_match()